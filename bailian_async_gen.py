@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+阿里云百炼 asyncio 客户端
+与 BailianImageGenerator 提供相同的调用接口（generate_image / edit_image / generate_video /
+image_to_video / frames_to_video / translate_image），所有方法均为协程：
+轮询期间只挂起协程而不占用线程，单个进程即可同时跟踪大量 DashScope 任务，
+Gradio 的 async 处理函数也可以直接 await。
+
+依赖: pip install aiohttp
+"""
+
+import asyncio
+import os
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from bailian_image_gen import BailianImageGenerator
+from dashscope_payloads import (
+    build_headers, build_image_request, build_edit_request, build_translate_request,
+    build_video_request, build_i2v_request, build_kf2v_request, endpoint_url, extract_choice_images,
+    service_urls
+)
+from downloader import DEFAULT_DOWNLOAD_WORKERS, DOWNLOAD_CHUNK_SIZE, PART_SUFFIX, DownloadError
+from image_encoding import prepare_upload
+from image_preprocess import max_side_for
+from key_pool import parse_keys
+from media_storage import MediaStorage
+from model_registry import MODEL_REGISTRY
+from poll_schedule import AdaptivePollSchedule
+from structured_log import get_logger, log_context
+from task_poller import TERMINAL_STATUSES
+
+
+logger = get_logger("async")
+
+# 连接与下载配置
+DEFAULT_CONNECTION_LIMIT = 100       # 全部主机的最大并发连接数
+DEFAULT_CONNECTION_LIMIT_PER_HOST = 32
+
+class AsyncBailianImageGenerator:
+    """阿里云百炼 API 的 asyncio 调用类"""
+
+    # 与同步客户端共用同一套接口地址
+    API_URL = BailianImageGenerator.API_URL
+    IMAGE_EDIT_URL = BailianImageGenerator.IMAGE_EDIT_URL
+    KF2V_URL = BailianImageGenerator.KF2V_URL
+    VIDEO_URL = BailianImageGenerator.VIDEO_URL
+    MULTIModal_URL = BailianImageGenerator.MULTIModal_URL
+    TASK_URL = BailianImageGenerator.TASK_URL
+
+    MODELS = BailianImageGenerator.MODELS
+    VIDEO_MODELS = BailianImageGenerator.VIDEO_MODELS
+    EDIT_MODELS = BailianImageGenerator.EDIT_MODELS
+    TRANSLATE_MODELS = BailianImageGenerator.TRANSLATE_MODELS
+
+    def __init__(self, api_key=None, limit=DEFAULT_CONNECTION_LIMIT,
+                 limit_per_host=DEFAULT_CONNECTION_LIMIT_PER_HOST, session=None, schedule=None, storage=None,
+                 preprocessor=None, base_url=None):
+        """
+        初始化生成器
+
+        Args:
+            api_key: 阿里云百炼API Key，如果不提供则从环境变量读取
+            limit: 连接池总连接数上限
+            limit_per_host: 每个主机的连接数上限
+            session: 外部传入的 aiohttp.ClientSession（由调用方负责关闭）
+            schedule: AdaptivePollSchedule 实例，可与同步客户端的轮询服务共用
+            storage: 结果存储 MediaStorage，默认保存在当前目录
+            preprocessor: 参考图预处理 ImagePreprocessor（需要 Pillow），默认原样上传
+            base_url: 服务地址（如本地模拟服务），默认读取环境变量 DASHSCOPE_BASE_URL
+        """
+        if aiohttp is None:
+            raise ImportError("请先安装 aiohttp: pip install aiohttp")
+        # 异步客户端只使用一个 Key，配置了多个 Key 时取第一个
+        keys = parse_keys(api_key or os.environ.get("DASHSCOPE_API_KEY"))
+        self.api_key = keys[0] if keys else None
+        if not self.api_key:
+            raise ValueError("请提供API Key或设置环境变量 DASHSCOPE_API_KEY")
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._session = session
+        self._owns_session = session is None
+        self.schedule = schedule or AdaptivePollSchedule()
+        self.storage = storage or MediaStorage()
+        self.preprocessor = preprocessor
+        # 所有任务合计的并行下载数上限
+        self._download_slots = asyncio.Semaphore(DEFAULT_DOWNLOAD_WORKERS)
+        if base_url:
+            for attr, url in service_urls(base_url).items():
+                setattr(self, attr, url)
+
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _get_session(self):
+        """延迟创建 ClientSession，必须在事件循环内调用"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._limit, limit_per_host=self._limit_per_host)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """关闭自己创建的连接池"""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _submit(self, endpoint, payload, async_mode):
+        session = await self._get_session()
+        headers = build_headers(self.api_key, async_mode)
+        async with session.post(endpoint_url(self, endpoint), headers=headers, json=payload,
+                                timeout=aiohttp.ClientTimeout(total=30)) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def _poll_task(self, task_id, max_retries, interval, model=None):
+        """按自适应节奏轮询任务直到结束（SUCCEEDED / FAILED / CANCELED / UNKNOWN），超时返回 None"""
+        session = await self._get_session()
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        url = f"{self.TASK_URL}{task_id}"
+        model = model or "default"
+        started = time.monotonic()
+        deadline = started + max_retries * interval
+        polls = 0
+        await asyncio.sleep(self.schedule.first_delay(model, interval))
+        while True:
+            output = None
+            polls += 1
+            try:
+                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    response.raise_for_status()
+                    result = await response.json()
+                output = result.get("output", {})
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("轮询状态出错: %s", e, extra={"task_id": task_id, "phase": "poll",
+                                                         "error_class": type(e).__name__})
+            elapsed = time.monotonic() - started
+            if output is not None and output.get("task_status") in TERMINAL_STATUSES:
+                if output["task_status"] == "SUCCEEDED":
+                    self.schedule.record(model, elapsed, polls)
+                return output
+            if time.monotonic() >= deadline:
+                return None
+            delay = self.schedule.next_delay(model, interval, elapsed, polls, output)
+            await asyncio.sleep(min(delay, max(0, deadline - time.monotonic())))
+
+    async def _download(self, url, filepath, timeout):
+        """分块写入临时文件，大小校验通过后原子重命名，返回下载记录"""
+        session = await self._get_session()
+        tmp_path = filepath + PART_SUFFIX
+        async with self._download_slots:
+            started = time.monotonic()
+            await self._stream_to(session, url, filepath, tmp_path, timeout)
+            return {"path": filepath, "bytes": os.path.getsize(filepath),
+                    "seconds": round(time.monotonic() - started, 3), "resumes": 0}
+
+    async def _stream_to(self, session, url, filepath, tmp_path, timeout):
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                encoded = response.headers.get("Content-Encoding", "identity") != "identity"
+                expected = None if encoded else response.content_length
+            size = os.path.getsize(tmp_path)
+            if expected is not None and size != expected:
+                raise DownloadError(f"文件大小不一致: 期望 {expected}，实际 {size}")
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    async def _save_images(self, output, prefix="image", key=None):
+        urls = [item["url"] for item in output.get("results", []) if "url" in item]
+        key = key or self.storage.new_key()
+        downloads = [
+            self._download(url, self.storage.path_for("image", key, idx + 1, prefix=prefix), 60)
+            for idx, url in enumerate(urls)
+        ]
+        results = await asyncio.gather(*downloads, return_exceptions=True)
+        records = [r if isinstance(r, dict) else {"url": url, "error": str(r)} for url, r in zip(urls, results)]
+        saved_files = [r["path"] for r in records if "error" not in r]
+        return {"success": len(saved_files) > 0, "files": saved_files, "downloads": records}
+
+    async def _wait_by_kind(self, task_id, kind, model):
+        """按任务类型等待并保存结果，查询间隔与次数取自模型注册表（与同步客户端相同）"""
+        interval, max_retries = MODEL_REGISTRY.poll_profile(model, kind)
+        if kind == "video":
+            return await self._wait_for_video_result(task_id, max_retries=max_retries, interval=interval, model=model)
+        prefix = "edited" if kind == "edit" else "image"
+        return await self._wait_for_result(task_id, max_retries=max_retries, interval=interval, prefix=prefix,
+                                           model=model)
+
+    async def _wait_for_result(self, task_id, max_retries=60, interval=2, prefix="image", model=None):
+        output = await self._poll_task(task_id, max_retries, interval, model=model)
+        if output is None:
+            return {"success": False, "error": "等待超时"}
+        if output.get("task_status") != "SUCCEEDED":
+            return {"success": False, "error": output.get("message", f"任务状态: {output.get('task_status')}")}
+        return await self._save_images(output, prefix=prefix, key=task_id)
+
+    async def _wait_for_video_result(self, task_id, max_retries=300, interval=5, model=None):
+        output = await self._poll_task(task_id, max_retries, interval, model=model)
+        if output is None:
+            return {"success": False, "error": "等待视频生成超时"}
+        if output.get("task_status") != "SUCCEEDED":
+            return {"success": False, "error": output.get("message", f"任务状态: {output.get('task_status')}")}
+        video_url = output.get("video_url")
+        if not video_url:
+            return {"success": False, "error": "未获取到视频URL"}
+
+        filepath = self.storage.path_for("video", task_id, prefix="video", ext=".mp4")
+        try:
+            record = await self._download(video_url, filepath, 120)
+            return {"success": True, "files": [filepath], "downloads": [record]}
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError, DownloadError) as e:
+            return {"success": False, "error": f"下载视频失败: {str(e)}", "url": video_url}
+
+    async def _run_task(self, request, kind):
+        """提交请求并等待结果，统一异常处理"""
+        endpoint, payload, async_mode = request
+        try:
+            result = await self._submit(endpoint, payload, async_mode)
+            output = result.get("output", {})
+            if "task_id" in output:
+                with log_context(task_id=output["task_id"], model=payload["model"]):
+                    logger.info("任务已提交，任务ID: %s", output["task_id"], extra={"phase": "submit"})
+                    return await self._wait_by_kind(output["task_id"], kind, payload["model"])
+            if "choices" in output:
+                return await self._save_images(extract_choice_images(output), key=result.get("request_id"))
+            return {"success": False, "error": f"提交任务失败: {result}"}
+        except Exception as e:
+            return {"success": False, "error": f"异常: {str(e)}"}
+
+    async def _load_image(self, path, max_side=None, preprocess=True):
+        """在线程池中编码参考图，返回 (data URI, 上传体积统计)"""
+        loop = asyncio.get_running_loop()
+        preprocessor = self.preprocessor if preprocess else None
+        return await loop.run_in_executor(None, prepare_upload, path, preprocessor, max_side)
+
+    async def generate_image(self, prompt, model="wanx-v1", size="1024*1024", n=1, seed=None):
+        """生成图片"""
+        try:
+            request = build_image_request(model, prompt, size, n=n, seed=seed)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        return await self._run_task(request, "image")
+
+    async def edit_image(self, prompt, image_path, model="wanx2.1-imageedit", size="1024*1024", n=1, seed=None,
+                         edit_function="description_edit"):
+        """编辑图片（图生图）"""
+        try:
+            image_uri, upload = await self._load_image(image_path, max_side_for(size=size))
+        except Exception as e:
+            return {"success": False, "error": f"读取图片失败: {str(e)}"}
+        try:
+            request = build_edit_request(model, prompt, image_uri, size=size, n=n, seed=seed,
+                                         edit_function=edit_function)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        result = await self._run_task(request, "edit")
+        result["upload"] = upload
+        return result
+
+    async def translate_image(self, image_path, target_lang="zh", model="qwen-mt-image"):
+        """图片翻译"""
+        try:
+            # 图片翻译需要保留文字细节，不做缩放和重新压缩
+            image_uri, _ = await self._load_image(image_path, preprocess=False)
+        except Exception as e:
+            return {"success": False, "error": f"读取图片失败: {str(e)}"}
+        request = build_translate_request(image_uri, target_lang=target_lang, model=model)
+        return await self._run_task(request, "image")
+
+    async def generate_video(self, prompt, model="wan2.6-t2v", size="1280*720", duration=5, audio_url=None,
+                             negative_prompt=None):
+        """生成视频"""
+        try:
+            request = build_video_request(prompt, model=model, size=size, duration=duration,
+                                          audio_url=audio_url, negative_prompt=negative_prompt)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        return await self._run_task(request, "video")
+
+    async def image_to_video(self, prompt, image_path, model="wan2.6-i2v-flash", resolution="720P", duration=5,
+                             audio_url=None, negative_prompt=None, shot_type="single", prompt_extend=True):
+        """图生视频"""
+        try:
+            image_uri, upload = await self._load_image(image_path, max_side_for(resolution=resolution))
+        except Exception as e:
+            return {"success": False, "error": f"读取图片失败: {str(e)}"}
+        try:
+            request = build_i2v_request(prompt, image_uri, model=model, resolution=resolution, duration=duration,
+                                        audio_url=audio_url, negative_prompt=negative_prompt,
+                                        shot_type=shot_type, prompt_extend=prompt_extend)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        result = await self._run_task(request, "video")
+        result["upload"] = upload
+        return result
+
+    async def frames_to_video(self, prompt, first_frame, last_frame=None, model="wan2.2-kf2v-flash",
+                              resolution="480P", prompt_extend=True, negative_prompt=None, template=None):
+        """首尾帧生视频 / 视频特效"""
+        max_side = max_side_for(resolution=resolution)
+        try:
+            first_uri, upload = await self._load_image(first_frame, max_side)
+            last_uri = None
+            if last_frame:
+                last_uri, last_upload = await self._load_image(last_frame, max_side)
+                upload = {k: upload[k] + last_upload[k] for k in upload}
+        except Exception as e:
+            return {"success": False, "error": f"读取图片失败: {str(e)}"}
+        request = build_kf2v_request(prompt, first_uri, last_uri, model=model, resolution=resolution,
+                                     prompt_extend=prompt_extend, negative_prompt=negative_prompt,
+                                     template=template)
+        result = await self._run_task(request, "video")
+        result["upload"] = upload
+        return result
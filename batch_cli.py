@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量生成命令行
+从 JSONL / CSV 文件读取任务，按并发上限同时提交，每完成一个任务就向清单文件（JSONL）追加一行结果，
+结束时输出吞吐量（任务/分钟）与耗时分位数。
+
+任务字段（JSONL 每行一个对象，CSV 第一行为表头）:
+    type: image（默认）/ edit / video / i2v / kf2v / translate
+    id: 任务标识，缺省为行号；配合 --skip-done 跳过清单中已成功的任务
+    prompt, model, size, n, seed, resolution, duration, negative_prompt, target_lang
+    image（或 image_path）: edit / i2v / translate 的参考图
+    first_frame, last_frame: kf2v 的首尾帧
+
+用法:
+    python batch_cli.py prompts.jsonl --concurrency 8 --manifest manifest.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from bailian_image_gen import BailianImageGenerator
+from http_pool import HttpPool
+from image_preprocess import ImagePreprocessor
+from job_journal import DEFAULT_JOURNAL_FILE, JobJournal
+from metrics import JsonLinesMetrics
+from poll_schedule import quantile
+from profiling import DEFAULT_PROFILE_DIR, MODES as PROFILE_MODES, GenerationProfiler
+from rate_limiter import DEFAULT_MAX_RUNNING, DEFAULT_SUBMIT_QPS, RateLimiter
+from result_cache import ResultCache
+from structured_log import setup_logging
+
+
+# 任务类型 -> (生成器方法, 可用参数)
+JOB_TYPES = {
+    "image": ("generate_image", ("prompt", "model", "size", "n", "seed")),
+    "edit": ("edit_image", ("prompt", "image_path", "model", "size", "n", "seed")),
+    "video": ("generate_video", ("prompt", "model", "size", "duration", "negative_prompt")),
+    "i2v": ("image_to_video", ("prompt", "image_path", "model", "resolution", "duration", "negative_prompt")),
+    "kf2v": ("frames_to_video", ("prompt", "first_frame", "last_frame", "model", "resolution", "negative_prompt")),
+    "translate": ("translate_image", ("image_path", "target_lang", "model")),
+}
+INT_FIELDS = ("n", "seed", "duration")
+DEFAULT_CONCURRENCY = 4
+
+
+def load_jobs(path):
+    """
+    读取任务文件（按扩展名区分 CSV 与 JSONL）
+
+    Returns:
+        list: 任务字典，已补全 id / type，整数字段已转换
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(enumerate(csv.DictReader(f), 1))
+        else:
+            rows = []
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    rows.append((line_no, json.loads(line)))
+                except ValueError as e:
+                    raise ValueError(f"第 {line_no} 行: 不是有效的 JSON ({e})") from None
+
+    jobs = []
+    for line_no, row in rows:
+        if not isinstance(row, dict):
+            raise ValueError(f"第 {line_no} 行: 应为 JSON 对象，实际为 {type(row).__name__}")
+        job = {k: v for k, v in row.items() if v not in (None, "")}
+        if "image" in job:
+            job.setdefault("image_path", job.pop("image"))
+        for field in INT_FIELDS:
+            if field in job:
+                try:
+                    job[field] = int(job[field])
+                except (TypeError, ValueError):
+                    raise ValueError(f"第 {line_no} 行: {field} 应为整数，实际为 {job[field]!r}") from None
+        job["id"] = str(job.get("id", line_no))
+        job["type"] = job.get("type", "image")
+        if job["type"] not in JOB_TYPES:
+            raise ValueError(f"第 {line_no} 行: 未知的任务类型 {job['type']}")
+        jobs.append(job)
+    return jobs
+
+
+def load_done_ids(manifest_path):
+    """清单中已成功的任务 id"""
+    if not os.path.exists(manifest_path):
+        return set()
+    done = set()
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("success"):
+                done.add(record.get("id"))
+    return done
+
+
+def run_job(generator, job):
+    """执行单个任务，返回清单记录"""
+    method, fields = JOB_TYPES[job["type"]]
+    kwargs = {k: job[k] for k in fields if k in job}
+    started = time.monotonic()
+    try:
+        result = getattr(generator, method)(**kwargs)
+    except Exception as e:
+        result = {"success": False, "error": f"异常: {str(e)}"}
+    record = {
+        "id": job["id"],
+        "type": job["type"],
+        "success": bool(result.get("success")),
+        "seconds": round(time.monotonic() - started, 2),
+        "files": result.get("files", []),
+    }
+    for key in ("error", "cached", "upload", "timing"):
+        if key in result:
+            record[key] = result[key]
+    return record
+
+
+def run_batch(generator, jobs, manifest_path, concurrency=DEFAULT_CONCURRENCY):
+    """
+    并发执行任务，完成一个写一行清单
+
+    Returns:
+        dict: 吞吐统计
+    """
+    latencies = []
+    succeeded = 0
+    started = time.monotonic()
+    with open(manifest_path, "a", encoding="utf-8") as manifest, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+        futures = [executor.submit(run_job, generator, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+            manifest.flush()
+            latencies.append(record["seconds"])
+            succeeded += record["success"]
+            status = "✅" if record["success"] else f"❌ {record.get('error', '')}"
+            print(f"[{done}/{len(jobs)}] {record['id']} {record['seconds']}s {status}")
+
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "jobs": len(jobs),
+        "succeeded": succeeded,
+        "failed": len(jobs) - succeeded,
+        "elapsed_seconds": round(elapsed, 1),
+        "jobs_per_minute": round(len(jobs) * 60 / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_seconds": quantile(latencies, 0.5) if latencies else 0.0,
+        "p95_seconds": quantile(latencies, 0.95) if latencies else 0.0,
+    }
+
+
+def positive_int(value):
+    """argparse 类型：正整数"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"应为正整数: {value}")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="阿里云百炼批量生成")
+    parser.add_argument("jobs", help="任务文件（.jsonl 或 .csv）")
+    parser.add_argument("--manifest", default="manifest.jsonl", help="结果清单文件（JSONL，追加写入）")
+    parser.add_argument("--concurrency", type=positive_int, default=DEFAULT_CONCURRENCY, help="同时进行的任务数")
+    parser.add_argument("--submit-qps", type=float, default=DEFAULT_SUBMIT_QPS, help="每个提交接口的频率上限（次/秒）")
+    parser.add_argument("--max-running", type=positive_int, default=DEFAULT_MAX_RUNNING, help="每个模型同时运行的任务数上限")
+    parser.add_argument("--skip-done", action="store_true", help="跳过清单中已成功的任务")
+    parser.add_argument("--cache", action="store_true", help="启用结果缓存（固定 seed 的重复任务不再提交）")
+    parser.add_argument("--preprocess", action="store_true", help="上传前按目标尺寸压缩参考图（需要 Pillow）")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL_FILE, help="任务日志文件")
+    parser.add_argument("--resume", action="store_true", help="开始前先恢复任务日志中未完成的任务")
+    parser.add_argument("--api-key", help="API Key（多个 Key 用逗号分隔，按进行中任务数负载均衡），默认读取环境变量 DASHSCOPE_API_KEY")
+    parser.add_argument("--metrics-log", help="每个任务的分阶段耗时（读取编码 / 排队 / 提交 / 轮询 / 下载 / 写盘）追加写入该 JSONL 文件")
+    parser.add_argument("--log-level", help="日志级别（DEBUG / INFO / WARNING），默认读取环境变量 BAILIAN_LOG_LEVEL，再默认 INFO")
+    parser.add_argument("--log-file", help="JSON 日志文件（每行一条，含 task_id / model / phase 等字段），默认读取环境变量 BAILIAN_LOG_FILE")
+    parser.add_argument("--base-url", help="服务地址（如 mock_dashscope.py 启动的本地模拟服务），默认读取环境变量 DASHSCOPE_BASE_URL")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help="分析每个任务的生成调用（sample 采样 / cprofile），结束时写出汇总报告")
+    parser.add_argument("--profile-memory", action="store_true", help="同时用 tracemalloc 记录参考图编码与请求体构建的内存分配")
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR, help="分析结果目录")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(args.log_level, args.log_file)
+    try:
+        jobs = load_jobs(args.jobs)
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取任务文件失败: {e}")
+        sys.exit(1)
+    if args.skip_done:
+        done = load_done_ids(args.manifest)
+        remaining = [job for job in jobs if job["id"] not in done]
+        print(f"跳过 {len(jobs) - len(remaining)} 个已完成的任务")
+        jobs = remaining
+    if not jobs:
+        print("没有需要执行的任务")
+        return
+
+    profiler = None
+    if args.profile:
+        profiler = GenerationProfiler(args.profile_dir)
+        profiler.enable(args.profile, args.profile_memory)
+    try:
+        generator = BailianImageGenerator(
+            args.api_key, http_pool=HttpPool(pool_maxsize=max(16, args.concurrency)),
+            cache=ResultCache() if args.cache else None,
+            preprocessor=ImagePreprocessor() if args.preprocess else None,
+            journal=JobJournal(args.journal),
+            rate_limiter=RateLimiter(submit_qps=args.submit_qps, max_running=args.max_running),
+            base_url=args.base_url,
+            metrics=JsonLinesMetrics(args.metrics_log) if args.metrics_log else None,
+            profiler=profiler)
+    except (ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if args.resume:
+        generator.resume_pending()
+
+    print(f"开始批量生成: {len(jobs)} 个任务，并发 {args.concurrency}")
+    stats = run_batch(generator, jobs, args.manifest, args.concurrency)
+    print("-" * 50)
+    print(f"完成 {stats['succeeded']}/{stats['jobs']}，失败 {stats['failed']}，耗时 {stats['elapsed_seconds']}s")
+    print(f"吞吐量: {stats['jobs_per_minute']} 任务/分钟  "
+          f"耗时 p50: {stats['p50_seconds']}s  p95: {stats['p95_seconds']}s")
+    print(f"结果清单: {args.manifest}")
+    if profiler is not None:
+        print(f"分析报告: {', '.join(profiler.disable()) or '无'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端性能基准测试
+按给定并发执行 generate_image / edit_image / image_to_video / frames_to_video 任务，统计:
+    吞吐量（任务/秒）与成功率
+    提交请求耗时 p50 / p95 / p99（单次 POST 往返，不含排队）
+    出结果耗时 p50 / p95 / p99（调用开始到文件下载完成，按任务类型分别统计）
+    每个异步任务的轮询请求数、上传 / 下载字节数、进程峰值内存（RSS）
+默认在本进程内启动 mock_dashscope 模拟服务（不需要 API Key，不产生费用），--base-url 指定其他服务。
+结果写入 JSON 文件（记录当前 git 提交与参数），--compare 与之前的结果逐项对比，
+用于验证连接池、轮询、缓存等改动的效果。
+
+用法:
+    python benchmark.py --jobs 200 --concurrency 16 --output bench.json
+    python benchmark.py --workload image=3,i2v=1 --submit-qps 20 --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from bailian_image_gen import BailianImageGenerator
+from batch_cli import run_job
+from http_pool import HttpPool
+from media_storage import MediaStorage
+from mock_dashscope import add_mock_arguments, config_from_args, start_mock_server, synthetic_png
+from poll_schedule import quantile
+from rate_limiter import DEFAULT_MAX_RUNNING, DEFAULT_SUBMIT_QPS, RateLimiter
+from structured_log import setup_logging
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+
+# 基准测试支持的任务类型（batch_cli 的 JOB_TYPES 子集）
+WORKLOAD_TYPES = ("image", "edit", "i2v", "kf2v")
+DEFAULT_WORKLOAD = "image=1,edit=1,i2v=1,kf2v=1"
+DEFAULT_JOBS = 40
+DEFAULT_CONCURRENCY = 8
+DEFAULT_REFERENCE_SIZE = 1024
+BENCH_API_KEY = "bench-key"
+# 对比时展示的指标: (名称, 结果中的路径, 数值越大越好)
+COMPARE_METRICS = (
+    ("吞吐量（任务/秒）", ("jobs_per_second",), True),
+    ("成功率", ("success_rate",), True),
+    ("提交耗时 p50", ("submit_latency", "p50"), False),
+    ("提交耗时 p95", ("submit_latency", "p95"), False),
+    ("提交耗时 p99", ("submit_latency", "p99"), False),
+    ("出结果耗时 p50", ("time_to_result", "p50"), False),
+    ("出结果耗时 p95", ("time_to_result", "p95"), False),
+    ("出结果耗时 p99", ("time_to_result", "p99"), False),
+    ("每任务轮询次数", ("polls_per_task",), False),
+    ("上传字节", ("bytes_uploaded",), False),
+    ("下载字节", ("bytes_downloaded",), False),
+    ("峰值内存 MB", ("peak_rss_mb",), False),
+)
+
+
+class RequestRecorder:
+    """按请求类别（submit / poll / cancel / download）记录耗时与字节数（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.submit_latencies = []
+        self.async_submits = 0
+        self.bytes_uploaded = 0
+        self.bytes_downloaded = 0
+        self.errors = 0
+
+    @staticmethod
+    def classify(method, url):
+        if "/api/v1/tasks/" in url:
+            return "cancel" if method == "POST" else "poll"
+        return "submit" if method == "POST" else "download"
+
+    def record(self, method, url, kwargs, response, elapsed):
+        category = self.classify(method, url)
+        body = response.request.body if response is not None else None
+        uploaded = len(body) if body else 0
+        downloaded = 0
+        if response is not None:
+            length = response.headers.get("Content-Length")
+            if length is not None:
+                downloaded = int(length)
+            elif not kwargs.get("stream"):
+                downloaded = len(response.content)
+        with self._lock:
+            self.counts[category] = self.counts.get(category, 0) + 1
+            self.bytes_uploaded += uploaded
+            self.bytes_downloaded += downloaded
+            if response is None:
+                self.errors += 1
+            elif category == "submit":
+                self.submit_latencies.append(elapsed)
+                if response.ok and (kwargs.get("headers") or {}).get("X-DashScope-Async") == "enable":
+                    self.async_submits += 1
+
+
+class InstrumentedHttpPool(HttpPool):
+    """统计每个请求耗时与字节数的 HttpPool，其余行为不变"""
+
+    def __init__(self, recorder, **kwargs):
+        super().__init__(**kwargs)
+        self.recorder = recorder
+
+    def request(self, method, url, **kwargs):
+        started = time.perf_counter()
+        response = None
+        try:
+            response = super().request(method, url, **kwargs)
+            return response
+        finally:
+            self.recorder.record(method, url, kwargs, response, time.perf_counter() - started)
+
+
+def parse_workload(text):
+    """解析 "image=3,i2v=1" 形式的任务配比，返回按权重展开的类型序列"""
+    sequence = []
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in WORKLOAD_TYPES:
+            raise ValueError(f"未知的任务类型 {name}，可选: {', '.join(WORKLOAD_TYPES)}")
+        sequence.extend([name] * int(weight or 1))
+    if not sequence:
+        raise ValueError("任务配比为空")
+    return sequence
+
+
+def build_jobs(count, workload, reference):
+    """按配比轮流生成 count 个任务"""
+    jobs = []
+    for i in range(count):
+        job_type = workload[i % len(workload)]
+        job = {"id": f"bench-{i}", "type": job_type, "prompt": f"benchmark {i}"}
+        if job_type in ("edit", "i2v"):
+            job["image_path"] = reference
+        elif job_type == "kf2v":
+            job["first_frame"] = job["last_frame"] = reference
+        jobs.append(job)
+    return jobs
+
+
+def percentiles(values):
+    """p50 / p95 / p99（秒，保留 3 位小数）"""
+    values = sorted(values)
+    if not values:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {"count": len(values), **{f"p{int(q * 100)}": round(quantile(values, q), 3) for q in (0.5, 0.95, 0.99)}}
+
+
+def peak_rss_mb():
+    """进程峰值常驻内存（MB），不支持的平台返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)), text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(generator, jobs, concurrency, recorder):
+    """
+    并发执行任务并汇总指标
+
+    Args:
+        generator: 使用 InstrumentedHttpPool 的 BailianImageGenerator
+        jobs: build_jobs 生成的任务
+        concurrency: 同时执行的任务数
+        recorder: generator 连接池使用的 RequestRecorder
+
+    Returns:
+        dict: 基准测试结果
+    """
+    records = []
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as executor:
+        futures = [executor.submit(run_job, generator, job) for job in jobs]
+        for future in as_completed(futures):
+            records.append(future.result())
+    elapsed = time.monotonic() - started
+
+    succeeded = [r for r in records if r["success"]]
+    errors = {}
+    for record in records:
+        if not record["success"]:
+            errors[record.get("error", "")] = errors.get(record.get("error", ""), 0) + 1
+    by_type = {}
+    for job_type in sorted({r["type"] for r in records}):
+        by_type[job_type] = percentiles([r["seconds"] for r in succeeded if r["type"] == job_type])
+    return {
+        "jobs": len(records),
+        "succeeded": len(succeeded),
+        "failed": len(records) - len(succeeded),
+        "success_rate": round(len(succeeded) / len(records), 3) if records else 0.0,
+        "elapsed_seconds": round(elapsed, 2),
+        "jobs_per_second": round(len(records) / elapsed, 3) if elapsed > 0 else 0.0,
+        "submit_latency": percentiles(recorder.submit_latencies),
+        "time_to_result": percentiles([r["seconds"] for r in succeeded]),
+        "time_to_result_by_type": by_type,
+        "requests": dict(recorder.counts),
+        "request_errors": recorder.errors,
+        "polls_per_task": round(recorder.counts.get("poll", 0) / recorder.async_submits, 2)
+        if recorder.async_submits else 0.0,
+        "bytes_uploaded": recorder.bytes_uploaded,
+        "bytes_downloaded": recorder.bytes_downloaded,
+        "peak_rss_mb": peak_rss_mb(),
+        "errors": errors,
+    }
+
+
+def compare_results(current, baseline):
+    """打印与基准结果的逐项对比"""
+    print(f"对比基准: {baseline.get('commit') or '?'} ({baseline.get('timestamp', '')})")
+    print(f"{'指标':<16}{'基准':>14}{'当前':>14}{'变化':>10}")
+    for label, path, higher_is_better in COMPARE_METRICS:
+        old, new = baseline, current
+        for key in path:
+            old = (old or {}).get(key)
+            new = (new or {}).get(key)
+        if old is None or new is None:
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "-"
+        better = (new > old) if higher_is_better else (new < old)
+        mark = "" if new == old else ("✅" if better else "⚠️")
+        print(f"{label:<16}{old:>14}{new:>14}{change:>10} {mark}")
+
+
+def print_summary(result):
+    print("-" * 50)
+    print(f"完成 {result['succeeded']}/{result['jobs']}，耗时 {result['elapsed_seconds']}s，"
+          f"吞吐量 {result['jobs_per_second']} 任务/秒")
+    submit, ttr = result["submit_latency"], result["time_to_result"]
+    print(f"提交耗时 p50 {submit['p50']}s  p95 {submit['p95']}s  p99 {submit['p99']}s")
+    print(f"出结果耗时 p50 {ttr['p50']}s  p95 {ttr['p95']}s  p99 {ttr['p99']}s")
+    for job_type, stats in result["time_to_result_by_type"].items():
+        print(f"    {job_type:<6} p50 {stats['p50']}s  p95 {stats['p95']}s  ({stats['count']} 个)")
+    print(f"每任务轮询 {result['polls_per_task']} 次，请求数 {result['requests']}")
+    print(f"上传 {result['bytes_uploaded']} 字节，下载 {result['bytes_downloaded']} 字节，"
+          f"峰值内存 {result['peak_rss_mb']} MB")
+    for error, count in result["errors"].items():
+        print(f"❌ {count} 个任务失败: {error}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="百炼客户端端到端性能基准测试")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="任务总数")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="同时执行的任务数")
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD,
+                        help=f"任务配比，如 image=3,i2v=1（可选 {', '.join(WORKLOAD_TYPES)}）")
+    parser.add_argument("--submit-qps", type=float, default=DEFAULT_SUBMIT_QPS, help="每个提交接口的频率上限（次/秒）")
+    parser.add_argument("--max-running", type=int, default=DEFAULT_MAX_RUNNING, help="每个模型同时运行的任务数上限")
+    parser.add_argument("--reference", help="edit / i2v / kf2v 使用的参考图，默认生成纯色 PNG")
+    parser.add_argument("--reference-size", type=int, default=DEFAULT_REFERENCE_SIZE, help="生成参考图的边长")
+    parser.add_argument("--base-url", help="被测服务地址，默认在本进程内启动模拟服务")
+    parser.add_argument("--api-key", help="API Key（仅 --base-url 时需要，默认读取环境变量 DASHSCOPE_API_KEY）")
+    parser.add_argument("--output", help="结果 JSON 文件")
+    parser.add_argument("--compare", help="与之前的结果 JSON 对比")
+    parser.add_argument("--verbose", action="store_true", help="显示生成器的逐任务日志（默认只显示警告）")
+    mock = parser.add_argument_group("模拟服务参数（未指定 --base-url 时生效）")
+    add_mock_arguments(mock)
+    # 基准测试默认缩短任务耗时，几十个任务一分钟内完成
+    parser.set_defaults(image_latency=1.0, video_latency=3.0, sync_latency=0.5)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging("INFO" if args.verbose else "WARNING")
+    try:
+        workload = parse_workload(args.workload)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    server = None
+    mock_config = None
+    base_url = args.base_url
+    api_key = args.api_key or os.environ.get("DASHSCOPE_API_KEY")
+    if not base_url:
+        mock_config = config_from_args(args)
+        server, base_url = start_mock_server(mock_config)
+        api_key = BENCH_API_KEY
+        print(f"已启动模拟服务: {base_url}")
+
+    with tempfile.TemporaryDirectory(prefix="bailian-bench-") as workdir:
+        reference = args.reference
+        if not reference:
+            reference = os.path.join(workdir, "reference.png")
+            with open(reference, "wb") as f:
+                f.write(synthetic_png(args.reference_size, args.reference_size, 128))
+        recorder = RequestRecorder()
+        try:
+            generator = BailianImageGenerator(
+                api_key, http_pool=InstrumentedHttpPool(recorder, pool_maxsize=max(16, args.concurrency)),
+                storage=MediaStorage(workdir),
+                rate_limiter=RateLimiter(submit_qps=args.submit_qps, max_running=args.max_running),
+                base_url=base_url)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+        jobs = build_jobs(args.jobs, workload, reference)
+        print(f"开始基准测试: {len(jobs)} 个任务（{args.workload}），并发 {args.concurrency}")
+        result = run_benchmark(generator, jobs, args.concurrency, recorder)
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "jobs": args.jobs, "concurrency": args.concurrency, "workload": args.workload,
+            "submit_qps": args.submit_qps, "max_running": args.max_running,
+            "base_url": args.base_url or "mock",
+        },
+        "mock": {
+            "image_latency": args.image_latency, "video_latency": args.video_latency,
+            "sync_latency": args.sync_latency, "submit_latency": args.submit_latency, "sigma": args.sigma,
+            "fail_rate": args.fail_rate, "throttle_rate": args.throttle_rate, "error_rate": args.error_rate,
+            "seed": args.seed,
+        } if mock_config else None,
+        **result,
+    }
+    if server is not None:
+        result["server"] = server.state.stats()
+        server.shutdown()
+
+    print_summary(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare_results(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
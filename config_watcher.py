@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置文件热加载
+按修改时间与文件大小检测配置文件变化（标准库没有跨平台的 inotify，轮询 stat 的开销可以忽略），
+变化后重新读取并交给 apply 回调整体替换，读取失败（例如其他进程正在写入）时保留当前配置，下次检查再试。
+多进程部署时每个进程各自检查，修改文件后所有进程都会在一个检查周期内生效，无需重启。
+"""
+
+import os
+import threading
+
+from structured_log import get_logger
+
+
+logger = get_logger("config")
+
+DEFAULT_CHECK_INTERVAL = 2.0   # 后台检查间隔（秒）
+
+
+class ConfigWatcher:
+    """监视单个配置文件，变化时重新加载（线程安全）"""
+
+    def __init__(self, path, load, apply, interval=DEFAULT_CHECK_INTERVAL):
+        """
+        Args:
+            path: 配置文件路径
+            load: load(path) -> 配置对象，解析失败时抛出异常
+            apply: apply(配置对象)，整体替换当前配置
+            interval: 后台检查间隔（秒）
+        """
+        self.path = path
+        self.load = load
+        self.apply = apply
+        self.interval = interval
+        self.version = 0
+        self._signature = self._stat()
+        self._failed = None            # 最近一次读取失败时的文件状态，文件再次变化前不重复尝试
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def mark_current(self):
+        """本进程刚写入配置文件后调用，避免把自己的修改再加载一次"""
+        with self._lock:
+            self._signature = self._stat()
+            self.version += 1
+
+    def check(self):
+        """
+        检查文件是否变化，变化时重新加载
+
+        Returns:
+            bool: 是否加载了新配置
+        """
+        signature = self._stat()
+        if signature is None or signature in (self._signature, self._failed):
+            return False
+        with self._lock:
+            if signature in (self._signature, self._failed):
+                return False
+            try:
+                config = self.load(self.path)
+            except Exception as e:
+                self._failed = signature
+                logger.warning("重新加载 %s 失败，继续使用当前配置: %s", self.path, e, exc_info=True)
+                return False
+            self.apply(config)
+            self._signature = signature
+            self.version += 1
+        logger.info("🔄 已重新加载 %s", self.path)
+        return True
+
+    def start(self):
+        """启动后台检查线程（重复调用无效）"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DashScope 请求体构建
+同步（BailianImageGenerator）和异步（AsyncBailianImageGenerator）客户端共用，
+每个构建函数返回 (endpoint, payload, async_mode)：
+    endpoint   - 接口类别，通过 ENDPOINT_ATTRS 映射到生成器上的 URL 常量
+    payload    - 请求 JSON
+    async_mode - 是否需要 X-DashScope-Async 头（异步任务模式）
+接口、同步 / 异步模式、可选时长与附加参数都从 model_registry 查询，不再按模型名称分支。
+"""
+
+import os
+
+from model_registry import MODEL_REGISTRY
+
+DEFAULT_BASE_URL = "https://dashscope.aliyuncs.com"
+# 生成器类上的 URL 常量名 -> 路径
+URL_PATHS = {
+    "API_URL": "/api/v1/services/aigc/text2image/image-synthesis",
+    "IMAGE_EDIT_URL": "/api/v1/services/aigc/image2image/image-synthesis",
+    "KF2V_URL": "/api/v1/services/aigc/image2video/video-synthesis",
+    "VIDEO_URL": "/api/v1/services/aigc/video-generation/video-synthesis",
+    "MULTIModal_URL": "/api/v1/services/aigc/multimodal-generation/generation",
+    "TASK_URL": "/api/v1/tasks/",
+}
+
+# 接口类别 -> 生成器类上的 URL 常量名
+ENDPOINT_ATTRS = {
+    "text2image": "API_URL",
+    "image2image": "IMAGE_EDIT_URL",
+    "kf2v": "KF2V_URL",
+    "video": "VIDEO_URL",
+    "multimodal": "MULTIModal_URL",
+}
+
+
+def service_urls(base_url=None):
+    """
+    各接口的完整 URL {URL 常量名: URL}
+
+    Args:
+        base_url: 服务地址，默认读取环境变量 DASHSCOPE_BASE_URL（例如本地模拟服务 mock_dashscope.py），
+            未设置时为 DashScope 官方地址
+    """
+    base_url = (base_url or os.environ.get("DASHSCOPE_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+    return {attr: base_url + path for attr, path in URL_PATHS.items()}
+
+
+def endpoint_url(client, endpoint):
+    """根据接口类别取生成器上配置的 URL"""
+    return getattr(client, ENDPOINT_ATTRS[endpoint])
+
+
+def build_headers(api_key, async_mode=False):
+    """构造请求头"""
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+    if async_mode:
+        headers["X-DashScope-Async"] = "enable"
+    return headers
+
+
+def build_image_request(model, prompt, size, n=1, seed=None):
+    """
+    文生图请求，注册表中登记为多模态接口的模型（z-image-turbo）走同步接口
+
+    Raises:
+        ValueError: 尺寸不是该模型的可选尺寸
+    """
+    spec = MODEL_REGISTRY.resolve(model, "image")
+    spec.validate(size=size)
+    if spec.endpoint == "multimodal":
+        payload = {
+            "model": model,
+            "input": {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "text": prompt
+                            }
+                        ]
+                    }
+                ]
+            },
+            "parameters": {
+                "prompt_extend": False,
+                "size": size
+            }
+        }
+        return spec.endpoint, payload, spec.async_mode
+
+    payload = {
+        "model": model,
+        "input": {
+            "prompt": prompt
+        },
+        "parameters": {
+            "size": size,
+            "n": n
+        }
+    }
+    if seed is not None:
+        payload["parameters"]["seed"] = seed
+    return spec.endpoint, payload, spec.async_mode
+
+
+def build_edit_request(model, prompt, image_uri, size="1024*1024", n=1, seed=None, edit_function="description_edit"):
+    """
+    图像编辑请求，qwen-image-edit 系列（注册表中的多模态模型）走同步接口，其余走 image2image 异步接口
+
+    Raises:
+        ValueError: 尺寸不是该模型的可选尺寸
+    """
+    spec = MODEL_REGISTRY.resolve(model, "edit")
+    spec.validate(size=size)
+    if spec.endpoint == "multimodal":
+        payload = {
+            "model": model,
+            "input": {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "image": image_uri
+                            },
+                            {
+                                "text": prompt
+                            }
+                        ]
+                    }
+                ]
+            },
+            "parameters": {
+                "n": n,
+                "size": size,
+                "prompt_extend": True,
+                "watermark": False
+            }
+        }
+        return spec.endpoint, payload, spec.async_mode
+
+    payload = {
+        "model": model,
+        "input": {
+            "function": edit_function,
+            "prompt": prompt,
+            "base_image_url": image_uri
+        },
+        "parameters": {
+            "n": n
+        }
+    }
+    if seed is not None:
+        payload["parameters"]["seed"] = seed
+
+    if edit_function in ["description_edit", "stylization_all"]:
+        payload["parameters"]["strength"] = 0.5
+    return spec.endpoint, payload, spec.async_mode
+
+
+def build_translate_request(image_uri, target_lang="zh", model="qwen-mt-image"):
+    """图片翻译请求（结构与文生图略有不同）"""
+    spec = MODEL_REGISTRY.resolve(model, "translate")
+    payload = {
+        "model": model,
+        "input": {
+            "image_url": image_uri
+        },
+        "parameters": {
+            "translation": {
+                "target_language": target_lang
+            }
+        }
+    }
+    return spec.endpoint, payload, spec.async_mode
+
+
+def build_video_request(prompt, model="wan2.6-t2v", size="1280*720", duration=5, audio_url=None, negative_prompt=None):
+    """
+    文生视频请求
+
+    Raises:
+        ValueError: 尺寸不是该模型的可选尺寸，或时长不是整数
+    """
+    spec = MODEL_REGISTRY.resolve(model, "video")
+    spec.validate(size=size, duration=duration)
+    payload = {
+        "model": model,
+        "input": {
+            "prompt": prompt
+        },
+        "parameters": {
+            "size": size
+        }
+    }
+
+    if audio_url:
+        payload["input"]["audio_url"] = audio_url
+
+    if negative_prompt:
+        payload["input"]["negative_prompt"] = negative_prompt
+
+    # 根据模型限制时长
+    duration = spec.clamp_duration(duration)
+    if duration is not None:
+        payload["parameters"]["duration"] = duration
+
+    # 某些模型支持 prompt_extend
+    if "prompt_extend" in spec.options:
+        payload["parameters"]["prompt_extend"] = True
+    return spec.endpoint, payload, spec.async_mode
+
+
+def build_i2v_request(prompt, image_uri, model="wan2.6-i2v-flash", resolution="720P", duration=5,
+                      audio_url=None, negative_prompt=None, shot_type="single", prompt_extend=True):
+    """
+    图生视频请求
+
+    Raises:
+        ValueError: 时长不是整数
+    """
+    spec = MODEL_REGISTRY.resolve(model, "i2v")
+    spec.validate(duration=duration)
+    payload = {
+        "model": model,
+        "input": {
+            "prompt": prompt,
+            "img_url": image_uri
+        },
+        "parameters": {
+            "resolution": resolution,
+            "prompt_extend": prompt_extend
+        }
+    }
+
+    if audio_url:
+        payload["input"]["audio_url"] = audio_url
+    if negative_prompt:
+        payload["input"]["negative_prompt"] = negative_prompt
+
+    # 处理 wan2.6 的镜头类型
+    if "shot_type" in spec.options:
+        payload["parameters"]["shot_type"] = shot_type
+
+    # 根据模型限制时长
+    duration = spec.clamp_duration(duration)
+    if duration is not None:
+        payload["parameters"]["duration"] = duration
+    return spec.endpoint, payload, spec.async_mode
+
+
+def build_kf2v_request(prompt, first_uri, last_uri=None, model="wan2.2-kf2v-flash", resolution="480P",
+                       prompt_extend=True, negative_prompt=None, template=None):
+    """首尾帧生视频 / 视频特效请求"""
+    spec = MODEL_REGISTRY.resolve(model, "kf2v")
+    payload = {
+        "model": model,
+        "input": {
+            "first_frame_url": first_uri
+        },
+        "parameters": {
+            "resolution": resolution,
+            "prompt_extend": prompt_extend
+        }
+    }
+
+    # 根据模式填充 input
+    if template:
+        payload["input"]["template"] = template
+    else:
+        if last_uri:
+            payload["input"]["last_frame_url"] = last_uri
+        if prompt:
+            payload["input"]["prompt"] = prompt
+        if negative_prompt:
+            payload["input"]["negative_prompt"] = negative_prompt
+    return spec.endpoint, payload, spec.async_mode
+
+
+def extract_choice_images(output):
+    """把多模态同步接口的 choices 结构转换为与异步任务一致的 {"results": [{"url": ...}]}"""
+    output_data = {
+        "results": []
+    }
+    for choice in output.get("choices", []):
+        if "message" in choice and "content" in choice["message"]:
+            for content in choice["message"]["content"]:
+                if "image" in content:
+                    output_data["results"].append({
+                        "url": content["image"].strip()
+                    })
+    return output_data
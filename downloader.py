@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成结果下载
+按固定大小分块流式写入临时文件（*.part），校验完成后原子重命名为目标文件，
+内存占用与文件大小无关；传输中断时通过 HTTP Range 从断点续传。
+DownloadPool 用有界线程池并行下载多个结果文件。
+"""
+
+import contextvars
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from structured_log import get_logger
+
+
+logger = get_logger("download")
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+MAX_RESUMES = 3
+PART_SUFFIX = ".part"
+DEFAULT_DOWNLOAD_WORKERS = 8
+
+# OSS 简单上传对象的 ETag 为内容 MD5，可用于校验；分片上传的 ETag 带 "-N" 后缀，不能校验
+_MD5_ETAG = re.compile(r'^"?([0-9a-fA-F]{32})"?$')
+
+
+class DownloadError(Exception):
+    """下载失败或校验不通过"""
+
+
+def download_to_file(http, url, filepath, timeout=60, chunk_size=DOWNLOAD_CHUNK_SIZE,
+                     max_resumes=MAX_RESUMES, expected_size=None, sha256=None):
+    """
+    流式下载 url 到 filepath
+
+    Args:
+        http: HttpPool 或 requests.Session（需要支持 get(..., stream=True)）
+        url: 下载地址
+        filepath: 目标文件路径，下载完成前不会出现
+        timeout: 单次请求的连接 / 读取超时（秒）
+        chunk_size: 分块大小（字节）
+        max_resumes: 传输中断后最多续传次数
+        expected_size: 期望的文件大小（字节），不一致时报错
+        sha256: 期望的 SHA-256 十六进制摘要，不一致时报错
+
+    Returns:
+        dict: {"path", "bytes", "seconds", "write_seconds", "resumes"}，write_seconds 为其中写入磁盘的时间
+    """
+    started = time.monotonic()
+    write_seconds = 0.0
+    tmp_path = filepath + PART_SUFFIX
+    total = None
+    etag = None
+    resumes = 0
+    if os.path.exists(tmp_path):
+        # 上次异常退出残留的临时文件，内容来源无法确认，不续传
+        os.remove(tmp_path)
+
+    try:
+        while True:
+            offset = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                with http.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                    if offset and response.status_code == 416:
+                        # 已经下载完整
+                        break
+                    response.raise_for_status()
+                    if offset and response.status_code != 206:
+                        # 服务器不支持 Range，从头下载
+                        offset = 0
+                    length = response.headers.get("Content-Length")
+                    # 压缩传输时 Content-Length 为压缩后大小，无法用于校验
+                    encoded = response.headers.get("Content-Encoding", "identity") != "identity"
+                    total = offset + int(length) if length is not None and not encoded else None
+                    etag = etag or response.headers.get("ETag")
+                    with open(tmp_path, "ab" if offset else "wb") as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            write_started = time.perf_counter()
+                            f.write(chunk)
+                            write_seconds += time.perf_counter() - write_started
+                break
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                if resumes >= max_resumes:
+                    raise DownloadError(f"下载中断且续传失败: {e}")
+                resumes += 1
+                logger.warning("下载中断，第 %d 次续传: %s", resumes, e,
+                               extra={"phase": "download", "error_class": type(e).__name__})
+
+        size = os.path.getsize(tmp_path)
+        if total is not None and size != total:
+            raise DownloadError(f"文件大小不一致: 期望 {total}，实际 {size}")
+        if expected_size is not None and size != expected_size:
+            raise DownloadError(f"文件大小不一致: 期望 {expected_size}，实际 {size}")
+        _verify_checksums(tmp_path, sha256, etag)
+
+        write_started = time.perf_counter()
+        os.replace(tmp_path, filepath)
+        write_seconds += time.perf_counter() - write_started
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {"path": filepath, "bytes": size, "seconds": round(time.monotonic() - started, 3),
+            "write_seconds": round(write_seconds, 3), "resumes": resumes}
+
+
+def _verify_checksums(path, sha256, etag):
+    md5_match = _MD5_ETAG.match(etag or "")
+    if not sha256 and not md5_match:
+        return
+    sha_hasher = hashlib.sha256() if sha256 else None
+    md5_hasher = hashlib.md5() if md5_match else None
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            if sha_hasher:
+                sha_hasher.update(chunk)
+            if md5_hasher:
+                md5_hasher.update(chunk)
+    if sha_hasher and sha_hasher.hexdigest() != sha256.lower():
+        raise DownloadError("SHA-256 校验失败")
+    if md5_hasher and md5_hasher.hexdigest() != md5_match.group(1).lower():
+        raise DownloadError("MD5 (ETag) 校验失败")
+
+
+class DownloadPool:
+    """有界下载线程池：同一任务的多个结果并行下载，多个任务共用并发上限；下载线程沿用调用方的日志上下文（task_id 等）"""
+
+    def __init__(self, http, max_workers=DEFAULT_DOWNLOAD_WORKERS):
+        """
+        Args:
+            http: HttpPool 连接池
+            max_workers: 同时进行的下载数上限
+        """
+        self.http = http
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="download")
+
+    def download(self, url, filepath, timeout=60):
+        """下载单个文件（占用一个下载名额），失败抛出异常"""
+        return self._submit(url, filepath, timeout).result()
+
+    def download_all(self, jobs, timeout=60):
+        """
+        并行下载多个文件
+
+        Args:
+            jobs: [(url, filepath), ...]
+            timeout: 单个文件的请求超时（秒）
+
+        Returns:
+            list: 与 jobs 顺序一致的下载记录，成功为 download_to_file 的返回值，
+                  失败为 {"path", "url", "error"}
+        """
+        futures = [self._submit(url, path, timeout) for url, path in jobs]
+        records = []
+        for (url, path), future in zip(jobs, futures):
+            try:
+                records.append(future.result())
+            except Exception as e:
+                records.append({"path": path, "url": url, "error": str(e)})
+        return records
+
+    def _submit(self, url, filepath, timeout):
+        # 每个下载单独复制一份上下文（同一个 Context 不能同时在多个线程中进入）
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, download_to_file, self.http, url, filepath, timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
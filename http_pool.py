@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享 HTTP 连接池
+为 BailianImageGenerator 的提交、轮询和下载请求提供 keep-alive 连接复用，
+避免每次请求都重新进行 TCP + TLS 握手
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# 默认连接池配置
+DEFAULT_POOL_CONNECTIONS = 4     # 缓存的主机连接池数量（DashScope + OSS 结果域名）
+DEFAULT_POOL_MAXSIZE = 16        # 每个主机保留的最大空闲连接数
+DEFAULT_MAX_RETRIES = 2          # 传输层重试次数（仅连接建立失败，状态码与读取超时由 RetryPolicy 决定是否重试）
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+
+class HttpPool:
+    """基于 requests.Session 的连接池，所有 API 调用共用"""
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR, pool_block=False):
+        """
+        Args:
+            pool_connections: 缓存的主机连接池数量
+            pool_maxsize: 每个主机的最大连接数
+            max_retries: 连接建立失败时的传输层重试次数（请求尚未发出，POST 也不会重复提交）；
+                429 / 5xx 与读取超时不在传输层重试，统一由 RetryPolicy 退避与熔断，避免两层重试叠加
+            backoff_factor: 重试退避系数
+            pool_block: 连接数达到上限时是否阻塞等待空闲连接
+        """
+        self.pool_maxsize = pool_maxsize
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=backoff_factor,
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+            pool_block=pool_block,
+        )
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._requests_by_host = {}
+
+    def request(self, method, url, **kwargs):
+        """发送请求，统计每个主机的请求次数"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._requests_by_host[host] = self._requests_by_host.get(host, 0) + 1
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """
+        连接池统计信息
+
+        Returns:
+            dict: {host: {"requests", "connections_opened", "reuse_ratio"}}
+            connections_opened 为实际建立的 TCP 连接数，远小于 requests 说明 keep-alive 生效
+        """
+        with self._lock:
+            stats = {host: {"requests": count, "connections_opened": 0, "reuse_ratio": 0.0}
+                     for host, count in self._requests_by_host.items()}
+
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            entry = stats.setdefault(host, {"requests": 0, "connections_opened": 0, "reuse_ratio": 0.0})
+            entry["connections_opened"] += pool.num_connections
+
+        for entry in stats.values():
+            if entry["requests"]:
+                entry["reuse_ratio"] = round(1 - entry["connections_opened"] / entry["requests"], 3)
+        return stats
+
+    def close(self):
+        """关闭所有连接"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
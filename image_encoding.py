@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+参考图编码
+把本地图片读取并编码为 data URI（edit_image / image_to_video / frames_to_video / translate_image 共用），
+结果放入进程内 LRU 缓存，键为 (绝对路径, 修改时间, 文件大小, 预处理配置)：
+同一张参考图反复使用时只需一次 stat，不再重复读盘、缩放和 base64 编码。
+可选传入 ImagePreprocessor（见 image_preprocess.py），编码前先缩放并重新压缩。
+"""
+
+import base64
+import os
+import threading
+from collections import OrderedDict
+
+
+MIME_TYPES = {
+    'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'png': 'image/png',
+    'gif': 'image/gif', 'webp': 'image/webp', 'bmp': 'image/bmp'
+}
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024      # 缓存的 data URI 总长度上限
+
+
+def mime_type_for(path):
+    """按扩展名推断 MIME 类型，未知类型按 png 处理"""
+    ext = path.lower().split('.')[-1] if '.' in path else 'png'
+    return MIME_TYPES.get(ext, 'image/png')
+
+
+def encode_file(path):
+    """读取文件并编码为 data URI（不经过缓存）"""
+    with open(path, "rb") as f:
+        data = base64.b64encode(f.read()).decode("utf-8")
+    return f"data:{mime_type_for(path)};base64,{data}"
+
+
+def encode_upload(path, preprocessor=None, max_side=None):
+    """
+    编码参考图，提供 preprocessor 时先缩放 / 重新压缩（不经过缓存）
+
+    Returns:
+        tuple: (data URI, {"original_bytes", "upload_bytes", "saved_bytes"})
+    """
+    original_bytes = os.path.getsize(path)
+    processed = preprocessor.process(path, max_side=max_side) if preprocessor else None
+    if processed is None:
+        uri, upload_bytes = encode_file(path), original_bytes
+    else:
+        data, mime = processed
+        uri, upload_bytes = f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}", len(data)
+    stats = {"original_bytes": original_bytes, "upload_bytes": upload_bytes,
+             "saved_bytes": original_bytes - upload_bytes}
+    return uri, stats
+
+
+class DataUriCache:
+    """data URI 的 LRU 缓存（线程安全）"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            max_entries: 最多缓存的图片数
+            max_bytes: 缓存的 data URI 总长度上限
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()      # (path, mtime_ns, size, 预处理配置) -> (data URI, 统计)
+        self._bytes = 0
+
+    def get_data_uri(self, path):
+        """返回图片的 data URI，文件被修改后自动失效"""
+        return self.get_upload(path)[0]
+
+    def get_upload(self, path, preprocessor=None, max_side=None):
+        """
+        返回图片的 data URI 与上传体积统计，文件被修改后自动失效
+
+        Args:
+            path: 图片路径
+            preprocessor: ImagePreprocessor，None 表示原样编码
+            max_side: 预处理时的长边上限（像素）
+
+        Returns:
+            tuple: (data URI, {"original_bytes", "upload_bytes", "saved_bytes"})
+        """
+        st = os.stat(path)
+        token = (preprocessor.cache_token(), max_side) if preprocessor else None
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size, token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], dict(entry[1])
+            self.misses += 1
+
+        uri, stats = encode_upload(path, preprocessor, max_side)
+        with self._lock:
+            if key not in self._entries and len(uri) <= self.max_bytes:
+                self._entries[key] = (uri, stats)
+                self._bytes += len(uri)
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    _, (evicted, _) = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return uri, dict(stats)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# 进程内共享的缓存实例
+DATA_URI_CACHE = DataUriCache()
+
+
+def to_data_uri(path):
+    """读取参考图并编码为 data URI（使用共享缓存）"""
+    return DATA_URI_CACHE.get_data_uri(path)
+
+
+def prepare_upload(path, preprocessor=None, max_side=None):
+    """读取参考图、按需预处理并编码为 data URI（使用共享缓存），同时返回上传体积统计"""
+    return DATA_URI_CACHE.get_upload(path, preprocessor, max_side)
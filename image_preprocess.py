@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+参考图预处理（可选，依赖 Pillow）
+上传前把参考图缩小到目标尺寸 / 分辨率档位、去掉 EXIF 等元数据并重新编码为 JPEG / WebP，
+手机拍摄的十几 MB 原图通常可以缩小一个数量级，提交更快，也更不容易触发 30 秒超时。
+
+默认不启用：Web 界面设置环境变量 BAILIAN_PREPROCESS=1 开启，batch_cli.py 加 --preprocess，代码中传入 preprocessor。
+
+依赖: pip install pillow
+"""
+
+import io
+import os
+
+from structured_log import get_logger
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+
+logger = get_logger("preprocess")
+
+# 开启参考图预处理的环境变量（1 / true / yes / on）
+PREPROCESS_ENV = "BAILIAN_PREPROCESS"
+# 视频分辨率档位 -> 长边像素
+RESOLUTION_LONG_SIDE = {"480P": 832, "720P": 1280, "1080P": 1920}
+DEFAULT_QUALITY = 90
+
+
+def max_side_for(size=None, resolution=None):
+    """
+    根据输出尺寸（如 1024*1024）或分辨率档位（如 720P）计算参考图长边上限
+
+    Returns:
+        int: 长边像素；无法判断时返回 None（不缩放）
+    """
+    if size:
+        try:
+            return max(int(v) for v in str(size).lower().replace("x", "*").split("*"))
+        except ValueError:
+            return None
+    if resolution:
+        return RESOLUTION_LONG_SIDE.get(str(resolution).upper())
+    return None
+
+
+def preprocess_enabled():
+    """环境变量 BAILIAN_PREPROCESS 是否开启了参考图预处理"""
+    return os.environ.get(PREPROCESS_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class ImagePreprocessor:
+    """缩放 + 去元数据 + 重新编码"""
+
+    def __init__(self, quality=DEFAULT_QUALITY, fmt=None):
+        """
+        Args:
+            quality: JPEG / WebP 编码质量（1-95）
+            fmt: 输出格式 JPEG 或 WEBP；None 表示自动（带透明通道用 WEBP，否则 JPEG）
+        """
+        if Image is None:
+            raise ImportError("请先安装 Pillow: pip install pillow")
+        self.quality = quality
+        self.fmt = fmt.upper() if fmt else None
+
+    def cache_token(self):
+        """参与编码缓存键的配置项，配置不同的结果不能混用"""
+        return ("preprocess", self.quality, self.fmt)
+
+    def process(self, path, max_side=None):
+        """
+        处理一张图片
+
+        Args:
+            path: 图片路径
+            max_side: 长边上限（像素），None 表示不缩放
+
+        Returns:
+            tuple: (bytes, mime_type)；处理后反而更大或 Pillow 无法处理时返回 None，调用方应使用原图
+        """
+        with open(path, "rb") as f:
+            original = f.read()
+        try:
+            return self._reencode(original, max_side)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            # 无法识别的格式、截断的文件、超大图片等：原图仍可能正常上传，交给服务端处理
+            logger.warning("参考图预处理失败，使用原图上传 (%s): %s", path, e, extra={"phase": "encode"})
+            return None
+
+    def _reencode(self, original, max_side):
+        with Image.open(io.BytesIO(original)) as img:
+            # 按 EXIF 方向旋转后再丢弃元数据，避免图片方向出错
+            img = ImageOps.exif_transpose(img)
+            if max_side and max(img.size) > max_side:
+                img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+            has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+            fmt = self.fmt or ("WEBP" if has_alpha else "JPEG")
+            if fmt == "JPEG":
+                img = img.convert("RGB")
+            elif img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if has_alpha else "RGB")
+
+            buffer = io.BytesIO()
+            img.save(buffer, format=fmt, quality=self.quality, optimize=True)
+        data = buffer.getvalue()
+        if len(data) >= len(original):
+            return None
+        return data, "image/webp" if fmt == "WEBP" else "image/jpeg"
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务日志
+每次提交异步任务时把任务 ID、类型、模型和请求参数追加写入本地 JSONL 文件，任务状态变化时追加一行状态记录。
+进程在等待期间退出（Web 界面重启、命令行被中断）后，重新启动时可以从日志中找到未完成的任务，
+继续等待并下载结果，不会浪费已经计费的生成任务。
+
+日志格式（每行一个 JSON 对象）:
+    {"event": "submit", "task_id", "kind", "model", "params", "time", "key_id"?}
+    {"event": "status", "task_id", "status", "time", ...}
+"""
+
+import json
+import os
+import threading
+import time
+
+
+DEFAULT_JOURNAL_FILE = "jobs_journal.jsonl"
+# DashScope 任务结果只保留 24 小时，超过后无法再恢复
+TASK_RETENTION = 24 * 3600
+# 不需要恢复的状态：已下载完成，或任务本身已结束且没有结果
+FINAL_STATUSES = {"DOWNLOADED", "FAILED", "CANCELED", "UNKNOWN", "EXPIRED"}
+
+
+def strip_data_uris(value):
+    """把请求参数中的 base64 图片替换为占位说明，避免日志文件膨胀"""
+    if isinstance(value, dict):
+        return {k: strip_data_uris(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [strip_data_uris(v) for v in value]
+    if isinstance(value, str) and value.startswith("data:"):
+        return f"<data-uri {len(value)} chars>"
+    return value
+
+
+class JobJournal:
+    """追加写入的任务日志（线程安全）"""
+
+    def __init__(self, path=DEFAULT_JOURNAL_FILE):
+        """
+        Args:
+            path: 日志文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record_submit(self, task_id, kind, model, params, key_id=None):
+        """
+        记录已提交的任务
+
+        Args:
+            task_id: DashScope 任务 ID
+            kind: 结果类型，image / edit / video，决定恢复时的等待与保存方式
+            model: 模型名称
+            params: 请求体（base64 图片会被替换为占位说明）
+            key_id: 创建任务的 API Key 指纹（使用多个 Key 时，恢复任务需要用同一个 Key 查询）
+        """
+        entry = {"event": "submit", "task_id": task_id, "kind": kind, "model": model,
+                 "params": strip_data_uris(params)}
+        if key_id:
+            entry["key_id"] = key_id
+        self._append(entry)
+
+    def record_status(self, task_id, status, **extra):
+        """记录任务状态，如 SUCCEEDED / FAILED / DOWNLOADED，extra 为附加字段（文件列表、错误信息等）"""
+        self._append({"event": "status", "task_id": task_id, "status": status, **extra})
+
+    def pending(self, max_age=TASK_RETENTION):
+        """
+        未完成的任务（已提交但没有下载完成或失败记录）
+
+        Args:
+            max_age: 只返回提交时间在该秒数之内的任务，更早的任务结果已无法获取
+
+        Returns:
+            list: 提交记录（附带 last_status 字段），按提交时间排序
+        """
+        tasks = {}
+        for entry in self._read():
+            task_id = entry.get("task_id")
+            if entry.get("event") == "submit":
+                tasks[task_id] = dict(entry, last_status="SUBMITTED")
+            elif task_id in tasks:
+                tasks[task_id]["last_status"] = entry.get("status")
+        now = time.time()
+        return [task for task in tasks.values()
+                if task["last_status"] not in FINAL_STATUSES and now - task.get("time", 0) <= max_age]
+
+    def compact(self, max_age=TASK_RETENTION):
+        """重写日志，只保留仍可恢复的任务，避免文件无限增长"""
+        with self._lock:
+            keep = {task["task_id"] for task in self.pending(max_age)}
+            lines = [entry for entry in self._read() if entry.get("task_id") in keep]
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in lines:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+
+    def _append(self, entry):
+        entry.setdefault("time", time.time())
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # 进程崩溃时可能留下写了一半的最后一行
+                    continue
+        return entries
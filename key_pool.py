@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多 API Key 负载均衡
+DashScope 的提交 QPS 与同时处理任务数按账号计算，配置多个账号的 Key 后总吞吐量随 Key 数量线性增加：
+    提交时选择进行中任务最少的 Key（least-outstanding），任务结束前一直计入该 Key；
+    异步任务固定由创建它的 Key 查询、取消（其他账号查不到该任务）；
+    返回鉴权 / 欠费（401 / 403）或配额耗尽（429）的 Key 暂时移出，冷却后自动恢复。
+只剩一个可用 Key 时不再移出，行为与单 Key 相同。
+"""
+
+import hashlib
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from structured_log import get_logger
+
+
+logger = get_logger("keys")
+
+# 鉴权失败、账号欠费或无权限：需要人工处理，冷却时间较长
+AUTH_STATUSES = frozenset([401, 403])
+AUTH_COOLDOWN = 600.0
+# 重试后仍然限流：账号配额耗尽，短暂移出
+QUOTA_STATUSES = frozenset([429])
+QUOTA_COOLDOWN = 60.0
+# 已固定 Key 的任务数上限，超出时丢弃最早的记录
+MAX_PINNED_TASKS = 10000
+
+
+class NoAvailableKeyError(Exception):
+    """所有 API Key 都处于冷却中"""
+
+
+def parse_keys(value):
+    """把逗号、分号、空白或换行分隔的 Key 字符串拆分为列表（去重并保持顺序）"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[\s,;]+", value)
+    keys = []
+    for key in value:
+        key = key.strip()
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def key_id(key):
+    """Key 的短指纹，用于日志与任务日志，不暴露 Key 本身"""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:8]
+
+
+class ApiKeyPool:
+    """API Key 池（线程安全）"""
+
+    def __init__(self, keys, auth_cooldown=AUTH_COOLDOWN, quota_cooldown=QUOTA_COOLDOWN):
+        """
+        Args:
+            keys: Key 列表，或逗号 / 换行分隔的字符串
+            auth_cooldown: 鉴权失败后移出的时间（秒）
+            quota_cooldown: 配额耗尽后移出的时间（秒）
+        """
+        self.keys = parse_keys(keys)
+        if not self.keys:
+            raise ValueError("请提供至少一个 API Key")
+        self.auth_cooldown = auth_cooldown
+        self.quota_cooldown = quota_cooldown
+        self._ids = {key_id(key): key for key in self.keys}
+        self._lock = threading.Lock()
+        self._outstanding = {key: 0 for key in self.keys}
+        self._submitted = {key: 0 for key in self.keys}
+        self._ejected = {}   # key -> (恢复时间, 原因)
+        self._pins = {}      # task_id -> key
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def primary(self):
+        return self.keys[0]
+
+    @property
+    def ids(self):
+        """各 Key 的指纹"""
+        return list(self._ids)
+
+    def _available(self, now):
+        for key, (until, _) in list(self._ejected.items()):
+            if now >= until:
+                del self._ejected[key]
+                logger.info("API Key %s 冷却结束，重新启用", key_id(key))
+        return [key for key in self.keys if key not in self._ejected]
+
+    def acquire(self, exclude=()):
+        """
+        选择进行中任务最少的可用 Key 并计入一个任务，用完后必须调用 release
+
+        Args:
+            exclude: 本次不使用的 Key（例如刚刚失败的 Key）
+
+        Raises:
+            NoAvailableKeyError: 没有可用的 Key
+        """
+        with self._lock:
+            candidates = [key for key in self._available(time.monotonic()) if key not in exclude]
+            if not candidates:
+                raise NoAvailableKeyError("没有可用的 API Key（均已被暂时停用）")
+            key = min(candidates, key=lambda k: (self._outstanding[k], self._submitted[k]))
+            self._outstanding[key] += 1
+            self._submitted[key] += 1
+            return key
+
+    def release(self, key):
+        with self._lock:
+            self._outstanding[key] -= 1
+
+    @contextmanager
+    def lease(self, exclude=()):
+        """with 块内占用一个 Key，产出 Key 本身"""
+        key = self.acquire(exclude)
+        try:
+            yield key
+        finally:
+            self.release(key)
+
+    def report(self, key, status_code):
+        """
+        根据提交结果决定是否暂时移出 Key
+
+        Returns:
+            bool: Key 是否被移出（调用方可以换一个 Key 重新提交）
+        """
+        if status_code in AUTH_STATUSES:
+            cooldown, reason = self.auth_cooldown, f"鉴权失败（HTTP {status_code}）"
+        elif status_code in QUOTA_STATUSES:
+            cooldown, reason = self.quota_cooldown, f"配额耗尽（HTTP {status_code}）"
+        else:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if len(self._available(now)) <= 1:
+                # 最后一个可用 Key 不移出，否则所有请求都会直接失败
+                return False
+            self._ejected[key] = (now + cooldown, reason)
+        logger.warning("API Key %s %s，暂停使用 %.0f 秒", key_id(key), reason, cooldown)
+        return True
+
+    def pin(self, task_id, key):
+        """记录任务由哪个 Key 创建"""
+        with self._lock:
+            self._pins[task_id] = key
+            if len(self._pins) > MAX_PINNED_TASKS:
+                self._pins.pop(next(iter(self._pins)))
+
+    def key_for(self, task_id, fingerprint=None):
+        """
+        查询 / 取消任务时使用的 Key：创建任务的 Key，其次是任务日志中记录的指纹对应的 Key，最后是第一个 Key
+        """
+        with self._lock:
+            key = self._pins.get(task_id)
+        return key or self._ids.get(fingerprint) or self.primary
+
+    def stats(self):
+        """各 Key 的进行中任务数、累计提交数与停用状态（以指纹标识）"""
+        with self._lock:
+            now = time.monotonic()
+            self._available(now)
+            return {
+                key_id(key): {
+                    "outstanding": self._outstanding[key],
+                    "submitted": self._submitted[key],
+                    "ejected": self._ejected[key][1] if key in self._ejected else None,
+                    "retry_in": round(self._ejected[key][0] - now, 1) if key in self._ejected else 0.0,
+                }
+                for key in self.keys
+            }
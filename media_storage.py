@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成结果存储
+文件按 <类型目录>/<日期>/<键哈希前两位>/<前缀>_<键>_<序号>.<扩展名> 分片保存：
+    键为 DashScope 任务 ID（同步接口使用 request_id 或随机 ID），并发任务不会互相覆盖；
+    单个目录只包含一天内同一哈希分片的文件，文件数量巨大时目录列举依然很快。
+"""
+
+import glob
+import hashlib
+import os
+import uuid
+from datetime import datetime
+
+
+# 结果类型 -> 顶层目录（与旧版本的目录名保持一致）
+KIND_DIRS = {
+    "image": "generated_images",
+    "video": "generated_videos",
+}
+
+
+class MediaStorage:
+    """生成结果的分片存储与查找"""
+
+    def __init__(self, root=""):
+        """
+        Args:
+            root: 存储根目录，其下为 generated_images / generated_videos，默认为当前目录
+        """
+        self.root = root
+
+    @staticmethod
+    def new_key():
+        """没有任务 ID 时使用的随机键"""
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def _shard(key):
+        return hashlib.sha1(str(key).encode("utf-8")).hexdigest()[:2]
+
+    def path_for(self, kind, key, index=1, prefix="image", ext=".png"):
+        """
+        生成结果文件的保存路径（自动创建分片目录）
+
+        Args:
+            kind: 结果类型，image 或 video
+            key: 任务 ID / request_id
+            index: 同一任务中的序号，从 1 开始
+            prefix: 文件名前缀，如 image / edited / video
+            ext: 扩展名
+        """
+        directory = os.path.join(self.root, KIND_DIRS[kind], datetime.now().strftime("%Y%m%d"), self._shard(key))
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{prefix}_{key}_{index}{ext}")
+
+    def lookup(self, key, kind=None):
+        """
+        按任务 ID 查找已保存的文件
+
+        Args:
+            key: 任务 ID / request_id
+            kind: 结果类型，None 表示图片和视频都查找
+
+        Returns:
+            list: 文件路径，按序号排序
+        """
+        kinds = [kind] if kind else list(KIND_DIRS)
+        shard = self._shard(key)
+        found = []
+        for k in kinds:
+            pattern = os.path.join(self.root, KIND_DIRS[k], "*", shard, f"*_{glob.escape(str(key))}_*")
+            found.extend(p for p in glob.glob(pattern) if not p.endswith((".part", ".tmp")))
+        return sorted(found, key=lambda p: (os.path.dirname(p), _index_of(p)))
+
+
+def _index_of(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    try:
+        return int(stem.rsplit("_", 1)[-1])
+    except ValueError:
+        return 0
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成调用耗时指标
+BailianImageGenerator 的每次调用按阶段记录耗时，调用结束后交给指标接收器（sink）:
+    encode    读取并编码参考图
+    queue     等待限流名额（提交频率 / 模型并发数）
+    submit    提交请求（同步接口包含生成时间）
+    poll      提交成功到任务结束的等待时间，附带查询次数
+    download  下载结果文件（包含写盘）
+    write     其中写入磁盘的时间
+接收器是任何实现 record_call(call) 的对象:
+    PrometheusMetrics 在内存中按 method / model / endpoint 聚合为直方图与计数器，render() 输出 Prometheus 文本格式，
+        metrics_routes() 生成挂载到 Gradio 服务上的 /metrics 路由；
+    JsonLinesMetrics 每次调用追加一行 JSON，便于离线分析；
+    MultiSink 同时写入多个接收器。
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+PHASES = ("encode", "queue", "submit", "poll", "download", "write")
+# 直方图分桶（秒），覆盖同步接口的亚秒级响应到视频任务的数分钟
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+METRICS_PATH = "/metrics"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+class CallTimings:
+    """一次生成调用的各阶段耗时"""
+
+    def __init__(self, method, model=None):
+        self.method = method
+        self.model = model
+        self.endpoint = None
+        self.task_id = None
+        self.phases = {}
+        self.polls = 0
+        self.success = False
+        self.started = time.monotonic()
+        self.seconds = None
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """with 块内的时间计入 name 阶段"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def finish(self, success):
+        self.success = bool(success)
+        self.seconds = time.monotonic() - self.started
+
+    @property
+    def labels(self):
+        return {"method": self.method, "model": self.model or "unknown", "endpoint": self.endpoint or "none"}
+
+    def as_dict(self):
+        """JSON 友好的摘要，也并入生成结果的 timing 中（分阶段耗时为 timing["phases"]）"""
+        return {
+            **self.labels,
+            "task_id": self.task_id,
+            "success": self.success,
+            "seconds": round(self.seconds or 0.0, 3),
+            "phases": {phase: round(seconds, 3) for phase, seconds in self.phases.items()},
+            "polls": self.polls,
+        }
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value, buckets):
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+class PrometheusMetrics:
+    """按标签聚合调用次数与耗时分布（线程安全），render() 输出 Prometheus 文本格式"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="bailian"):
+        """
+        Args:
+            buckets: 直方图分桶上限（秒），升序
+            prefix: 指标名前缀
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._calls = {}      # 标签 -> 次数（含 outcome）
+        self._polls = {}      # 标签 -> 查询次数
+        self._durations = {}  # 标签 -> 整次调用耗时直方图
+        self._phases = {}     # 标签（含 phase）-> 阶段耗时直方图
+
+    def record_call(self, call):
+        labels = call.labels
+        outcome_key = _label_key({**labels, "outcome": "success" if call.success else "failure"})
+        key = _label_key(labels)
+        with self._lock:
+            self._calls[outcome_key] = self._calls.get(outcome_key, 0) + 1
+            if call.polls:
+                self._polls[key] = self._polls.get(key, 0) + call.polls
+            self._histogram(self._durations, key).observe(call.seconds or 0.0, self.buckets)
+            for phase, seconds in call.phases.items():
+                phase_key = _label_key({**labels, "phase": phase})
+                self._histogram(self._phases, phase_key).observe(seconds, self.buckets)
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = _Histogram(self.buckets)
+        return histogram
+
+    def render(self):
+        """Prometheus 文本格式（0.0.4）"""
+        lines = []
+        with self._lock:
+            self._render_counter(lines, "calls_total", "生成调用次数", self._calls)
+            self._render_counter(lines, "task_polls_total", "异步任务查询次数", self._polls)
+            self._render_histogram(lines, "call_duration_seconds", "整次生成调用耗时", self._durations)
+            self._render_histogram(lines, "phase_duration_seconds", "生成调用各阶段耗时", self._phases)
+        return "\n".join(lines) + "\n"
+
+    def _render_counter(self, lines, name, help_text, table):
+        name = f"{self.prefix}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for key, value in sorted(table.items()):
+            lines.append(f"{name}{_format_labels(key)} {value}")
+
+    def _render_histogram(self, lines, name, help_text, table):
+        name = f"{self.prefix}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, histogram in sorted(table.items()):
+            for bound, count in zip(self.buckets, histogram.counts):
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(key)} {round(histogram.sum, 6)}")
+            lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+
+class JsonLinesMetrics:
+    """每次调用向文件追加一行 JSON（线程安全）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record_call(self, call):
+        line = json.dumps({"time": round(time.time(), 3), **call.as_dict()}, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class MultiSink:
+    """把每次调用转发给多个接收器"""
+
+    def __init__(self, *sinks):
+        self.sinks = [sink for sink in sinks if sink is not None]
+
+    def record_call(self, call):
+        for sink in self.sinks:
+            sink.record_call(call)
+
+
+def metrics_routes(metrics, path=METRICS_PATH):
+    """
+    生成 /metrics 路由，通过 demo.launch(app_kwargs={"routes": ...}) 挂载到 Gradio 服务上
+
+    Args:
+        metrics: PrometheusMetrics
+        path: 路由路径
+
+    Returns:
+        list: Starlette 路由（随 Gradio 一起安装）
+    """
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    def endpoint(request):
+        return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    return [Route(path, endpoint, methods=["GET"])]
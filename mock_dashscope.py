@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地 DashScope 模拟服务
+在没有网络、不产生费用的情况下测试客户端、轮询器、下载池与 Web 界面的性能：
+    POST text2image / image2image / video-generation / image2video 接口创建异步任务
+    POST multimodal-generation 同步返回图片
+    GET  /api/v1/tasks/{id} 查询任务，POST /api/v1/tasks/{id}/cancel 取消排队中的任务
+    GET  /files/... 下载合成的 PNG 图片与视频数据（支持 Range 断点续传）
+    GET  /mock/stats 请求计数（提交、查询、下载、注入的错误）
+任务耗时按对数正态分布随机抽取，可注入任务失败、HTTP 429（带 Retry-After）与 HTTP 500。
+以 invalid 开头的 API Key 返回 401，任务只能由创建它的 Key 查询。
+
+用法:
+    python mock_dashscope.py --port 8800 --image-latency 3 --video-latency 20 --throttle-rate 0.05
+    DASHSCOPE_BASE_URL=http://127.0.0.1:8800 python bailian_webui.py
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_PORT = 8800
+MAX_IMAGE_SIDE = 2048          # 合成图片的最大边长，避免生成过大的 PNG
+DEFAULT_VIDEO_BYTES = 2 * 1024 * 1024
+
+# 接口路径 -> 任务类型（None 为同步接口）
+SERVICE_PATHS = {
+    "/api/v1/services/aigc/text2image/image-synthesis": "image",
+    "/api/v1/services/aigc/image2image/image-synthesis": "image",
+    "/api/v1/services/aigc/video-generation/video-synthesis": "video",
+    "/api/v1/services/aigc/image2video/video-synthesis": "video",
+    "/api/v1/services/aigc/multimodal-generation/generation": None,
+}
+TASK_PATH = re.compile(r"^/api/v1/tasks/([\w-]+)(/cancel)?$")
+
+
+class LatencyModel:
+    """对数正态分布的耗时（秒）：中位数为 median，sigma 为 0 时固定为 median"""
+
+    def __init__(self, median, sigma=0.0):
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self):
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(random.gauss(0, self.sigma)) if self.sigma else self.median
+
+
+class MockConfig:
+    """模拟服务的行为参数"""
+
+    def __init__(self, image_latency=3.0, video_latency=20.0, sync_latency=1.0, submit_latency=0.05,
+                 sigma=0.3, fail_rate=0.0, throttle_rate=0.0, error_rate=0.0, retry_after=1,
+                 pending_fraction=0.2, video_bytes=DEFAULT_VIDEO_BYTES, seed=None):
+        """
+        Args:
+            image_latency: 图片任务耗时中位数（秒）
+            video_latency: 视频任务耗时中位数（秒）
+            sync_latency: 同步接口（多模态生成）响应耗时中位数（秒）
+            submit_latency: 提交与查询请求的响应耗时中位数（秒）
+            sigma: 对数正态分布的 sigma，越大长尾越明显
+            fail_rate: 任务以 FAILED 结束的概率
+            throttle_rate: 请求返回 HTTP 429 的概率
+            error_rate: 请求返回 HTTP 500 的概率
+            retry_after: 429 响应的 Retry-After（秒）
+            pending_fraction: 任务耗时中处于 PENDING（可取消）的比例
+            video_bytes: 合成视频文件大小（字节）
+            seed: 随机种子，便于复现
+        """
+        self.image = LatencyModel(image_latency, sigma)
+        self.video = LatencyModel(video_latency, sigma)
+        self.sync = LatencyModel(sync_latency, sigma)
+        self.submit = LatencyModel(submit_latency, sigma)
+        self.fail_rate = fail_rate
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.pending_fraction = pending_fraction
+        self.video_bytes = video_bytes
+        if seed is not None:
+            random.seed(seed)
+
+
+class MockState:
+    """任务表与请求计数（线程安全）"""
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._tasks = {}
+        self._counts = {}
+        self._ids = itertools.count(1)
+
+    def count(self, name):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def create(self, kind, key, payload):
+        latency = self.config.video if kind == "video" else self.config.image
+        parameters = payload.get("parameters", {})
+        task = {
+            "task_id": f"mock-{next(self._ids)}-{uuid.uuid4().hex[:8]}",
+            "kind": kind,
+            "key": key,
+            "created": time.time(),
+            "duration": latency.sample(),
+            "fail": random.random() < self.config.fail_rate,
+            "canceled": False,
+            "n": int(parameters.get("n", 1)),
+            "size": parameters.get("size", "1024*1024"),
+        }
+        with self._lock:
+            self._tasks[task["task_id"]] = task
+        return task
+
+    def get(self, task_id):
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def stats(self):
+        with self._lock:
+            statuses = {}
+            for task in self._tasks.values():
+                status = task_status(task, self.config)[0]
+                statuses[status] = statuses.get(status, 0) + 1
+            return {"requests": dict(self._counts), "tasks": statuses}
+
+
+def task_status(task, config):
+    """任务当前状态与进度（0-100）"""
+    if task["canceled"]:
+        return "CANCELED", 0
+    elapsed = time.time() - task["created"]
+    if elapsed >= task["duration"]:
+        return ("FAILED" if task["fail"] else "SUCCEEDED"), 100
+    if elapsed < task["duration"] * config.pending_fraction:
+        return "PENDING", 0
+    return "RUNNING", int(elapsed * 100 / task["duration"])
+
+
+def parse_size(size):
+    """"1024*1024" -> (1024, 1024)，边长限制在 MAX_IMAGE_SIDE 以内"""
+    try:
+        width, height = (int(v) for v in str(size).replace("x", "*").split("*"))
+    except ValueError:
+        width, height = 1024, 1024
+    return max(1, min(MAX_IMAGE_SIDE, width)), max(1, min(MAX_IMAGE_SIDE, height))
+
+
+@lru_cache(maxsize=32)
+def synthetic_png(width, height, shade):
+    """纯色 PNG（合法文件，可被 Pillow 与浏览器打开）"""
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes((shade, 255 - shade, 128)) * width
+    raw = zlib.compress(row * height, 1)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", raw) + chunk(b"IEND", b"")
+
+
+@lru_cache(maxsize=4)
+def synthetic_video(size):
+    """以 MP4 ftyp 头开头的填充数据（仅用于测试下载吞吐，不是可播放的视频）"""
+    header = struct.pack(">I", 24) + b"ftypisom" + struct.pack(">I", 512) + b"isomiso2"
+    return header + bytes(max(0, size - len(header)))
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockDashScope/1.0"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    @property
+    def config(self):
+        return self.server.state.config
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code, body, content_type="application/json", headers=None):
+        if isinstance(body, dict):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _error(self, code, error_code, message, headers=None):
+        self._send(code, {"request_id": uuid.uuid4().hex, "code": error_code, "message": message}, headers=headers)
+
+    def _base_url(self):
+        return f"http://{self.headers.get('Host') or '127.0.0.1:%d' % self.server.server_port}"
+
+    def _api_key(self):
+        auth = self.headers.get("Authorization", "")
+        return auth[len("Bearer "):] if auth.startswith("Bearer ") else None
+
+    def _inject_failure(self):
+        """按配置随机返回 429 / 500，返回 True 表示已响应"""
+        roll = random.random()
+        if roll < self.config.throttle_rate:
+            self.state.count("throttled")
+            self._error(429, "Throttling.RateQuota", "Requests rate limit exceeded, please try again later.",
+                        headers={"Retry-After": str(self.config.retry_after)})
+            return True
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            self.state.count("server_error")
+            self._error(500, "InternalError", "Mock injected internal error.")
+            return True
+        return False
+
+    def _authorize(self):
+        key = self._api_key()
+        if not key or key.startswith("invalid"):
+            self.state.count("unauthorized")
+            self._error(401, "InvalidApiKey", "Invalid API-key provided.")
+            return None
+        return key
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0]
+        key = self._authorize()
+        if key is None:
+            return
+        time.sleep(self.config.submit.sample())
+        if self._inject_failure():
+            return
+
+        match = TASK_PATH.match(path)
+        if match and match.group(2):
+            return self._cancel(match.group(1), key)
+        if path not in SERVICE_PATHS:
+            return self._error(404, "NotFound", f"Unknown path {path}")
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            return self._error(400, "InvalidParameter", "Request body is not valid JSON.")
+        if not payload.get("model"):
+            return self._error(400, "InvalidParameter", "Model not specified.")
+
+        kind = SERVICE_PATHS[path]
+        if kind is None:
+            return self._sync_generate(payload)
+        if self.headers.get("X-DashScope-Async") != "enable":
+            return self._error(403, "AccessDenied", "current user api does not support synchronous calls")
+        task = self.state.create(kind, key, payload)
+        self.state.count("submit")
+        self._send(200, {"request_id": uuid.uuid4().hex,
+                         "output": {"task_id": task["task_id"], "task_status": "PENDING"}})
+
+    def _sync_generate(self, payload):
+        time.sleep(self.config.sync.sample())
+        self.state.count("sync")
+        width, height = parse_size(payload.get("parameters", {}).get("size", "1024*1024"))
+        n = int(payload.get("parameters", {}).get("n", 1))
+        request_id = uuid.uuid4().hex
+        content = [{"image": f"{self._base_url()}/files/image/{width}x{height}/{request_id}-{i}.png"} for i in range(n)]
+        self._send(200, {
+            "request_id": request_id,
+            "output": {"choices": [{"finish_reason": "stop", "message": {"role": "assistant", "content": content}}]},
+            "usage": {"width": width, "height": height, "image_count": n},
+        })
+
+    def _cancel(self, task_id, key):
+        task = self.state.get(task_id)
+        if task is None or task["key"] != key:
+            return self._error(404, "InvalidParameter.TaskNotExist", "task not exist")
+        status, _ = task_status(task, self.config)
+        if status != "PENDING":
+            return self._error(400, "UnsupportedOperation", "Failed to cancel the task, please confirm if the task is in PENDING status.")
+        task["canceled"] = True
+        self.state.count("cancel")
+        self._send(200, {"request_id": uuid.uuid4().hex})
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/files/"):
+            return self._download(path)
+        if path == "/mock/stats":
+            return self._send(200, self.state.stats())
+
+        match = TASK_PATH.match(path)
+        if not match or match.group(2):
+            return self._error(404, "NotFound", f"Unknown path {path}")
+        key = self._authorize()
+        if key is None:
+            return
+        time.sleep(self.config.submit.sample())
+        if self._inject_failure():
+            return
+        self.state.count("poll")
+        task = self.state.get(match.group(1))
+        if task is None or task["key"] != key:
+            return self._send(200, {"request_id": uuid.uuid4().hex,
+                                    "output": {"task_id": match.group(1), "task_status": "UNKNOWN"}})
+        self._send(200, {"request_id": uuid.uuid4().hex, "output": self._task_output(task)})
+
+    def _task_output(self, task):
+        status, progress = task_status(task, self.config)
+        output = {"task_id": task["task_id"], "task_status": status,
+                  "submit_time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(task["created"]))}
+        if task["kind"] == "video" and status in ("RUNNING", "SUCCEEDED"):
+            output["task_progress"] = progress
+        if status == "FAILED":
+            output.update(code="InternalError.Algo", message="Mock injected task failure.")
+        elif status == "SUCCEEDED":
+            base = self._base_url()
+            if task["kind"] == "video":
+                output["video_url"] = f"{base}/files/video/{task['task_id']}.mp4"
+            else:
+                width, height = parse_size(task["size"])
+                output["results"] = [{"url": f"{base}/files/image/{width}x{height}/{task['task_id']}-{i}.png"}
+                                     for i in range(task["n"])]
+        return output
+
+    def _download(self, path):
+        self.state.count("download")
+        match = re.match(r"^/files/image/(\d+)x(\d+)/(.+)\.png$", path)
+        if match:
+            width, height = parse_size(f"{match.group(1)}*{match.group(2)}")
+            body, content_type = synthetic_png(width, height, zlib.crc32(match.group(3).encode()) % 256), "image/png"
+        elif path.startswith("/files/video/"):
+            body, content_type = synthetic_video(self.config.video_bytes), "video/mp4"
+        else:
+            return self._error(404, "NotFound", f"Unknown file {path}")
+
+        headers = {"Accept-Ranges": "bytes", "ETag": f'"{zlib.crc32(body):08x}"'}
+        range_match = re.match(r"bytes=(\d+)-$", self.headers.get("Range", ""))
+        if range_match:
+            offset = int(range_match.group(1))
+            if offset >= len(body):
+                return self._send(416, b"", content_type, {"Content-Range": f"bytes */{len(body)}"})
+            headers["Content-Range"] = f"bytes {offset}-{len(body) - 1}/{len(body)}"
+            return self._send(206, body[offset:], content_type, headers)
+        self._send(200, body, content_type, headers)
+
+
+def start_mock_server(config=None, host="127.0.0.1", port=0):
+    """
+    在后台线程启动模拟服务
+
+    Args:
+        config: MockConfig，默认参数
+        host: 监听地址
+        port: 端口，0 表示随机端口
+
+    Returns:
+        tuple: (server, base_url)，用 server.shutdown() 停止
+    """
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.state = MockState(config or MockConfig())
+    threading.Thread(target=server.serve_forever, name="mock-dashscope", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def add_mock_arguments(parser):
+    """模拟服务行为参数（benchmark.py 复用），与 config_from_args 对应"""
+    parser.add_argument("--image-latency", type=float, default=3.0, help="图片任务耗时中位数（秒）")
+    parser.add_argument("--video-latency", type=float, default=20.0, help="视频任务耗时中位数（秒）")
+    parser.add_argument("--sync-latency", type=float, default=1.0, help="同步接口耗时中位数（秒）")
+    parser.add_argument("--submit-latency", type=float, default=0.05, help="提交 / 查询请求耗时中位数（秒）")
+    parser.add_argument("--sigma", type=float, default=0.3, help="耗时对数正态分布的 sigma（0 为固定耗时）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="任务失败概率")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="返回 429 的概率")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的概率")
+    parser.add_argument("--retry-after", type=int, default=1, help="429 响应的 Retry-After（秒）")
+    parser.add_argument("--video-bytes", type=int, default=DEFAULT_VIDEO_BYTES, help="合成视频大小（字节）")
+    parser.add_argument("--seed", type=int, help="随机种子")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="本地 DashScope 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_mock_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args):
+    return MockConfig(
+        image_latency=args.image_latency, video_latency=args.video_latency, sync_latency=args.sync_latency,
+        submit_latency=args.submit_latency, sigma=args.sigma, fail_rate=args.fail_rate,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate, retry_after=args.retry_after,
+        video_bytes=args.video_bytes, seed=args.seed)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server, base_url = start_mock_server(config_from_args(args), args.host, args.port)
+    print(f"模拟 DashScope 服务已启动: {base_url}")
+    print(f"使用方法: DASHSCOPE_BASE_URL={base_url} python bailian_webui.py")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
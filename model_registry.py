@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型注册表
+所有模型的元数据集中在 MODEL_TABLE 一处，加载一次后按模型 ID 与显示名称建立索引（O(1) 查找）：
+    task       - 调用方式：image / edit / video（文生视频）/ i2v / kf2v / translate
+    endpoint   - 接口类别（dashscope_payloads.ENDPOINT_ATTRS），async_mode 为是否异步任务
+    kind       - 结果类型 image / edit / video，决定等待与保存方式
+    sizes      - 可选尺寸（None 表示不限制），构建请求时校验，不在列表中的尺寸不会提交
+    durations  - 可选视频时长（秒），请求时取不超过输入值的最大可选值；None 表示不传时长
+    options    - 额外参数开关：prompt_extend（文生视频）、shot_type（图生视频镜头类型）
+    poll       - (查询间隔秒数, 最多查询次数)，默认按 kind 取 POLL_PROFILES
+
+每个模型先取调用方式的默认配置，再按 MODEL_RULES 中的名称规则补充接口与参数，最后应用表中的额外配置；
+未登记的模型（例如在 models_config.json 中新增的模型）同样按规则推断，新增模型不需要修改代码。
+"""
+
+import threading
+
+
+# 结果类型 -> (查询间隔秒数, 最多查询次数)
+POLL_PROFILES = {
+    "image": (2, 60),
+    "edit": (2, 60),
+    "video": (5, 300),
+}
+
+TURBO_SIZES = ("1024*1024", "720*1280", "1280*720")
+VIDEO_SIZES = (
+    "832*480", "480*832", "624*624",
+    "1280*720", "720*1280", "960*960", "1088*832", "832*1088",
+    "1920*1080", "1080*1920", "1440*1440", "1632*1248", "1248*1632",
+)
+DURATIONS_2_15 = tuple(range(2, 16))
+DURATIONS_5_10 = (5, 10)
+DURATIONS_3_5 = (3, 4, 5)
+
+# 调用方式的默认配置
+TASK_DEFAULTS = {
+    "image": {"endpoint": "text2image", "async_mode": True, "kind": "image"},
+    "edit": {"endpoint": "image2image", "async_mode": True, "kind": "edit"},
+    "video": {"endpoint": "video", "async_mode": True, "kind": "video", "sizes": VIDEO_SIZES},
+    "i2v": {"endpoint": "video", "async_mode": True, "kind": "video"},
+    "kf2v": {"endpoint": "kf2v", "async_mode": True, "kind": "video"},
+    "translate": {"endpoint": "text2image", "async_mode": True, "kind": "image"},
+}
+
+# Web 界面模型分类 -> 调用方式
+UI_CATEGORIES = {
+    "image": "image",
+    "turbo": "image",
+    "edit": "edit",
+    "video": "video",
+    "i2v": "i2v",
+    "kf2v": "kf2v",
+}
+
+# 名称规则：(模型 ID 包含的文字, 调用方式, 覆盖的配置)
+MULTIMODAL_SYNC = {"endpoint": "multimodal", "async_mode": False}
+MODEL_RULES = [
+    ("z-image", "image", MULTIMODAL_SYNC),
+    ("qwen-image-edit", "edit", MULTIMODAL_SYNC),
+    ("wan", "video", {"options": ("prompt_extend",)}),
+    ("wan2.6", "i2v", {"options": ("shot_type",)}),
+]
+
+# (模型 ID, 显示名称, 调用方式, 额外配置)，同一调用方式内的顺序即命令行菜单中的编号顺序
+MODEL_TABLE = [
+    ("wan2.6-t2i", "通义万相2.6-文生图", "image", {}),
+    ("wan2.5-t2i-preview", "通义万相2.5-文生图预览", "image", {}),
+    ("wan2.2-t2i-plus", "通义万相2.2-文生图Plus", "image", {}),
+    ("wan2.2-t2i-flash", "通义万相2.2-文生图Flash", "image", {}),
+    ("wanx2.1-t2i-turbo", "通义万相2.1-Turbo", "image", {}),
+    ("wanx2.1-t2i-plus", "通义万相2.1-Plus", "image", {}),
+    ("wanx-v1", "通义万相-文生图V1", "image", {}),
+    ("wan2.0-t2i-turbo", "通义万相2.0-Turbo", "image", {}),
+    ("wanx2.0-t2i-turbo", "通义万相2.0-Turbo", "image", {}),
+    ("qwen-image", "通义千问-图像", "image", {}),
+    ("qwen-image-plus", "通义千问-图像Plus", "image", {}),
+    ("qwen-image-max", "通义千问-图像Max", "image", {}),
+    ("qwen-image-turbo", "通义千问-图像Turbo", "image", {}),
+    ("qwen-image-plus-2026-01-09", "通义千问-图像Plus(2026)", "image", {}),
+    ("qwen-image-max-2025-12-30", "通义千问-图像Max(2025)", "image", {}),
+    ("flux-schnell", "Flux-Schnell", "image", {}),
+    ("flux-dev", "Flux-Dev", "image", {}),
+    ("flux-merged", "Flux-Merged", "image", {}),
+    ("wan2.6-i2v-flash", "通义万相2.6-I2V-Flash", "i2v", {"durations": DURATIONS_2_15}),
+    ("wan2.6-i2v", "通义万相2.6-I2V", "i2v", {"durations": DURATIONS_2_15}),
+    ("wan2.5-i2v-preview", "通义万相2.5-I2V预览", "i2v", {"durations": DURATIONS_5_10}),
+    ("z-image-turbo", "Z-Image-Turbo", "image", {"sizes": TURBO_SIZES}),
+    ("wan2.2-i2v-plus", "通义万相2.2-I2V-Plus", "i2v", {}),
+    ("qwen-mt-image", "通义千问-多语言图像", "translate", {}),
+    ("wan2.2-kf2v-flash", "通义万相2.2-KF2V-Flash", "kf2v", {}),
+    ("wan2.2-animate-mix", "通义万相2.2-Animate-Mix", "image", {}),
+    ("wan2.2-animate-move", "通义万相2.2-Animate-Move", "image", {}),
+    ("wan2.6-image", "通义万相2.6-图像", "image", {}),
+    ("wan2.2-s2v", "通义万相2.2-S2V", "image", {}),
+    ("wan2.2-s2v-detect", "通义万相2.2-S2V-Detect", "image", {}),
+    ("wan2.2-i2v-flash", "通义万相2.2-I2V-Flash", "i2v", {}),
+    ("wan2.5-i2i-preview", "通义万相2.5-I2I预览", "image", {}),
+    ("wanx2.1-kf2v-plus", "通义万相2.1-KF2V-Plus", "kf2v", {}),
+    ("wan2.6-r2v-flash", "通义万相2.6-R2V-Flash", "image", {}),
+    ("wan2.6-r2v", "通义万相2.6-R2V", "image", {}),
+    ("wanx2.1-i2v-plus", "通义万相2.1-I2V-Plus", "i2v", {}),
+    ("aitryon-plus", "虚拟试衣Plus", "image", {}),
+    ("aitryon", "虚拟试衣", "image", {}),
+    ("wanx2.1-i2v-turbo", "通义万相2.1-I2V-Turbo", "i2v", {"durations": DURATIONS_3_5}),
+    ("aitryon-parsing-v1", "虚拟试衣解析", "image", {}),
+    ("emoji-v1", "Emoji生成", "image", {}),
+    ("emoji-detect-v1", "Emoji检测", "image", {}),
+    ("animate-anyone-gen2", "Animate-Anyone-Gen2", "image", {}),
+    ("animate-anyone-template-gen2", "Animate-Anyone-Template", "image", {}),
+    ("animate-anyone-detect-gen2", "Animate-Anyone-Detect", "image", {}),
+    ("videoretalk", "VideoRetalk", "image", {}),
+    ("emo-v1", "EMO-V1", "image", {}),
+    ("video-style-transform", "视频风格转换", "image", {}),
+    ("emo-detect-v1", "EMO-Detect", "image", {}),
+    ("liveportrait", "LivePortrait", "image", {}),
+    ("liveportrait-detect", "LivePortrait-Detect", "image", {}),
+    ("wanx2.1-vace-plus", "通义万相2.1-VACE Plus", "image", {}),
+    ("aitryon-refiner", "虚拟试衣精修", "image", {}),
+    ("wanx-virtualmodel", "通义万相-虚拟模特", "image", {}),
+    ("wanx-poster-generation-v1", "通义万相-海报生成", "image", {}),
+    ("wanx-sketch-to-image-lite", "通义万相-草图生图", "image", {}),
+    ("wanx-x-painting", "通义万相-X绘画", "image", {}),
+    ("image-out-painting", "图像画面扩展", "image", {}),
+    ("wordart-semantic", "艺术字-语义", "image", {}),
+    ("wordart-texture", "艺术字-纹理", "image", {}),
+    ("wanx-background-generation-v2", "通义万相-背景生成V2", "image", {}),
+    ("wanx-style-repaint-v1", "通义万相-风格重绘", "image", {}),
+    # 文生视频
+    ("wan2.6-t2v", "通义万相2.6-T2V", "video", {"durations": DURATIONS_2_15}),
+    ("wan2.5-t2v-preview", "通义万相2.5-T2V预览", "video", {"durations": DURATIONS_5_10}),
+    ("wan2.2-t2v-plus", "通义万相2.2-T2V-Plus", "video", {}),
+    ("wanx2.1-t2v-plus", "通义万相2.1-T2V-Plus", "video", {}),
+    ("wanx2.1-t2v-turbo", "通义万相2.1-T2V-Turbo", "video", {}),
+    # 图像编辑
+    ("qwen-image-edit-plus", "通义千问-图像编辑Plus", "edit", {}),
+    ("qwen-image-edit", "通义千问-图像编辑", "edit", {}),
+    ("qwen-image-edit-plus-2025-12-15", "图像编辑Plus(2025-12)", "edit", {}),
+    ("qwen-image-edit-plus-2025-10-30", "图像编辑Plus(2025-10)", "edit", {}),
+    ("qwen-image-edit-max-2026-01-16", "图像编辑Max(2026)", "edit", {}),
+    ("qwen-image-edit-max", "通义千问-图像编辑Max", "edit", {}),
+    ("wanx2.1-imageedit", "通义万相2.1-图像编辑", "edit", {}),
+]
+
+
+class ModelSpec:
+    """单个模型的调用配置（只读）"""
+
+    __slots__ = ("model_id", "name", "task", "endpoint", "async_mode", "kind", "sizes", "durations", "options",
+                 "poll", "registered")
+
+    def __init__(self, model_id, name, task, endpoint, async_mode, kind, sizes=None, durations=None, options=(),
+                 poll=None, registered=True):
+        self.model_id = model_id
+        self.name = name
+        self.task = task
+        self.endpoint = endpoint
+        self.async_mode = async_mode
+        self.kind = kind
+        self.sizes = sizes
+        self.durations = durations
+        self.options = frozenset(options)
+        self.poll = poll or POLL_PROFILES[kind]
+        self.registered = registered
+
+    def validate(self, size=None, duration=None):
+        """
+        提交前检查尺寸与时长，避免付费请求到服务端才失败
+
+        Raises:
+            ValueError: 尺寸不是该模型的可选尺寸，或时长不是整数
+        """
+        if size is not None and self.sizes and size not in self.sizes:
+            raise ValueError(f"模型 {self.model_id} 不支持尺寸 {size}，可选: {', '.join(self.sizes)}")
+        if duration is not None and self.durations:
+            try:
+                int(duration)
+            except (TypeError, ValueError):
+                raise ValueError(f"视频时长应为整数（秒），实际为 {duration!r}") from None
+
+    def clamp_duration(self, duration):
+        """按模型可选时长调整输入值；模型不接受时长参数时返回 None"""
+        if not self.durations:
+            return None
+        duration = int(duration)
+        allowed = [d for d in self.durations if d <= duration]
+        return max(allowed) if allowed else min(self.durations)
+
+    def __repr__(self):
+        return f"ModelSpec({self.model_id!r}, task={self.task!r}, endpoint={self.endpoint!r})"
+
+
+def _build_spec(model_id, name, task, extra=None, registered=True):
+    config = dict(TASK_DEFAULTS[task])
+    for pattern, rule_task, overrides in MODEL_RULES:
+        if rule_task == task and pattern in model_id:
+            config.update(overrides)
+    config.update(extra or {})
+    return ModelSpec(model_id, name, task, registered=registered, **config)
+
+
+class ModelRegistry:
+    """
+    按模型 ID 与显示名称索引的模型注册表（线程安全）
+
+    索引保存在一个快照 (按 ID, 按名称) 中，修改时复制后整体替换，查找不需要加锁，
+    热加载配置时正在进行的请求看到的要么是旧快照，要么是新快照。
+    """
+
+    def __init__(self, table=MODEL_TABLE):
+        """
+        Args:
+            table: [(模型 ID, 显示名称, 调用方式, 额外配置)]
+        """
+        self._lock = threading.Lock()
+        self._table = list(table)
+        self._index = self._build_index()
+        self._inferred = {}     # (模型 ID, 调用方式) -> 推断的配置
+
+    def _build_index(self, config=None):
+        by_id, by_name = {}, {}
+        for model_id, name, task, extra in self._table:
+            spec = by_id[model_id] = _build_spec(model_id, name, task, extra)
+            by_name[name] = spec
+        for category, entries in (config or {}).items():
+            task = UI_CATEGORIES.get(category)
+            if task is None:
+                continue
+            for name, model_id in entries.items():
+                spec = by_id.get(model_id)
+                if spec is None:
+                    spec = by_id[model_id] = _build_spec(model_id, name, task, registered=False)
+                by_name[name] = spec
+        return by_id, by_name
+
+    def register(self, spec):
+        """登记模型（已存在时覆盖）"""
+        with self._lock:
+            by_id, by_name = (dict(index) for index in self._index)
+            by_id[spec.model_id] = spec
+            by_name[spec.name] = spec
+            self._index = (by_id, by_name)
+            self._inferred = {}
+
+    def get(self, model_id):
+        """按模型 ID 查找，未登记时返回 None"""
+        return self._index[0].get(model_id)
+
+    def by_name(self, name):
+        """按显示名称（内置名称或 models_config.json 中的名称）查找，未登记时返回 None"""
+        return self._index[1].get(name)
+
+    def resolve(self, model_id, task):
+        """
+        调用某个模型时使用的配置：模型已登记且调用方式一致时返回登记的配置，
+        否则按调用方式重新推断（结果会被缓存）
+
+        Args:
+            model_id: 模型 ID
+            task: image / edit / video / i2v / kf2v / translate
+        """
+        spec = self.get(model_id)
+        if spec is not None and spec.task == task:
+            return spec
+        key = (model_id, task)
+        inferred = self._inferred.get(key)
+        if inferred is None:
+            inferred = _build_spec(model_id, spec.name if spec else model_id, task, registered=False)
+            with self._lock:
+                self._inferred[key] = inferred
+        return inferred
+
+    def poll_profile(self, model_id, kind):
+        """等待任务时的 (查询间隔秒数, 最多查询次数)"""
+        spec = self.get(model_id)
+        if spec is not None and spec.kind == kind:
+            return spec.poll
+        return POLL_PROFILES[kind]
+
+    def models(self, tasks=None):
+        """按登记顺序列出模型配置，tasks 为调用方式列表时只列出这些调用方式的模型"""
+        return [spec for spec in self._index[0].values() if tasks is None or spec.task in tasks]
+
+    def numbered(self, tasks):
+        """命令行菜单使用的 {"1": (模型 ID, 显示名称)}，编号即登记顺序"""
+        return {str(i): (spec.model_id, spec.name) for i, spec in enumerate(self.models(tasks), 1)}
+
+    def apply_config(self, config):
+        """
+        用 Web 界面的模型配置 {分类: {显示名称: 模型 ID}} 重建索引并整体替换：
+        为显示名称建立索引，未内置的模型按分类对应的调用方式登记，配置中已删除的名称不再可查
+        """
+        index = self._build_index(config)
+        with self._lock:
+            self._index = index
+            self._inferred = {}
+
+
+MODEL_REGISTRY = ModelRegistry()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应轮询节奏
+按模型记录最近的任务完成耗时，首次查询安排在预计完成时间附近，
+之后按指数退避 + 随机抖动查询；视频任务返回 task_progress 时按进度估算剩余时间。
+同时记录每个任务消耗的查询次数，用于评估轮询开销。
+"""
+
+import random
+import threading
+from collections import deque
+
+
+DEFAULT_HISTORY = 50          # 每个模型保留的最近样本数
+MIN_SAMPLES = 3               # 样本不足时退回固定间隔
+FIRST_POLL_QUANTILE = 0.3     # 首次查询时间取历史耗时的分位数
+MIN_INTERVAL = 1.0
+MAX_INTERVAL_FACTOR = 4       # 退避上限 = 基础间隔 * 该系数
+BACKOFF = 1.5
+JITTER = 0.2
+
+
+def quantile(sorted_values, q):
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class AdaptivePollSchedule:
+    """按模型学习完成耗时分布，计算下一次查询的等待时间（线程安全）"""
+
+    def __init__(self, history=DEFAULT_HISTORY, min_interval=MIN_INTERVAL, backoff=BACKOFF, jitter=JITTER):
+        """
+        Args:
+            history: 每个模型保留的最近样本数
+            min_interval: 最短查询间隔（秒）
+            backoff: 超过预计完成时间后的退避倍数
+            jitter: 随机抖动比例，避免大量任务同时查询
+        """
+        self.history = history
+        self.min_interval = min_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._durations = {}       # model -> deque[秒]
+        self._polls = {}           # model -> deque[次数]
+
+    def first_delay(self, model, interval):
+        """提交后第一次查询前的等待时间"""
+        durations = self._sorted_durations(model)
+        if len(durations) < MIN_SAMPLES:
+            return interval
+        return self._jittered(max(self.min_interval, quantile(durations, FIRST_POLL_QUANTILE)))
+
+    def next_delay(self, model, interval, elapsed, polls, output=None):
+        """
+        非终态查询之后的等待时间
+
+        Args:
+            model: 模型 ID
+            interval: 基础查询间隔（秒）
+            elapsed: 自提交以来经过的时间（秒）
+            polls: 已查询次数
+            output: 最近一次查询返回的 output（用于读取 task_progress）
+        """
+        max_interval = interval * MAX_INTERVAL_FACTOR
+        progress = (output or {}).get("task_progress")
+        try:
+            progress = float(progress)
+        except (TypeError, ValueError):
+            progress = 0.0
+        if 0 < progress < 100:
+            # 按当前进度线性估算剩余时间，查询安排在剩余时间的一半处
+            remaining = elapsed * (100 - progress) / progress
+            return self._jittered(min(max_interval, max(self.min_interval, remaining / 2)))
+
+        delay = min(max_interval, interval * self.backoff ** max(0, polls - 1))
+        durations = self._sorted_durations(model)
+        if len(durations) >= MIN_SAMPLES:
+            # 还未到大多数任务的完成时间时，直接等到该时间点
+            expected = quantile(durations, 0.9) - elapsed
+            if expected > self.min_interval:
+                delay = min(delay, expected)
+        return self._jittered(max(self.min_interval, delay))
+
+    def record(self, model, duration, polls):
+        """记录一个已完成任务的耗时与查询次数"""
+        with self._lock:
+            self._durations.setdefault(model, deque(maxlen=self.history)).append(duration)
+            self._polls.setdefault(model, deque(maxlen=self.history)).append(polls)
+
+    def stats(self):
+        """每个模型的样本数、耗时分位数与平均查询次数"""
+        with self._lock:
+            snapshot = {model: (sorted(d), list(self._polls.get(model, ()))) for model, d in self._durations.items()}
+        return {
+            model: {
+                "samples": len(durations),
+                "p50_seconds": round(quantile(durations, 0.5), 2),
+                "p90_seconds": round(quantile(durations, 0.9), 2),
+                "avg_polls": round(sum(polls) / len(polls), 2) if polls else 0,
+            }
+            for model, (durations, polls) in snapshot.items()
+        }
+
+    def _sorted_durations(self, model):
+        with self._lock:
+            return sorted(self._durations.get(model, ()))
+
+    def _jittered(self, delay):
+        if not self.jitter:
+            return delay
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
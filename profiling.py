@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成调用性能分析（按需开启，可在运行中随时开关）
+开启后 BailianImageGenerator 的每次生成调用都会被分析，结果写入 output_dir:
+    sample    采样分析：后台线程按固定间隔（默认 5 毫秒）记录调用线程的调用栈，
+              每个请求写一个 .folded 文件（flamegraph.pl / speedscope 可直接读取）；
+              下载、轮询线程不属于某个请求，其采样以 [线程名] 为根计入汇总报告（写盘、查询等待在这里体现）
+    cprofile  确定性分析：每个请求一个 .prof 文件（snakeviz / pstats 读取），
+              Python 3.12 起同一时间只能有一个 cProfile，并发请求中的其他请求会被跳过
+memory=True 时用 tracemalloc 记录从调用开始到提交请求完成（参考图读取编码、请求体构建与 JSON 序列化）的内存分配，
+每个请求写一个 .mem.txt。tracemalloc 统计整个进程，并发请求的分配会互相计入。
+disable() 或 write_report() 生成汇总报告: aggregate.folded（采样）或 aggregate.prof + aggregate.txt（cProfile）。
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from structured_log import get_logger
+
+
+logger = get_logger("profiling")
+
+MODES = ("sample", "cprofile")
+PROFILE_ENV = "BAILIAN_PROFILE"          # 启动时开启分析，值为 sample 或 cprofile
+DEFAULT_PROFILE_DIR = "profiles"
+DEFAULT_SAMPLE_INTERVAL = 0.005          # 采样间隔（秒）
+MAX_STACK_DEPTH = 64
+TRACEMALLOC_FRAMES = 8
+MEMORY_TOP = 15                          # 内存报告显示的分配位置数
+REPORT_TOP = 40                          # cProfile 文字报告显示的函数数
+# 不属于某个请求、但在生成过程中工作的线程（线程名前缀）
+BACKGROUND_THREAD_PREFIXES = ("download", "task-poll")
+# 后台线程空闲时所在的函数（文件名, 函数名），这些采样不计入汇总报告
+IDLE_FRAMES = {("thread.py", "_worker"), ("threading.py", "wait"), ("queue.py", "get")}
+# 内存报告中忽略的分配位置（分析器自身与 tracemalloc）
+_OWN_FILES = {os.path.abspath(__file__), os.path.abspath(tracemalloc.__file__)}
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame, root):
+    """把调用栈转换为 folded 格式的一行（根在前，以分号分隔）"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    names.append(root)
+    return ";".join(reversed(names))
+
+
+def is_idle(frame):
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+class _ProfiledRequest:
+    """一次被分析的生成调用"""
+
+    def __init__(self, name, labels, mode):
+        self.name = name
+        self.labels = labels
+        self.mode = mode
+        self.started = time.monotonic()
+        self.seconds = None
+        self.samples = {}        # folded 调用栈 -> 采样次数
+        self.profile = None      # cProfile.Profile
+        self.snapshot = None     # 调用开始时的 tracemalloc 快照
+        self.memory = []         # (标记, 分配差异, 峰值)
+
+
+class GenerationProfiler:
+    """生成调用分析器（线程安全），多个生成器可以共用一个"""
+
+    def __init__(self, output_dir=DEFAULT_PROFILE_DIR, mode="sample", memory=False,
+                 interval=DEFAULT_SAMPLE_INTERVAL):
+        """
+        Args:
+            output_dir: 分析结果目录
+            mode: sample（采样）或 cprofile
+            memory: 是否用 tracemalloc 记录请求体构建阶段的内存分配
+            interval: 采样间隔（秒）
+        """
+        if mode not in MODES:
+            raise ValueError(f"未知的分析方式 {mode}，可选: {', '.join(MODES)}")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.memory = memory
+        self.interval = interval
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._active = {}            # 线程 ident -> _ProfiledRequest
+        self._aggregate = {}         # folded 调用栈 -> 采样次数（含后台线程）
+        self._stats = None           # pstats.Stats，cProfile 汇总
+        self._requests = 0
+        self._skipped = 0
+        self._seq = 0
+        self._sampler = None         # (采样线程, 停止事件)
+        self._owns_tracemalloc = False
+
+    def enable(self, mode=None, memory=None):
+        """
+        开始分析（清空上一次的汇总数据），已开启时按新的设置重新开始，新设置从下一次调用开始生效
+
+        Args:
+            mode: sample 或 cprofile，默认沿用当前设置
+            memory: 是否记录内存分配，默认沿用当前设置
+        """
+        mode = mode or self.mode
+        if mode not in MODES:
+            raise ValueError(f"未知的分析方式 {mode}，可选: {', '.join(MODES)}")
+        with self._lock:
+            self.mode = mode
+            if memory is not None:
+                self.memory = memory
+            self._aggregate, self._stats = {}, None
+            self._requests = self._skipped = 0
+            self._set_tracemalloc(self.memory)
+            if mode == "sample" and self._sampler is None:
+                stop = threading.Event()
+                sampler = threading.Thread(target=self._sample_loop, args=(stop,), name="profiler-sampler", daemon=True)
+                sampler.start()
+                self._sampler = (sampler, stop)
+            elif mode != "sample":
+                self._stop_sampler()
+            self.enabled = True
+        os.makedirs(self.output_dir, exist_ok=True)
+        logger.info("性能分析已开启（%s%s），结果目录: %s", mode, "，含内存分配" if self.memory else "",
+                    os.path.abspath(self.output_dir))
+
+    def disable(self):
+        """
+        停止分析并写出汇总报告
+
+        Returns:
+            list: 汇总报告文件路径
+        """
+        with self._lock:
+            self.enabled = False
+            self._stop_sampler()
+            self._set_tracemalloc(False)
+        paths = self.write_report()
+        logger.info("性能分析已关闭，汇总报告: %s", ", ".join(paths) or "无（没有被分析的请求）")
+        return paths
+
+    def _stop_sampler(self):
+        # 采样线程在下一个间隔检查停止事件后退出，不在锁内等待
+        if self._sampler is not None:
+            self._sampler[1].set()
+            self._sampler = None
+
+    def _set_tracemalloc(self, tracing):
+        # 只停止由本分析器开启的 tracemalloc
+        if tracing and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._owns_tracemalloc = True
+        elif not tracing and self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def status(self):
+        with self._lock:
+            return {"enabled": self.enabled, "mode": self.mode, "memory": self.memory,
+                    "requests": self._requests, "skipped": self._skipped, "active": len(self._active),
+                    "output_dir": os.path.abspath(self.output_dir)}
+
+    @contextmanager
+    def profile(self, name, **labels):
+        """
+        分析 with 块内的一次生成调用（未开启或已在分析中时不做任何事）
+
+        Args:
+            name: 调用名称，如 generate_image
+            **labels: 写入结果文件名与报告的标签，如 model
+        """
+        if not self.enabled or getattr(self._local, "request", None) is not None:
+            yield None
+            return
+        request = _ProfiledRequest(name, labels, self.mode)
+        if request.mode == "cprofile":
+            request.profile = cProfile.Profile()
+            try:
+                request.profile.enable()
+            except ValueError:
+                # Python 3.12+ 的 cProfile 基于 sys.monitoring，同一时间只能启用一个
+                with self._lock:
+                    self._skipped += 1
+                yield None
+                return
+        if self.memory and tracemalloc.is_tracing():
+            request.snapshot = tracemalloc.take_snapshot()
+        ident = threading.get_ident()
+        self._local.request = request
+        with self._lock:
+            self._active[ident] = request
+        try:
+            yield request
+        finally:
+            with self._lock:
+                self._active.pop(ident, None)
+            self._local.request = None
+            if request.profile is not None:
+                request.profile.disable()
+            request.seconds = time.monotonic() - request.started
+            try:
+                self._finish(request)
+            except Exception as e:
+                logger.warning("写入分析结果失败: %s", e, exc_info=True)
+
+    def mark(self, label):
+        """记录调用开始到此处的内存分配（memory=True 时），如 payload：参考图编码、请求体构建与序列化"""
+        request = getattr(self._local, "request", None)
+        if request is None or request.snapshot is None or not tracemalloc.is_tracing():
+            return
+        # 比较快照本身不计入 cProfile 结果
+        if request.profile is not None:
+            request.profile.disable()
+        try:
+            diff = tracemalloc.take_snapshot().compare_to(request.snapshot, "lineno")
+            stats = [stat for stat in diff if stat.size_diff > 0
+                     and os.path.abspath(stat.traceback[0].filename) not in _OWN_FILES][:MEMORY_TOP]
+            request.memory.append((label, stats, tracemalloc.get_traced_memory()[1]))
+        finally:
+            if request.profile is not None:
+                request.profile.enable()
+
+    def _sample_loop(self, stop):
+        while not stop.wait(self.interval):
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                request = active.get(ident)
+                if request is not None:
+                    stacks.append((request, fold_stack(frame, request.name)))
+                elif names.get(ident, "").startswith(BACKGROUND_THREAD_PREFIXES) and not is_idle(frame):
+                    stacks.append((None, fold_stack(frame, f"[{names[ident].rstrip('_0123456789')}]")))
+            with self._lock:
+                for request, stack in stacks:
+                    if request is not None:
+                        request.samples[stack] = request.samples.get(stack, 0) + 1
+                    self._aggregate[stack] = self._aggregate.get(stack, 0) + 1
+
+    def _finish(self, request):
+        with self._lock:
+            self._requests += 1
+            self._seq += 1
+            seq = self._seq
+            if request.profile is not None:
+                if self._stats is None:
+                    self._stats = pstats.Stats(request.profile)
+                else:
+                    self._stats.add(request.profile)
+        tag = "-".join(re.sub(r"[^\w.-]", "_", str(value)) for value in request.labels.values() if value)
+        base = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{seq:05d}-{request.name}"
+                                             f"{'-' + tag if tag else ''}")
+        if request.profile is not None:
+            request.profile.dump_stats(base + ".prof")
+        elif request.samples:
+            _write_folded(base + ".folded", request.samples)
+        if request.memory:
+            with open(base + ".mem.txt", "w", encoding="utf-8") as f:
+                f.write(f"{request.name} {request.labels} 耗时 {request.seconds:.3f}s\n")
+                f.write("tracemalloc 统计整个进程，并发请求的分配会互相计入\n")
+                for label, stats, peak in request.memory:
+                    f.write(f"\n[{label}] 峰值 {peak / 1024 / 1024:.1f} MB，调用开始以来新增分配:\n")
+                    for stat in stats:
+                        f.write(f"  {stat}\n")
+
+    def write_report(self):
+        """
+        写出汇总报告（不停止分析）
+
+        Returns:
+            list: 报告文件路径
+        """
+        with self._lock:
+            aggregate = dict(self._aggregate)
+            stats = self._stats
+        paths = []
+        if aggregate:
+            paths.append(_write_folded(os.path.join(self.output_dir, "aggregate.folded"), aggregate))
+        if stats is not None:
+            prof_path = os.path.join(self.output_dir, "aggregate.prof")
+            text_path = os.path.join(self.output_dir, "aggregate.txt")
+            with self._lock:
+                stats.dump_stats(prof_path)
+                stream = io.StringIO()
+                stats.stream = stream
+                stats.sort_stats("cumulative").print_stats(REPORT_TOP)
+            with open(text_path, "w", encoding="utf-8") as f:
+                f.write(stream.getvalue())
+            paths += [prof_path, text_path]
+        return paths
+
+
+def _write_folded(path, samples):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in sorted(samples.items(), key=lambda item: -item[1]):
+            f.write(f"{stack} {count}\n")
+    return path
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+客户端限流
+DashScope 对每个模型有提交 QPS 与同时处理任务数的配额，超出时返回 HTTP 429。
+这里在客户端提前排队，而不是把请求发出去再失败：
+    TokenBucket：令牌桶，分别限制各提交接口（API_URL / VIDEO_URL / KF2V_URL / MULTIModal_URL /
+                 IMAGE_EDIT_URL）与任务查询的频率
+    ConcurrencyGovernor：按模型限制同时运行的任务数
+配额按账号计算，使用多个 API Key 时传入 scope（Key 指纹），每个 Key 各自计数。
+排队等待时间单独统计，与生成耗时分开。
+排队时可以传入 cancel_event（threading.Event），被设置后立即停止排队并抛出 CancelledError。
+"""
+
+import threading
+import time
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
+
+
+DEFAULT_SUBMIT_QPS = 2        # 每个提交接口的默认频率（次/秒）
+DEFAULT_SUBMIT_BURST = 4      # 允许的突发提交数
+DEFAULT_POLL_QPS = 20         # 所有任务合计的查询频率
+DEFAULT_MAX_RUNNING = 4       # 每个模型同时运行的任务数
+CANCEL_CHECK_INTERVAL = 0.5   # 等待并发名额时检查取消的间隔（秒）
+
+
+class TokenBucket:
+    """令牌桶（线程安全），令牌不足时阻塞等待"""
+
+    def __init__(self, rate, burst=1):
+        """
+        Args:
+            rate: 每秒补充的令牌数，0 或 None 表示不限制
+            burst: 桶容量（允许的突发次数）
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self, cancel_event=None):
+        """
+        取得一个令牌，返回排队等待的秒数
+
+        Raises:
+            CancelledError: 等待期间 cancel_event 被设置（已扣减的令牌不退回）
+        """
+        started = time.monotonic()
+        if self.rate:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # 先扣减令牌再在锁外等待，后来的调用者按顺序排在后面
+                self._tokens -= 1
+                delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if delay > 0:
+                if cancel_event is None:
+                    time.sleep(delay)
+                elif cancel_event.wait(delay):
+                    raise CancelledError("排队期间已取消")
+        waited = time.monotonic() - started
+        with self._lock:
+            self.acquired += 1
+            self.waited += waited
+            self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "acquired": self.acquired,
+                "wait_seconds": round(self.waited, 3),
+                "max_wait_seconds": round(self.max_wait, 3),
+            }
+
+
+class ConcurrencyGovernor:
+    """按模型限制同时运行的任务数，名额用完时排队"""
+
+    def __init__(self, max_running=DEFAULT_MAX_RUNNING, limits=None):
+        """
+        Args:
+            max_running: 每个模型默认的并发任务数，0 或 None 表示不限制
+            limits: 单独设置的模型并发数 {model: n}
+        """
+        self.max_running = max_running
+        self.limits = dict(limits or {})
+        self._cond = threading.Condition()
+        self._running = {}
+        self._waiting = {}
+        self._waited = {}
+
+    def limit_for(self, model):
+        return self.limits.get(model, self.max_running)
+
+    @contextmanager
+    def slot(self, model, scope=None, cancel_event=None):
+        """
+        占用一个并发名额，with 块内产出排队等待的秒数；scope 不同的名额分别计数
+
+        Raises:
+            CancelledError: 排队期间 cancel_event 被设置，没有占用名额
+        """
+        name = f"{model}@{scope}" if scope else model
+        started = time.monotonic()
+        # 有 cancel_event 时定期醒来检查，取消后不必等到有名额释放
+        timeout = CANCEL_CHECK_INTERVAL if cancel_event is not None else None
+        with self._cond:
+            self._waiting[name] = self._waiting.get(name, 0) + 1
+            limit = self.limit_for(model)
+            try:
+                while limit and self._running.get(name, 0) >= limit:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise CancelledError("排队期间已取消")
+                    self._cond.wait(timeout)
+            finally:
+                self._waiting[name] -= 1
+            self._running[name] = self._running.get(name, 0) + 1
+            waited = time.monotonic() - started
+            self._waited[name] = self._waited.get(name, 0.0) + waited
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self._running[name] -= 1
+                self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                name: {
+                    "running": self._running.get(name, 0),
+                    "waiting": self._waiting.get(name, 0),
+                    "limit": self.limit_for(name.split("@")[0]),
+                    "wait_seconds": round(self._waited.get(name, 0.0), 3),
+                }
+                for name in set(self._running) | set(self._waiting)
+            }
+
+
+class RateLimiter:
+    """提交、查询与并发任务的限流组合，多个生成器实例可以共用一个"""
+
+    def __init__(self, submit_qps=DEFAULT_SUBMIT_QPS, submit_burst=DEFAULT_SUBMIT_BURST, poll_qps=DEFAULT_POLL_QPS,
+                 max_running=DEFAULT_MAX_RUNNING, endpoint_qps=None, model_limits=None):
+        """
+        Args:
+            submit_qps: 每个提交接口的默认频率（次/秒）
+            submit_burst: 提交接口允许的突发次数
+            poll_qps: 任务查询的总频率（次/秒）
+            max_running: 每个模型默认的并发任务数
+            endpoint_qps: 单独设置的接口频率 {endpoint: qps}，endpoint 为 text2image / video / kf2v / multimodal / image2image
+            model_limits: 单独设置的模型并发数 {model: n}
+        """
+        self.submit_qps = submit_qps
+        self.submit_burst = submit_burst
+        self.endpoint_qps = dict(endpoint_qps or {})
+        self.poll_bucket = TokenBucket(poll_qps)
+        self.governor = ConcurrencyGovernor(max_running, model_limits)
+        self._submit_buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, endpoint, scope=None):
+        name = f"{endpoint}@{scope}" if scope else endpoint
+        with self._lock:
+            bucket = self._submit_buckets.get(name)
+            if bucket is None:
+                rate = self.endpoint_qps.get(endpoint, self.submit_qps)
+                bucket = self._submit_buckets[name] = TokenBucket(rate, self.submit_burst)
+            return bucket
+
+    def submit(self, endpoint, scope=None, cancel_event=None):
+        """提交前调用，返回排队等待的秒数；scope 为 API Key 指纹时每个 Key 单独限流"""
+        return self._bucket(endpoint, scope).acquire(cancel_event)
+
+    def poll(self):
+        """查询任务状态前调用，返回排队等待的秒数"""
+        return self.poll_bucket.acquire()
+
+    def task_slot(self, model, scope=None, cancel_event=None):
+        """占用模型并发名额（从提交到结果保存完毕），with 块内产出排队等待的秒数"""
+        return self.governor.slot(model, scope, cancel_event)
+
+    def stats(self):
+        """各接口的提交排队、查询排队与各模型的并发情况"""
+        with self._lock:
+            buckets = dict(self._submit_buckets)
+        return {
+            "submit": {endpoint: bucket.stats() for endpoint, bucket in buckets.items()},
+            "poll": self.poll_bucket.stats(),
+            "models": self.governor.stats(),
+        }
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成结果缓存
+以请求体（模型、提示词、尺寸、种子、参考图……）的规范化哈希为键，缓存已保存的结果文件。
+相同请求再次提交时直接返回缓存文件，不再提交付费任务。
+默认只缓存固定了 seed 的请求（结果可复现）；按总大小和存活时间做 LRU 淘汰。
+命中时更新的访问时间分批写回索引（以及 close / 进程退出时），重启后 LRU 顺序不会丢失。
+"""
+
+import atexit
+import json
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+from structured_log import get_logger
+
+
+logger = get_logger("cache")
+
+DEFAULT_CACHE_DIR = ".result_cache"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3          # 2 GB
+DEFAULT_MAX_AGE = 7 * 24 * 3600            # 7 天
+INDEX_FILE = "index.json"
+ACCESS_FLUSH_HITS = 20                     # 累计这么多次命中后写回访问时间
+ACCESS_FLUSH_SECONDS = 60                  # 或距上次写入索引超过这么多秒
+
+
+def _link_or_copy(src, dst):
+    """优先硬链接（不额外占用磁盘），跨分区时退回复制"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class ResultCache:
+    """磁盘结果缓存（线程安全）"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE,
+                 allow_unseeded=False):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存文件总大小上限（字节），超出时淘汰最久未使用的条目
+            max_age: 条目最长存活时间（秒）
+            allow_unseeded: 是否缓存未指定 seed 的请求（结果不可复现，需要显式开启）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.allow_unseeded = allow_unseeded
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+        self._unsaved_hits = 0                     # 尚未写回索引的命中次数
+        self._saved_at = time.monotonic()
+        atexit.register(self.close)
+
+    @staticmethod
+    def make_key(payload):
+        """请求体的规范化哈希（键排序、紧凑分隔符）"""
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def cacheable(self, payload):
+        """固定 seed 的请求可以缓存；未固定 seed 时需要 allow_unseeded"""
+        return self.allow_unseeded or payload.get("parameters", {}).get("seed") is not None
+
+    def get(self, key):
+        """
+        查找缓存
+
+        Returns:
+            list: 缓存的文件路径；未命中、过期或文件缺失时返回 None
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            now = time.time()
+            if entry and now - entry["created"] <= self.max_age and all(os.path.exists(f) for f in entry["files"]):
+                entry["last_access"] = now
+                self.hits += 1
+                self._unsaved_hits += 1
+                if (self._unsaved_hits >= ACCESS_FLUSH_HITS
+                        or time.monotonic() - self._saved_at >= ACCESS_FLUSH_SECONDS):
+                    self._try_save_index()
+                return list(entry["files"])
+            if entry:
+                self._remove(key)
+                self._save_index()
+            self.misses += 1
+            return None
+
+    def put(self, key, files):
+        """把结果文件加入缓存，返回缓存中的文件路径"""
+        entry_dir = os.path.join(self.cache_dir, key[:2], key)
+        os.makedirs(entry_dir, exist_ok=True)
+        cached_files = []
+        for idx, src in enumerate(files):
+            dst = os.path.join(entry_dir, f"{idx + 1}_{os.path.basename(src)}")
+            if not os.path.exists(dst):
+                _link_or_copy(src, dst)
+            cached_files.append(dst)
+
+        now = time.time()
+        with self._lock:
+            self._index[key] = {
+                "files": cached_files,
+                "bytes": sum(os.path.getsize(f) for f in cached_files),
+                "created": now,
+                "last_access": now,
+            }
+            self._evict(now)
+            self._save_index()
+        return cached_files
+
+    def stats(self):
+        """命中 / 未命中次数、条目数与总大小"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._index),
+                "bytes": sum(entry["bytes"] for entry in self._index.values()),
+            }
+
+    def close(self):
+        """写回尚未保存的访问时间（进程退出时自动调用）"""
+        with self._lock:
+            if self._unsaved_hits:
+                self._try_save_index()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._save_index()
+
+    def _evict(self, now):
+        """先删过期条目，再按最久未使用淘汰直到总大小低于上限"""
+        for key in [k for k, e in self._index.items() if now - e["created"] > self.max_age]:
+            self._remove(key)
+        total = sum(entry["bytes"] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key]["bytes"]
+            self._remove(key)
+
+    def _remove(self, key):
+        self._index.pop(key, None)
+        shutil.rmtree(os.path.join(self.cache_dir, key[:2], key), ignore_errors=True)
+
+    def _load_index(self):
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("读取结果缓存索引失败，将重建: %s", e, exc_info=True)
+        return {}
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._unsaved_hits = 0
+        self._saved_at = time.monotonic()
+
+    def _try_save_index(self):
+        """写回访问时间；失败只记录日志，不影响缓存命中（下次写入时再保存）"""
+        try:
+            self._save_index()
+        except OSError as e:
+            logger.warning("写回结果缓存访问时间失败: %s", e, exc_info=True)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重试与熔断
+RetryPolicy 对 DashScope 请求做结构化重试：
+    限流（429）、服务端错误（5xx）与超时视为可重试，优先遵守 Retry-After，否则按带抖动的指数退避等待；
+    提交任务（POST）不是幂等操作，只在确定任务没有被创建时（429 / 503）重试，避免重复扣费。
+每个接口一个 CircuitBreaker：连续失败达到阈值后熔断，熔断期间直接失败而不是让线程卡在 30 秒超时里，
+冷却时间过后放行一次试探请求，成功则恢复。
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from structured_log import get_logger
+
+
+logger = get_logger("retry")
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_JITTER = 0.5
+DEFAULT_FAILURE_THRESHOLD = 5       # 连续失败多少次后熔断
+DEFAULT_RESET_TIMEOUT = 30.0        # 熔断后多久放行试探请求（秒）
+
+# 幂等请求（查询任务、下载）可重试的状态码
+RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+# 提交请求可重试的状态码：请求被网关拒绝，任务一定没有创建
+SAFE_SUBMIT_STATUSES = frozenset([429, 503])
+
+
+class CircuitOpenError(Exception):
+    """接口处于熔断状态，请求未发送"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"接口 {name} 连续失败已熔断，约 {retry_in:.0f} 秒后恢复尝试")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """单个接口的熔断器（线程安全）：closed -> open -> half-open -> closed"""
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        """请求前调用，熔断中抛出 CircuitOpenError；半开状态只放行一个试探请求"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self._opened_at + self.reset_timeout - now) or 1.0
+            raise CircuitOpenError(self.name, retry_in)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    logger.warning("接口 %s 连续失败 %d 次，熔断 %.0f 秒", self.name, self._failures, self.reset_timeout)
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {"state": self._state(time.monotonic()), "failures": self._failures, "rejected": self.rejected}
+
+
+class RetryPolicy:
+    """重试策略 + 按接口划分的熔断器，多个生成器实例可以共用一个"""
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 jitter=DEFAULT_JITTER, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        """
+        Args:
+            max_attempts: 每个请求最多尝试次数（含第一次）
+            base_delay: 第一次重试前的基础等待时间（秒），之后逐次翻倍
+            max_delay: 单次等待上限（秒），Retry-After 也按此截断
+            jitter: 随机抖动比例，避免大量请求同时重试
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断持续时间（秒）
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, name):
+        """接口对应的熔断器（不存在时创建）"""
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        第 attempt 次失败后的等待时间（秒）
+
+        Args:
+            attempt: 已失败的次数，从 1 开始
+            retry_after: 响应头 Retry-After 的值（秒数或 HTTP 日期），优先使用
+        """
+        server_delay = _parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(self.max_delay, server_delay)
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def request(self, http, method, url, endpoint, idempotent=True, attempts=None, **kwargs):
+        """
+        带重试与熔断的请求
+
+        Args:
+            http: HttpPool 或 requests.Session
+            method: GET / POST
+            url: 请求地址
+            endpoint: 熔断器名称（接口类型，如 text2image / tasks）
+            idempotent: 是否可以安全重发；False 时只在 429 / 503 时重试
+            attempts: 覆盖最多尝试次数
+            **kwargs: 传给 http.request 的参数
+
+        Returns:
+            requests.Response: 最后一次的响应（调用方自行 raise_for_status）
+
+        Raises:
+            CircuitOpenError: 接口熔断中
+            requests.RequestException: 网络错误且不再重试
+        """
+        breaker = self.breaker(endpoint)
+        attempts = attempts or self.max_attempts
+        retryable = RETRYABLE_STATUSES if idempotent else SAFE_SUBMIT_STATUSES
+        for attempt in range(1, attempts + 1):
+            breaker.before_call()
+            try:
+                response = http.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                breaker.record_failure()
+                # 提交请求超时时任务可能已经创建，不能重发
+                if attempt >= attempts or not idempotent:
+                    raise
+                reason, delay = str(e), self.backoff(attempt)
+            except Exception:
+                # 其他异常（ChunkedEncodingError、InvalidURL、hook 异常等）不重试，
+                # 但同样要记为失败，否则半开状态的试探标记不会清除，接口会一直拒绝请求
+                breaker.record_failure()
+                raise
+            else:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code not in retryable or attempt >= attempts:
+                    return response
+                reason = f"HTTP {response.status_code}"
+                delay = self.backoff(attempt, response.headers.get("Retry-After"))
+                response.close()
+            logger.warning("请求 %s 失败（%s），%.1f 秒后第 %d 次重试", endpoint, reason, delay, attempt,
+                           extra={"duration": delay})
+            time.sleep(delay)
+
+    def stats(self):
+        """各接口熔断器状态"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.stats() for name, breaker in breakers.items()}
+
+
+def _parse_retry_after(value):
+    """Retry-After 可以是秒数或 HTTP 日期，无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
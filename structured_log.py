@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结构化日志
+各模块通过 get_logger() 获取 "bailian.*" 日志器，日志记录附带结构化字段:
+    task_id, model, session, phase, duration（秒）, bytes, error_class
+字段可以在调用处通过 extra 传入，也可以用 log_context() 为当前线程（及复制了上下文的下载线程）统一设置，
+这样同一任务从提交、轮询到下载的每条日志都带有相同的 task_id，按 task_id 过滤即可得到完整过程。
+
+setup_logging() 在入口处调用一次：日志记录先放入内存队列（QueueHandler），由后台线程（QueueListener）
+写到控制台（只显示消息文字）和可选的 JSONL 文件，请求路径上不做任何 I/O。
+未调用 setup_logging 时（作为库使用）只有 WARNING 及以上级别输出到 stderr。
+
+环境变量:
+    BAILIAN_LOG_LEVEL  日志级别，默认 INFO
+    BAILIAN_LOG_FILE   JSON 日志文件路径，默认不写文件
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+
+LOGGER_NAME = "bailian"
+FIELDS = ("task_id", "model", "session", "phase", "duration", "bytes", "error_class")
+DEFAULT_LEVEL = "INFO"
+LEVEL_ENV = "BAILIAN_LOG_LEVEL"
+FILE_ENV = "BAILIAN_LOG_FILE"
+
+_context = contextvars.ContextVar("bailian_log_context", default={})
+_listener = None
+
+
+def get_logger(name):
+    """模块日志器，如 get_logger("generator") -> bailian.generator"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+@contextmanager
+def log_context(**fields):
+    """with 块内（当前线程）的日志记录自动附带这些字段，值为 None 的字段不设置"""
+    token = _context.set({**_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_context():
+    """当前线程的日志上下文字段"""
+    return dict(_context.get())
+
+
+class ContextFilter(logging.Filter):
+    """把 log_context() 设置的字段写入日志记录（调用处通过 extra 传入的字段优先）"""
+
+    def filter(self, record):
+        for name, value in _context.get().items():
+            if not hasattr(record, name):
+                setattr(record, name, value)
+        if record.exc_info and not hasattr(record, "error_class"):
+            record.error_class = record.exc_info[0].__name__
+        return True
+
+
+class BufferedHandler(QueueHandler):
+    """放入队列前在调用线程中合并消息参数、格式化异常堆栈，后台线程只负责写出"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class MessageFormatter(logging.Formatter):
+    """控制台只显示消息文字（异常堆栈只写入 JSON 日志）"""
+
+    def format(self, record):
+        return record.getMessage()
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录一行 JSON"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for name in FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = round(value, 3) if name == "duration" else value
+        if record.exc_text:
+            entry["traceback"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level=None, json_path=None, console=True):
+    """
+    配置 bailian.* 日志：异步写到控制台与 JSONL 文件（重复调用时替换之前的配置）
+
+    Args:
+        level: 日志级别（名称或数值），默认读取环境变量 BAILIAN_LOG_LEVEL，再默认 INFO
+        json_path: JSON 日志文件，默认读取环境变量 BAILIAN_LOG_FILE，均未设置则不写文件
+        console: 是否输出到控制台（标准输出，只显示消息文字）
+
+    Returns:
+        QueueListener: 后台写日志的监听器，进程退出时自动停止并写完队列中的记录
+    """
+    global _listener
+    level = level or os.environ.get(LEVEL_ENV) or DEFAULT_LEVEL
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    json_path = json_path or os.environ.get(FILE_ENV)
+
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(MessageFormatter())
+        handlers.append(console_handler)
+    if json_path:
+        file_handler = logging.FileHandler(json_path, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    if _listener is not None:
+        _listener.stop()
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    records = queue.SimpleQueue()
+    handler = BufferedHandler(records)
+    handler.addFilter(ContextFilter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """停止后台线程，写完队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享任务轮询服务
+所有未完成的 DashScope 任务登记到同一个调度线程，按 AdaptivePollSchedule 安排的时间查询 TASK_URL，
+任务进入 SUCCEEDED / FAILED 后完成对应的 Future。
+N 个并发任务只占用一个调度线程 + 少量查询线程，并可限制总轮询 QPS。
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+
+import requests
+
+from http_pool import HttpPool
+from poll_schedule import AdaptivePollSchedule
+from rate_limiter import TokenBucket
+from retry_policy import CircuitOpenError, RetryPolicy
+from structured_log import get_logger
+
+
+logger = get_logger("poller")
+
+DEFAULT_MAX_QPS = 20         # 所有任务合计的最大轮询频率
+DEFAULT_POLL_WORKERS = 4     # 并行执行查询请求的线程数
+TERMINAL_STATUSES = ("SUCCEEDED", "FAILED", "CANCELED", "UNKNOWN")
+POLL_ENDPOINT = "tasks"      # 任务查询接口的熔断器名称
+# 调用方等待 Future 时在任务超时之外多等的时间（秒），覆盖最后一次查询请求的超时与退避
+RESULT_GRACE_SECONDS = 60
+
+
+class _PolledTask:
+    """轮询中的任务"""
+
+    __slots__ = ("task_id", "url", "headers", "model", "interval", "started", "deadline", "future",
+                 "on_update", "polls", "errors")
+
+    def __init__(self, task_id, url, headers, model, interval, started, timeout, on_update):
+        self.task_id = task_id
+        self.url = url
+        self.headers = headers
+        self.model = model or "default"
+        self.interval = interval
+        self.started = started
+        self.deadline = started + timeout
+        self.future = Future()
+        self.future.polls = 0        # 已查询次数，供调用方统计
+        self.on_update = on_update
+        self.polls = 0
+        self.errors = 0              # 连续查询失败次数
+
+
+class TaskPoller:
+    """后台轮询调度器，多个生成器实例可以共用一个"""
+
+    def __init__(self, http_pool=None, max_qps=DEFAULT_MAX_QPS, poll_workers=DEFAULT_POLL_WORKERS, schedule=None,
+                 rate_limiter=None, retry_policy=None):
+        """
+        Args:
+            http_pool: 查询使用的 HttpPool，不提供则创建独立的连接池
+            max_qps: 所有任务合计的最大轮询频率（次/秒）
+            poll_workers: 并行执行查询请求的线程数
+            schedule: AdaptivePollSchedule 实例，按模型学习完成耗时
+            rate_limiter: 共享的 RateLimiter，提供时使用其查询令牌桶，忽略 max_qps
+            retry_policy: 共享的 RetryPolicy，查询失败时的退避时间与熔断
+        """
+        self.http = http_pool or HttpPool()
+        self.schedule = schedule or AdaptivePollSchedule()
+        self.retry = retry_policy or RetryPolicy()
+        self._poll_bucket = rate_limiter.poll_bucket if rate_limiter else TokenBucket(max_qps)
+        self.max_qps = self._poll_bucket.rate
+        self._executor = ThreadPoolExecutor(max_workers=poll_workers, thread_name_prefix="task-poll")
+        self._cond = threading.Condition()
+        self._queue = []                 # (next_poll_at, seq, task)
+        self._tasks = {}                 # task_id -> _PolledTask
+        self._seq = itertools.count()
+        self._thread = None
+        self._stopped = False
+        self._total_polls = 0
+
+    def track(self, task_id, url, headers, interval=2, timeout=120, on_update=None, model=None):
+        """
+        登记一个任务并返回 Future
+
+        Args:
+            task_id: DashScope 任务 ID
+            url: 任务查询地址
+            headers: 查询请求头（包含 Authorization）
+            interval: 基础轮询间隔（秒），模型样本不足时按此间隔查询
+            timeout: 最长等待时间（秒），超时后 Future 抛出 TimeoutError
+            on_update: 每次查询到非终态时的回调，参数为 output 字典
+            model: 模型 ID，用于按模型学习完成耗时
+
+        Returns:
+            Future: 结果为任务结束时的 output 字典，polls 属性为已查询次数；
+                任务已在轮询中时返回已有的 Future（本次的 on_update 等参数不生效）
+        """
+        now = time.monotonic()
+        task = _PolledTask(task_id, url, headers, model, interval, now, timeout, on_update)
+        first_delay = self.schedule.first_delay(task.model, interval)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("轮询服务已停止")
+            existing = self._tasks.get(task_id)
+            if existing is not None:
+                # 同一任务重复登记（如恢复任务与正在等待的调用重叠）时共用一个 Future，先登记的调用方不会失去结果
+                return existing.future
+            self._tasks[task_id] = task
+            self._schedule(task, now + first_delay)
+            self._ensure_started()
+        return task.future
+
+    def untrack(self, task_id):
+        """停止轮询某个任务（Future 被取消）"""
+        with self._cond:
+            task = self._tasks.pop(task_id, None)
+        if task is not None:
+            task.future.cancel()
+        return task is not None
+
+    def stats(self):
+        """轮询统计：未完成任务数、累计查询次数与各模型的耗时 / 查询次数分布"""
+        with self._cond:
+            stats = {"outstanding": len(self._tasks), "total_polls": self._total_polls, "max_qps": self.max_qps,
+                     "poll_wait_seconds": self._poll_bucket.stats()["wait_seconds"]}
+        stats["models"] = self.schedule.stats()
+        return stats
+
+    def shutdown(self):
+        """停止调度线程，未完成的任务全部取消"""
+        with self._cond:
+            self._stopped = True
+            tasks = list(self._tasks.values())
+            self._tasks.clear()
+            self._queue.clear()
+            self._cond.notify_all()
+        for task in tasks:
+            task.future.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="task-poller", daemon=True)
+            self._thread.start()
+
+    def _schedule(self, task, at):
+        heapq.heappush(self._queue, (at, next(self._seq), task))
+        self._cond.notify()
+
+    def _run(self):
+        """调度循环：取出到期任务，按 QPS 上限分发给查询线程"""
+        while True:
+            with self._cond:
+                while not self._stopped and not self._queue:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                due_at, _, task = self._queue[0]
+                now = time.monotonic()
+                if due_at > now:
+                    self._cond.wait(due_at - now)
+                    continue
+                heapq.heappop(self._queue)
+                if task.future.done():
+                    continue
+
+            self._poll_bucket.acquire()
+            self._executor.submit(self._poll_once, task)
+
+    def _poll_once(self, task):
+        """查询一次任务状态；出现意外异常时以该异常完成 Future，调用方不会一直等待"""
+        try:
+            self._poll_step(task)
+        except Exception as e:
+            logger.error("轮询任务 %s 时出现意外错误: %s", task.task_id, e, exc_info=True,
+                         extra={"task_id": task.task_id, "model": task.model, "phase": "poll"})
+            self._finish(task, error=e)
+
+    def _poll_step(self, task):
+        """查询一次任务状态，终态完成 Future，否则重新排期"""
+        output = None
+        error_delay = None
+        sent = True
+        try:
+            # 查询本身会按退避时间重新排期，这里只发一次请求，不占用查询线程等待
+            response = self.retry.request(self.http, "GET", task.url, POLL_ENDPOINT, attempts=1,
+                                          headers=task.headers, timeout=30)
+            response.raise_for_status()
+            output = response.json().get("output", {})
+            task.errors = 0
+        except CircuitOpenError as e:
+            # 熔断期间没有发出请求，不计入查询次数
+            sent = False
+            error_delay = e.retry_in
+        except (requests.RequestException, ValueError) as e:
+            task.errors += 1
+            retry_after = e.response.headers.get("Retry-After") if getattr(e, "response", None) is not None else None
+            error_delay = self.retry.backoff(task.errors, retry_after)
+            logger.warning("轮询状态出错 (%s)，%.1f 秒后重试: %s", task.task_id, error_delay, e,
+                           extra={"task_id": task.task_id, "model": task.model, "phase": "poll",
+                                  "error_class": type(e).__name__})
+
+        if sent:
+            with self._cond:
+                self._total_polls += 1
+                task.polls += 1
+                task.future.polls = task.polls
+
+        elapsed = time.monotonic() - task.started
+        if output is not None and output.get("task_status") in TERMINAL_STATUSES:
+            if output.get("task_status") == "SUCCEEDED":
+                self.schedule.record(task.model, elapsed, task.polls)
+            self._finish(task, result=output)
+            return
+        if output is not None and task.on_update is not None:
+            try:
+                task.on_update(output)
+            except Exception as e:
+                logger.warning("进度回调出错 (%s): %s", task.task_id, e, exc_info=True,
+                               extra={"task_id": task.task_id, "phase": "poll"})
+        if time.monotonic() >= task.deadline:
+            self._finish(task, error=TimeoutError(f"任务 {task.task_id} 等待超时"))
+            return
+        if error_delay is not None:
+            delay = error_delay
+        else:
+            delay = self.schedule.next_delay(task.model, task.interval, elapsed, task.polls, output)
+        with self._cond:
+            if not self._stopped and self._tasks.get(task.task_id) is task:
+                self._schedule(task, min(time.monotonic() + delay, task.deadline))
+
+    def _finish(self, task, result=None, error=None):
+        with self._cond:
+            if self._tasks.get(task.task_id) is task:
+                del self._tasks[task.task_id]
+        try:
+            if error is not None:
+                task.future.set_exception(error)
+            else:
+                task.future.set_result(result)
+        except InvalidStateError:
+            # 任务已被 untrack 取消
+            pass
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务提交与结果等待
+BailianImageGenerator 的任务生命周期：限流后提交请求、写入任务日志、通过共享轮询器等待结果并下载保存，
+以及进程重启后恢复未完成的任务。
+"""
+
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from dashscope_payloads import build_headers, endpoint_url, extract_choice_images
+from key_pool import key_id
+from model_registry import MODEL_REGISTRY
+from structured_log import get_logger, log_context
+from task_poller import RESULT_GRACE_SECONDS
+
+logger = get_logger("generator")
+
+
+class TaskRunnerMixin:
+    """
+    任务生命周期方法，由 BailianImageGenerator 继承
+
+    依赖生成器的 keys / limiter / retry / http / poller / downloads / storage / journal / profiler
+    以及 _phase / _add_phase / _label_call / _emit
+    """
+
+    def _wait_for_video_result(self, task_id, max_retries=300, interval=5, model=None):
+        """等待视频生成结果，视频生成较慢，增加超时时间"""
+        def report_progress(output):
+            # 在轮询线程中调用，没有调用线程的日志上下文
+            logger.info("生成进度: %s%%", output.get("task_progress", 0),
+                        extra={"task_id": task_id, "model": model, "phase": "poll"})
+
+        logger.info("等待视频生成中，请稍候...", extra={"phase": "poll"})
+        output = self._await_task(task_id, max_retries, interval, on_update=report_progress, model=model)
+        if output is None:
+            return {"success": False, "error": "等待视频生成超时"}
+        if output.get("task_status") != "SUCCEEDED":
+            return {"success": False, "error": output.get("message", "未知错误")}
+
+        video_url = output.get("video_url")
+        if not video_url:
+            return {"success": False, "error": "未获取到视频URL"}
+        try:
+            logger.info("视频生成成功，正在下载: %s", video_url, extra={"phase": "download"})
+            self._emit("downloading", count=1)
+            filepath = self.storage.path_for("video", task_id, prefix="video", ext=".mp4")
+            with self._phase("download"):
+                record = self.downloads.download(video_url, filepath, timeout=120)
+            self._add_phase("write", record["write_seconds"])
+            logger.debug("已下载 %s", filepath, extra={"phase": "download", "bytes": record["bytes"],
+                                                     "duration": record["seconds"]})
+            return {"success": True, "files": [filepath], "downloads": [record]}
+        except Exception as e:
+            logger.warning("下载视频失败: %s", e, exc_info=True, extra={"phase": "download"})
+            return {"success": False, "error": f"下载视频失败: {str(e)}", "url": video_url}
+
+    def _await_task(self, task_id, max_retries, interval, on_update=None, model=None):
+        """
+        通过共享轮询器等待任务结束
+
+        Returns:
+            dict: 任务结束时的 output；超时返回 None
+        """
+        # 轮询回调在轮询线程中执行，这里先取出调用线程的进度回调
+        progress = getattr(self._local, "callback", None)
+
+        def update(output):
+            if progress is not None:
+                self._emit("running", callback=progress, status=output.get("task_status"),
+                           progress=output.get("task_progress"))
+            if on_update is not None:
+                on_update(output)
+
+        # 任务只能由创建它的 Key 查询
+        future = self.poller.track(
+            task_id, f"{self.TASK_URL}{task_id}", {"Authorization": f"Bearer {self.keys.key_for(task_id)}"},
+            interval=interval, timeout=max_retries * interval, on_update=update, model=model)
+        cancel_event = getattr(self._local, "cancel_event", None)
+        if cancel_event is not None and cancel_event.is_set():
+            # 取消发生在任务ID登记之后、开始轮询之前（cancel 没有找到轮询中的任务），这里补上停止轮询
+            self.poller.untrack(task_id)
+        try:
+            with self._phase("poll"):
+                # 轮询器按 deadline 完成 Future，这里再加一层超时，避免轮询器异常时调用线程一直占用限流名额
+                output = future.result(timeout=max_retries * interval + RESULT_GRACE_SECONDS)
+        except (TimeoutError, FutureTimeoutError):
+            self.poller.untrack(task_id)
+            return None
+        except CancelledError:
+            output = {"task_status": "CANCELED", "message": "任务已取消"}
+        finally:
+            timings = getattr(self._local, "timings", None)
+            if timings is not None:
+                timings.polls += future.polls
+        if self.journal is not None:
+            extra = {"message": output["message"]} if output.get("message") else {}
+            self.journal.record_status(task_id, output.get("task_status"), **extra)
+        return output
+
+    def _run_task(self, endpoint, payload, async_mode, kind):
+        """
+        限流后提交请求并等待结果：异步任务写入任务日志后轮询，同步接口直接保存返回的图片
+
+        Args:
+            endpoint: 接口类型（text2image / image2image / kf2v / video / multimodal）
+            payload: 请求体
+            async_mode: 是否为异步任务接口
+            kind: 结果类型 image / edit / video
+
+        Returns:
+            dict: 结果，附带 timing（排队等待与生成耗时，单位秒）
+        """
+        excluded = []
+        try:
+            self._emit("queued", model=payload["model"])
+            while True:
+                # 选择进行中任务最少的 Key，任务结束（结果保存完毕）前一直计入该 Key
+                with self.keys.lease(exclude=excluded) as key:
+                    result = self._submit_with_key(key, endpoint, payload, async_mode, kind)
+                if result is not None:
+                    return result
+                # Key 因鉴权 / 配额问题被停用，任务没有创建，换一个 Key 重新提交
+                excluded.append(key)
+        except CancelledError:
+            # 排队等待并发名额或提交令牌期间被取消，任务没有提交
+            return {"success": False, "error": "任务已取消"}
+        except Exception as e:
+            logger.error("提交或等待任务时出错: %s", e, exc_info=True)
+            return {"success": False, "error": f"异常: {str(e)}"}
+
+    def _submit_with_key(self, key, endpoint, payload, async_mode, kind):
+        """
+        用指定的 Key 提交并等待结果，限流与并发名额按 Key（账号）分别计算，多个会话使用不同的 Key 时互不影响
+
+        Returns:
+            dict: 结果；Key 被停用时返回 None
+        """
+        scope = key_id(key)
+        cancel_event = getattr(self._local, "cancel_event", None)
+        # 排队期间被取消时抛出 CancelledError，由 _run_task 返回“任务已取消”
+        with self.limiter.task_slot(payload["model"], scope, cancel_event) as slot_wait:
+            queued = slot_wait + self.limiter.submit(endpoint, scope, cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                # 排队期间已被取消，不再提交
+                return {"success": False, "error": "任务已取消"}
+            if queued >= 1:
+                logger.info("排队等待 %.1f 秒", queued, extra={"phase": "queue", "duration": queued})
+            self._label_call(payload["model"], endpoint)
+            self._add_phase("queue", queued)
+            started = time.monotonic()
+            with self._phase("submit"):
+                response = self.retry.request(
+                    self.http, "POST", endpoint_url(self, endpoint), endpoint, idempotent=False,
+                    headers=build_headers(key, async_mode), json=payload, timeout=30)
+            if self.profiler is not None:
+                # 参考图编码、请求体构建与序列化到此完成
+                self.profiler.mark("payload")
+            if self.keys.report(key, response.status_code):
+                response.close()
+                return None
+            response.raise_for_status()
+            body = response.json()
+            output = body.get("output", {})
+            if "task_id" in output:
+                task_id = output["task_id"]
+                self._label_call(payload["model"], endpoint, task_id)
+                with log_context(task_id=task_id):
+                    logger.info("任务已提交，任务ID: %s", task_id,
+                                extra={"phase": "submit", "duration": time.monotonic() - started})
+                    # 先记录任务所属的 Key 并登记任务ID（取消按钮据此取消），再开始轮询
+                    self.keys.pin(task_id, key)
+                    self._emit("submitted", task_id=task_id)
+                    if cancel_event is not None and cancel_event.is_set():
+                        # 提交请求进行中（含重试退避）已被取消：任务已创建，立即请求服务端取消，不再等待结果
+                        self.cancel(task_id)
+                        return {"success": False, "error": "任务已取消"}
+                    result = self._follow_task(task_id, kind, payload, key)
+            elif "choices" in output:
+                # 同步接口（极速生图 / 新版编辑模型）直接返回图片，以 request_id 关联日志
+                request_id = body.get("request_id")
+                self._label_call(payload["model"], endpoint, request_id)
+                with log_context(task_id=request_id):
+                    result = self._save_images(extract_choice_images(output), key=request_id)
+            else:
+                return {"success": False, "error": f"提交任务失败: {body}"}
+        result["timing"] = {"queue_seconds": round(queued, 2),
+                            "generation_seconds": round(time.monotonic() - started, 2)}
+        return result
+
+    def _follow_task(self, task_id, kind, payload, key):
+        """写入任务日志后等待结果，进程中断时可以通过 resume_pending 恢复"""
+        if self.journal is not None:
+            self.journal.record_submit(task_id, kind, payload["model"], payload, key_id=key_id(key))
+        return self._wait_by_kind(task_id, kind, payload["model"])
+
+    def _wait_by_kind(self, task_id, kind, model):
+        """按任务类型等待并保存结果（查询间隔与次数取自模型注册表），保存成功后在任务日志中标记为已下载"""
+        waiters = {
+            "image": self._wait_for_result,
+            "edit": self._wait_for_edit_result,
+            "video": self._wait_for_video_result,
+        }
+        interval, max_retries = MODEL_REGISTRY.poll_profile(model, kind)
+        result = waiters[kind](task_id, max_retries=max_retries, interval=interval, model=model)
+        if self.journal is not None and result.get("success"):
+            self.journal.record_status(task_id, "DOWNLOADED", files=result["files"])
+        return result
+
+    def resume_pending(self, max_workers=8, key_ids=None):
+        """
+        恢复任务日志中未完成的任务（上次进程退出时仍在生成或尚未下载），继续等待并下载结果
+
+        Args:
+            max_workers: 同时恢复的任务数
+            key_ids: 只恢复这些 Key 指纹创建的任务，默认为本生成器的全部 Key（其他 Key 的任务无法查询）
+
+        Returns:
+            dict: 任务ID -> 结果
+        """
+        if self.journal is None:
+            return {}
+        key_ids = set(key_ids or self.keys.ids)
+        # 没有记录 Key 指纹的旧任务视为第一个 Key 创建
+        pending = [task for task in self.journal.pending()
+                   if task.get("key_id", key_id(self.keys.primary)) in key_ids]
+        if not pending:
+            return {}
+        logger.info("发现 %d 个未完成的任务，正在恢复...", len(pending))
+        for task in pending:
+            self.keys.pin(task["task_id"], self.keys.key_for(task["task_id"], task.get("key_id")))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resume") as executor:
+            futures = {task["task_id"]: executor.submit(self._wait_by_kind, task["task_id"], task["kind"], task["model"])
+                       for task in pending}
+        results = {}
+        for task_id, future in futures.items():
+            try:
+                results[task_id] = future.result()
+            except Exception as e:
+                results[task_id] = {"success": False, "error": f"异常: {str(e)}"}
+            result = results[task_id]
+            if result.get("success"):
+                logger.info("已恢复任务 %s: %s", task_id, result["files"], extra={"task_id": task_id, "phase": "resume"})
+            else:
+                logger.warning("恢复任务 %s 失败: %s", task_id, result.get("error"),
+                               extra={"task_id": task_id, "phase": "resume"})
+        self.journal.compact()
+        return results
+
+    def _wait_for_edit_result(self, task_id, max_retries=60, interval=2, model=None):
+        output = self._await_task(task_id, max_retries, interval, model=model)
+        if output is None:
+            return {"success": False, "error": "等待任务完成超时"}
+        if output.get("task_status") != "SUCCEEDED":
+            return {"success": False, "error": output.get("message", "未知错误")}
+        if not any("url" in item for item in output.get("results", [])):
+            return {"success": False, "error": "未获取到编辑后的图片"}
+        return self._save_images(output, prefix="edited", key=task_id)
+
+    def _download_images(self, image_urls, prefix="edited", key=None):
+        """
+        通过下载池并行下载多张图片
+
+        Args:
+            image_urls: 图片地址列表
+            prefix: 文件名前缀
+            key: 任务 ID / request_id，决定保存路径，不提供则随机生成
+
+        Returns:
+            list: 每个文件的下载记录（路径、字节数、耗时）
+        """
+        key = key or self.storage.new_key()
+        self._emit("downloading", count=len(image_urls))
+        jobs = [(url, self.storage.path_for("image", key, i + 1, prefix=prefix)) for i, url in enumerate(image_urls)]
+        with self._phase("download"):
+            records = self.downloads.download_all(jobs, timeout=60)
+        for record in records:
+            if "error" in record:
+                logger.warning("下载图片失败: %s", record["error"], extra={"phase": "download"})
+            else:
+                self._add_phase("write", record["write_seconds"])
+                logger.debug("已下载 %s", record["path"], extra={"phase": "download", "bytes": record["bytes"],
+                                                                "duration": record["seconds"]})
+        return records
+
+    def _wait_for_result(self, task_id, max_retries=60, interval=2, model=None):
+        output = self._await_task(task_id, max_retries, interval, model=model)
+        if output is None:
+            return {"success": False, "error": "等待超时"}
+        if output.get("task_status") != "SUCCEEDED":
+            return {"success": False, "error": output.get("message", "未知错误")}
+        return self._save_images(output, key=task_id)
+
+    def _save_images(self, output, prefix="image", key=None):
+        image_urls = [item["url"] for item in output.get("results", []) if "url" in item]
+        records = self._download_images(image_urls, prefix=prefix, key=key)
+        saved_files = [record["path"] for record in records if "error" not in record]
+        return {"success": len(saved_files) > 0, "files": saved_files, "downloads": records}
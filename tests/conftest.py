@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共配置
+模块都在仓库根目录（没有包结构），这里把根目录加入 sys.path；
+需要 DashScope 接口的测试通过 mock_server 夹具在进程内启动 mock_dashscope 模拟服务。
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from dashscope_payloads import build_headers, build_image_request, service_urls  # noqa: E402
+from http_pool import HttpPool  # noqa: E402
+from mock_dashscope import MockConfig, start_mock_server  # noqa: E402
+
+
+@pytest.fixture
+def mock_server():
+    """启动模拟服务，返回 (服务, 地址)；任务耗时很短，测试不需要长时间等待"""
+    server, base_url = start_mock_server(MockConfig(image_latency=0.2, video_latency=0.3, sync_latency=0.05,
+                                                    submit_latency=0.01, sigma=0, pending_fraction=0.5))
+    try:
+        yield server, base_url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def submit_task(mock_server):
+    """在模拟服务上直接提交文生图任务（不经过生成器），返回 (任务ID, 查询地址, 请求体)"""
+    urls = service_urls(mock_server[1])
+    http = HttpPool()
+
+    def submit(model="wanx-v1", prompt="猫"):
+        _, payload, _ = build_image_request(model, prompt, "1024*1024")
+        response = http.request("POST", urls["API_URL"], headers=build_headers("test-key", True),
+                                json=payload, timeout=5)
+        response.raise_for_status()
+        task_id = response.json()["output"]["task_id"]
+        return task_id, urls["TASK_URL"] + task_id, payload
+
+    yield submit
+    http.close()
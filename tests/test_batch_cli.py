@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""batch_cli：任务文件解析与校验、参数校验、跳过已完成任务，以及对模拟服务的端到端批量生成"""
+
+import json
+
+import pytest
+
+import batch_cli
+from batch_cli import load_done_ids, load_jobs, parse_args, run_batch
+from bailian_image_gen import BailianImageGenerator
+from media_storage import MediaStorage
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_load_jsonl(tmp_path):
+    path = write(tmp_path, "jobs.jsonl", '{"prompt": "猫", "seed": "42"}\n\n'
+                                         '{"id": "e", "type": "edit", "prompt": "帽子", "image": "a.png"}\n')
+    jobs = load_jobs(path)
+    assert jobs[0] == {"prompt": "猫", "seed": 42, "id": "1", "type": "image"}
+    assert jobs[1]["image_path"] == "a.png" and "image" not in jobs[1]
+
+
+def test_load_csv_skips_empty_cells(tmp_path):
+    path = write(tmp_path, "jobs.csv", "id,type,prompt,duration,seed\nv1,video,海,5,\n")
+    assert load_jobs(path) == [{"id": "v1", "type": "video", "prompt": "海", "duration": 5}]
+
+
+@pytest.mark.parametrize("line, message", [
+    ('[1, 2]', "第 2 行: 应为 JSON 对象"),
+    ('"猫"', "第 2 行: 应为 JSON 对象"),
+    ('{"prompt": "猫", "seed": "x"}', "第 2 行: seed 应为整数"),
+    ('{"prompt": "猫", "type": "music"}', "第 2 行: 未知的任务类型"),
+    ('{"prompt": ', "第 2 行: 不是有效的 JSON"),
+])
+def test_malformed_rows_name_the_line(tmp_path, line, message):
+    path = write(tmp_path, "jobs.jsonl", '{"prompt": "ok"}\n' + line + "\n")
+    with pytest.raises(ValueError, match=message):
+        load_jobs(path)
+
+
+def test_main_reports_bad_file(tmp_path, capsys):
+    path = write(tmp_path, "jobs.jsonl", "[1, 2]\n")
+    with pytest.raises(SystemExit):
+        batch_cli.main([path, "--api-key", "test-key"])
+    assert "第 1 行" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "x"])
+def test_concurrency_must_be_positive(value):
+    with pytest.raises(SystemExit):
+        parse_args(["jobs.jsonl", "--concurrency", value])
+
+
+def test_load_done_ids(tmp_path):
+    path = write(tmp_path, "manifest.jsonl", '{"id": "a", "success": true}\n'
+                                             '{"id": "b", "success": false}\nbroken\n')
+    assert load_done_ids(path) == {"a"}
+    assert load_done_ids(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_run_batch_against_mock(tmp_path, mock_server):
+    generator = BailianImageGenerator("test-key", base_url=mock_server[1], storage=MediaStorage(str(tmp_path)))
+    jobs = load_jobs(write(tmp_path, "jobs.jsonl", "\n".join(
+        json.dumps({"id": f"cat-{i}", "prompt": "猫", "model": "wanx-v1"}) for i in range(4))))
+    manifest = str(tmp_path / "manifest.jsonl")
+    stats = run_batch(generator, jobs, manifest, concurrency=4)
+    assert stats["jobs"] == 4 and stats["succeeded"] == 4
+    assert load_done_ids(manifest) == {f"cat-{i}" for i in range(4)}
+
+
+def test_skip_done_counts_only_this_file(tmp_path, capsys):
+    manifest = write(tmp_path, "manifest.jsonl", '{"id": "a", "success": true}\n{"id": "other", "success": true}\n')
+    jobs = write(tmp_path, "jobs.jsonl", '{"id": "a", "prompt": "猫"}\n')
+    batch_cli.main([jobs, "--manifest", manifest, "--skip-done", "--api-key", "test-key"])
+    out = capsys.readouterr().out
+    assert "跳过 1 个已完成的任务" in out and "没有需要执行的任务" in out
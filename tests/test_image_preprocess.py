@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""参考图预处理：开关、按目标尺寸缩小、Pillow 无法处理时退回原图"""
+
+import io
+
+import pytest
+
+from image_preprocess import PREPROCESS_ENV, max_side_for, preprocess_enabled
+
+Image = pytest.importorskip("PIL.Image")
+from image_preprocess import ImagePreprocessor  # noqa: E402
+
+
+def write_png(path, size):
+    # 噪声图片压缩率低，重新编码为 JPEG 后一定更小
+    Image.effect_noise(size, 64).convert("RGB").save(path, format="PNG")
+    return str(path)
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv(PREPROCESS_ENV, raising=False)
+    assert not preprocess_enabled()
+    monkeypatch.setenv(PREPROCESS_ENV, "1")
+    assert preprocess_enabled()
+    monkeypatch.setenv(PREPROCESS_ENV, "off")
+    assert not preprocess_enabled()
+
+
+def test_max_side_for():
+    assert max_side_for(size="1280*720") == 1280
+    assert max_side_for(resolution="480p") == 832
+    assert max_side_for(size="bad") is None
+    assert max_side_for() is None
+
+
+def test_downscales_to_max_side(tmp_path):
+    path = write_png(tmp_path / "big.png", (2000, 1000))
+    data, mime = ImagePreprocessor().process(path, max_side=1000)
+    assert mime == "image/jpeg"
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.size == (1000, 500)
+
+
+@pytest.mark.parametrize("content", [b"not an image at all", None])
+def test_unreadable_image_falls_back_to_original(tmp_path, content):
+    path = tmp_path / "broken.jpg"
+    if content is None:
+        # 截断的 JPEG
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 400), "red").save(buffer, format="JPEG")
+        content = buffer.getvalue()[:200]
+    path.write_bytes(content)
+    assert ImagePreprocessor().process(str(path), max_side=100) is None
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""JobJournal：未完成任务的判定、压缩与 base64 占位，以及生成器从日志恢复任务"""
+
+import json
+import time
+
+from bailian_image_gen import BailianImageGenerator
+from job_journal import JobJournal, strip_data_uris
+from media_storage import MediaStorage
+
+
+def test_pending_tracks_last_status(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.jsonl"))
+    journal.record_submit("t-1", "image", "wanx-v1", {})
+    journal.record_submit("t-2", "image", "wanx-v1", {})
+    journal.record_submit("t-3", "video", "wan2.6-t2v", {})
+    journal.record_status("t-1", "DOWNLOADED", files=["a.png"])
+    journal.record_status("t-2", "RUNNING")
+    journal.record_status("t-3", "CANCELED")
+    pending = journal.pending()
+    assert [task["task_id"] for task in pending] == ["t-2"]
+    assert pending[0]["last_status"] == "RUNNING"
+
+
+def test_expired_tasks_are_not_pending(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.jsonl"))
+    journal.record_submit("t-1", "image", "wanx-v1", {})
+    assert journal.pending(max_age=-1) == []
+
+
+def test_compact_keeps_only_pending(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.jsonl"))
+    journal.record_submit("t-1", "image", "wanx-v1", {})
+    journal.record_submit("t-2", "image", "wanx-v1", {})
+    journal.record_status("t-1", "FAILED")
+    journal.compact()
+    lines = [json.loads(line) for line in open(journal.path, encoding="utf-8")]
+    assert {entry["task_id"] for entry in lines} == {"t-2"}
+
+
+def test_partial_last_line_is_ignored(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.jsonl"))
+    journal.record_submit("t-1", "image", "wanx-v1", {})
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"event": "submit", "task_')
+    assert [task["task_id"] for task in journal.pending()] == ["t-1"]
+
+
+def test_creates_parent_directory(tmp_path):
+    journal = JobJournal(str(tmp_path / "generated_images" / "journal.jsonl"))
+    journal.record_submit("t-1", "image", "wanx-v1", {})
+    assert journal.pending()
+
+
+def test_data_uris_are_replaced():
+    params = {"input": {"images": ["data:image/png;base64,AAAA", "http://x/a.png"]}}
+    stripped = strip_data_uris(params)
+    assert stripped["input"]["images"][0].startswith("<data-uri")
+    assert stripped["input"]["images"][1] == "http://x/a.png"
+
+
+def test_resume_downloads_unfinished_tasks(tmp_path, mock_server, submit_task):
+    journal = JobJournal(str(tmp_path / "journal.jsonl"))
+    task_id, _, payload = submit_task()
+    # 上一个进程提交后在等待期间退出
+    journal.record_submit(task_id, "image", payload["model"], payload)
+    time.sleep(0.3)
+
+    generator = BailianImageGenerator("test-key", base_url=mock_server[1], journal=journal,
+                                      storage=MediaStorage(str(tmp_path)))
+    results = generator.resume_pending()
+    assert results[task_id]["success"]
+    assert all(path.startswith(str(tmp_path)) for path in results[task_id]["files"])
+    assert journal.pending() == []
+    assert generator.resume_pending() == {}
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""ApiKeyPool：Key 解析、least-outstanding 选择、401 / 429 移出与恢复、任务固定 Key"""
+
+import pytest
+
+from bailian_image_gen import BailianImageGenerator
+from key_pool import ApiKeyPool, NoAvailableKeyError, key_id, parse_keys
+from media_storage import MediaStorage
+
+
+def test_parse_keys_splits_and_dedupes():
+    assert parse_keys("a, b;c\nd a") == ["a", "b", "c", "d"]
+    assert parse_keys(["a", " a ", "", "b"]) == ["a", "b"]
+    assert parse_keys(None) == []
+    with pytest.raises(ValueError):
+        ApiKeyPool(" , ")
+
+
+def test_acquire_prefers_least_outstanding():
+    pool = ApiKeyPool("a,b")
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first, second} == {"a", "b"}
+    pool.release(first)
+    assert pool.acquire() == first
+    # 进行中任务相同时按累计提交数轮换
+    pool = ApiKeyPool("a,b")
+    with pool.lease():
+        pass
+    with pool.lease() as key:
+        assert key == "b"
+
+
+def test_lease_exclude():
+    pool = ApiKeyPool("a,b")
+    with pool.lease(exclude=["a"]) as key:
+        assert key == "b"
+    with pytest.raises(NoAvailableKeyError):
+        pool.acquire(exclude=["a", "b"])
+
+
+def test_report_ejects_until_cooldown(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("key_pool.time.monotonic", lambda: clock[0])
+    pool = ApiKeyPool("a,b,c", auth_cooldown=600, quota_cooldown=60)
+    assert pool.report("a", 500) is False
+    assert pool.report("a", 401) is True
+    assert pool.report("b", 429) is True
+    # 最后一个可用 Key 不移出
+    assert pool.report("c", 429) is False
+    assert pool.acquire() == "c"
+    assert pool.stats()[key_id("b")]["ejected"] == "配额耗尽（HTTP 429）"
+    clock[0] += 60
+    assert pool.stats()[key_id("b")]["ejected"] is None
+    assert pool.stats()[key_id("a")]["retry_in"] == 540
+
+
+def test_key_for_prefers_pinned_key():
+    pool = ApiKeyPool("a,b")
+    pool.pin("t-1", "b")
+    assert pool.key_for("t-1") == "b"
+    assert pool.key_for("t-2", key_id("b")) == "b"
+    assert pool.key_for("t-3") == "a"
+
+
+def test_invalid_key_is_skipped(mock_server, tmp_path):
+    pool = ApiKeyPool("invalid-key,test-key")
+    generator = BailianImageGenerator(pool, base_url=mock_server[1], storage=MediaStorage(str(tmp_path)))
+    result = generator.generate_image("猫")
+    assert result["success"], result
+    stats = pool.stats()
+    assert stats[key_id("invalid-key")]["ejected"] == "鉴权失败（HTTP 401）"
+    assert stats[key_id("test-key")]["submitted"] == 1
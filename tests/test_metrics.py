@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""CallTimings 与指标接收器：阶段累计、Prometheus 文本、JSON 行，以及生成结果中的 timing 摘要"""
+
+import json
+
+from bailian_image_gen import BailianImageGenerator
+from media_storage import MediaStorage
+from metrics import CallTimings, JsonLinesMetrics, MultiSink, PrometheusMetrics
+
+
+def make_call():
+    call = CallTimings("generate_image", "wanx-v1")
+    call.endpoint = "text2image"
+    call.add("submit", 0.2)
+    call.add("submit", 0.1)
+    call.add("poll", 1.5)
+    call.polls = 3
+    call.finish(True)
+    return call
+
+
+def test_as_dict_rounds_and_accumulates():
+    summary = make_call().as_dict()
+    assert summary["phases"] == {"submit": 0.3, "poll": 1.5}
+    assert summary["method"] == "generate_image"
+    assert summary["endpoint"] == "text2image"
+    assert summary["polls"] == 3
+    assert summary["success"] is True
+
+
+def test_prometheus_and_json_sinks(tmp_path):
+    prometheus = PrometheusMetrics()
+    path = tmp_path / "timings.jsonl"
+    MultiSink(prometheus, JsonLinesMetrics(str(path))).record_call(make_call())
+    text = prometheus.render()
+    assert 'phase="poll"' in text
+    assert 'model="wanx-v1"' in text
+    assert json.loads(path.read_text(encoding="utf-8"))["phases"]["poll"] == 1.5
+
+
+def test_result_timing_includes_phases(mock_server, tmp_path):
+    generator = BailianImageGenerator("test-key", base_url=mock_server[1], storage=MediaStorage(str(tmp_path)))
+    result = generator.generate_image("猫")
+    assert result["success"], result
+    assert "phases" not in result
+    timing = result["timing"]
+    assert {"queue_seconds", "generation_seconds"} <= set(timing)
+    assert {"submit", "poll", "download"} <= set(timing["phases"])
+    assert timing["polls"] >= 1
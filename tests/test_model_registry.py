@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""ModelRegistry / ModelSpec：按 ID 与名称查找、规则推断、Web 配置重建索引、尺寸与时长校验"""
+
+import pytest
+
+from model_registry import MODEL_TABLE, POLL_PROFILES, TURBO_SIZES, ModelRegistry
+
+
+@pytest.fixture
+def registry():
+    return ModelRegistry()
+
+
+def test_lookup_by_id_and_name(registry):
+    spec = registry.get("wan2.6-t2v")
+    assert spec is registry.by_name("通义万相2.6-T2V")
+    assert (spec.endpoint, spec.kind, spec.async_mode) == ("video", "video", True)
+    assert "prompt_extend" in spec.options
+    assert registry.get("no-such-model") is None
+
+
+def test_rules_apply_to_registered_and_unknown_models(registry):
+    assert registry.get("z-image-turbo").endpoint == "multimodal"
+    assert registry.get("qwen-image-edit").async_mode is False
+    inferred = registry.resolve("wan2.6-i2v-next", "i2v")
+    assert inferred.registered is False
+    assert "shot_type" in inferred.options
+    # 同一模型按其他调用方式使用时重新推断，并缓存结果
+    as_image = registry.resolve("wan2.6-t2v", "image")
+    assert as_image.endpoint == "text2image"
+    assert registry.resolve("wan2.6-t2v", "image") is as_image
+
+
+def test_numbered_menus_have_no_duplicates(registry):
+    menu = registry.numbered(("image", "i2v", "kf2v", "translate"))
+    model_ids = [model_id for model_id, _ in menu.values()]
+    assert len(model_ids) == len(set(model_ids))
+    assert menu["1"] == ("wan2.6-t2i", "通义万相2.6-文生图")
+    assert menu["24"] == ("qwen-mt-image", "通义千问-多语言图像")
+    assert registry.numbered(("translate",)) == {"1": ("qwen-mt-image", "通义千问-多语言图像")}
+
+
+def test_apply_config_replaces_names(registry):
+    registry.apply_config({"image": {"我的模型": "my-model", "万相V1": "wanx-v1"}, "unknown": {"x": "y"}})
+    assert registry.by_name("我的模型").task == "image"
+    assert registry.by_name("万相V1") is registry.get("wanx-v1")
+    assert registry.by_name("x") is None
+    registry.apply_config({})
+    assert registry.by_name("我的模型") is None
+    assert len(registry.models()) == len(MODEL_TABLE)
+
+
+def test_validate_size_and_duration(registry):
+    spec = registry.get("z-image-turbo")
+    spec.validate(size=TURBO_SIZES[0])
+    with pytest.raises(ValueError, match="不支持尺寸"):
+        spec.validate(size="2048*2048")
+    video = registry.get("wan2.6-t2v")
+    video.validate(duration="5")
+    with pytest.raises(ValueError, match="整数"):
+        video.validate(duration="five")
+    # 不限制尺寸的模型不做检查
+    registry.get("wanx-v1").validate(size="4096*4096")
+
+
+def test_clamp_duration(registry):
+    assert registry.get("wan2.5-t2v-preview").clamp_duration(7) == 5
+    assert registry.get("wan2.5-t2v-preview").clamp_duration(1) == 5
+    assert registry.get("wanx2.1-i2v-turbo").clamp_duration(30) == 5
+    assert registry.get("wan2.2-t2v-plus").clamp_duration(5) is None
+
+
+def test_poll_profile(registry):
+    assert registry.poll_profile("wan2.6-t2v", "video") == POLL_PROFILES["video"]
+    assert registry.poll_profile("wan2.6-t2v", "image") == POLL_PROFILES["image"]
+    assert registry.poll_profile("no-such-model", "edit") == POLL_PROFILES["edit"]
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""AdaptivePollSchedule：样本不足时的固定间隔、按历史耗时安排首次查询、退避上限与按进度估算"""
+
+from poll_schedule import MAX_INTERVAL_FACTOR, AdaptivePollSchedule
+
+
+def make_schedule():
+    return AdaptivePollSchedule(jitter=0)
+
+
+def test_first_delay_without_samples_uses_interval():
+    schedule = make_schedule()
+    schedule.record("wanx-v1", 10, 3)
+    assert schedule.first_delay("wanx-v1", 2) == 2
+
+
+def test_first_delay_follows_history():
+    schedule = make_schedule()
+    for seconds in (10, 12, 14, 16, 18):
+        schedule.record("wanx-v1", seconds, 2)
+    assert schedule.first_delay("wanx-v1", 2) == 12
+    # 其他模型不受影响
+    assert schedule.first_delay("flux-dev", 2) == 2
+
+
+def test_backoff_is_capped():
+    schedule = make_schedule()
+    delays = [schedule.next_delay("wanx-v1", 2, 0, polls) for polls in range(1, 10)]
+    assert delays == sorted(delays)
+    assert delays[-1] == 2 * MAX_INTERVAL_FACTOR
+
+
+def test_waits_until_expected_completion():
+    schedule = make_schedule()
+    for seconds in (30, 30, 30):
+        schedule.record("wanx-v1", seconds, 2)
+    # 已等待 28 秒，90% 的任务在 30 秒完成：2 秒后查询，而不是按退避等待更久
+    assert schedule.next_delay("wanx-v1", 5, 28, 3) == 2
+
+
+def test_progress_estimates_remaining_time():
+    schedule = make_schedule()
+    # 40 秒完成 80%，剩余约 10 秒，安排在一半处
+    assert schedule.next_delay("wan2.6-t2v", 5, 40, 2, {"task_progress": 80}) == 5
+    assert schedule.next_delay("wan2.6-t2v", 5, 40, 2, {"task_progress": "bad"}) == 5 * 1.5
+
+
+def test_stats_report_polls_per_task():
+    schedule = make_schedule()
+    schedule.record("wanx-v1", 10, 2)
+    schedule.record("wanx-v1", 20, 4)
+    stats = schedule.stats()["wanx-v1"]
+    assert stats["samples"] == 2
+    assert stats["avg_polls"] == 3
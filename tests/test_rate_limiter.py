@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""TokenBucket / ConcurrencyGovernor / RateLimiter：突发与限速、按模型和 scope 计数的并发名额、统计、排队时取消"""
+
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from bailian_image_gen import BailianImageGenerator
+from key_pool import key_id
+from media_storage import MediaStorage
+from rate_limiter import ConcurrencyGovernor, RateLimiter, TokenBucket
+
+
+def test_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=20, burst=2)
+    assert bucket.acquire() < 0.01
+    assert bucket.acquire() < 0.01
+    waited = bucket.acquire()
+    assert 0.02 < waited < 0.2
+    stats = bucket.stats()
+    assert stats["acquired"] == 3
+    assert stats["max_wait_seconds"] > 0
+
+
+def test_bucket_without_rate_never_waits():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.acquire() < 0.01 for _ in range(50))
+
+
+def test_slot_limits_running_tasks():
+    governor = ConcurrencyGovernor(max_running=1)
+    waits = []
+
+    def second():
+        with governor.slot("wanx-v1") as waited:
+            waits.append(waited)
+
+    with governor.slot("wanx-v1"):
+        thread = threading.Thread(target=second)
+        thread.start()
+        time.sleep(0.1)
+        assert governor.stats()["wanx-v1"] == {"running": 1, "waiting": 1, "limit": 1, "wait_seconds": 0.0}
+    thread.join(2)
+    assert waits and waits[0] >= 0.1
+    assert governor.stats()["wanx-v1"]["running"] == 0
+
+
+def test_model_limits_and_scopes_are_separate():
+    governor = ConcurrencyGovernor(max_running=1, limits={"flux-dev": 2})
+    assert governor.limit_for("flux-dev") == 2
+    assert governor.limit_for("wanx-v1") == 1
+    # 不同 Key（scope）各自计数，同一模型也不会互相阻塞
+    with governor.slot("wanx-v1", "key-a"), governor.slot("wanx-v1", "key-b"):
+        stats = governor.stats()
+        assert stats["wanx-v1@key-a"]["running"] == 1
+        assert stats["wanx-v1@key-b"]["running"] == 1
+        assert stats["wanx-v1@key-b"]["limit"] == 1
+
+
+def test_limiter_buckets_per_endpoint_and_scope():
+    limiter = RateLimiter(submit_qps=100, endpoint_qps={"video": 5}, poll_qps=0)
+    limiter.submit("text2image")
+    limiter.submit("video", "key-a")
+    limiter.poll()
+    stats = limiter.stats()
+    assert stats["submit"]["text2image"]["rate"] == 100
+    assert stats["submit"]["video@key-a"]["rate"] == 5
+    assert stats["poll"]["acquired"] == 1
+
+
+def test_slot_wait_stops_when_cancelled(monkeypatch):
+    monkeypatch.setattr("rate_limiter.CANCEL_CHECK_INTERVAL", 0.05)
+    governor = ConcurrencyGovernor(max_running=1)
+    cancel_event = threading.Event()
+    errors = []
+
+    def waiter():
+        try:
+            with governor.slot("wanx-v1", cancel_event=cancel_event):
+                pass
+        except CancelledError as e:
+            errors.append(e)
+
+    with governor.slot("wanx-v1"):
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.1)
+        cancel_event.set()
+        # 名额仍被占用，排队线程也应在检查间隔内放弃
+        thread.join(1)
+        assert not thread.is_alive()
+        assert len(errors) == 1
+        assert governor.stats()["wanx-v1"] == {"running": 1, "waiting": 0, "limit": 1, "wait_seconds": 0.0}
+
+
+def test_bucket_wait_stops_when_cancelled():
+    bucket = TokenBucket(rate=0.5, burst=1)
+    bucket.acquire()
+    cancel_event = threading.Event()
+    threading.Timer(0.05, cancel_event.set).start()
+    started = time.monotonic()
+    with pytest.raises(CancelledError):
+        bucket.acquire(cancel_event)
+    assert time.monotonic() - started < 1
+
+
+def test_generation_cancelled_while_waiting_for_slot(mock_server, tmp_path, monkeypatch):
+    monkeypatch.setattr("rate_limiter.CANCEL_CHECK_INTERVAL", 0.05)
+    limiter = RateLimiter(max_running=1)
+    generator = BailianImageGenerator("test-key", base_url=mock_server[1], rate_limiter=limiter,
+                                      storage=MediaStorage(str(tmp_path)))
+    cancel_event = threading.Event()
+    results = []
+
+    def run():
+        with generator.progress(None, cancel_event):
+            results.append(generator.generate_image("猫"))
+
+    with limiter.task_slot("wanx-v1", key_id("test-key")):
+        thread = threading.Thread(target=run)
+        thread.start()
+        time.sleep(0.1)
+        cancel_event.set()
+        thread.join(1)
+        assert not thread.is_alive()
+    assert len(results) == 1
+    assert results[0]["success"] is False
+    assert results[0]["error"] == "任务已取消"
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""ResultCache：缓存条件、命中与失效、LRU 淘汰，以及重启后保留访问顺序"""
+
+import os
+
+import result_cache
+from result_cache import ResultCache
+
+
+def write_file(tmp_path, name, size=100):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_only_seeded_requests_are_cacheable(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    assert cache.cacheable({"parameters": {"seed": 1}})
+    assert not cache.cacheable({"parameters": {}})
+    assert ResultCache(str(tmp_path / "cache"), allow_unseeded=True).cacheable({"parameters": {}})
+
+
+def test_key_ignores_dict_order():
+    assert ResultCache.make_key({"a": 1, "b": {"c": 2, "d": 3}}) == ResultCache.make_key({"b": {"d": 3, "c": 2}, "a": 1})
+
+
+def test_put_then_get(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    files = cache.put("ab" * 32, [write_file(tmp_path, "1.png")])
+    assert cache.get("ab" * 32) == files
+    assert cache.get("cd" * 32) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_missing_file_invalidates_entry(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    files = cache.put("ab" * 32, [write_file(tmp_path, "1.png")])
+    os.remove(files[0])
+    assert cache.get("ab" * 32) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entry_is_dropped(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_age=-1)
+    cache.put("ab" * 32, [write_file(tmp_path, "1.png")])
+    assert cache.get("ab" * 32) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=250)
+    cache.put("aa" * 32, [write_file(tmp_path, "a.png")])
+    cache.put("bb" * 32, [write_file(tmp_path, "b.png")])
+    assert cache.get("aa" * 32)
+    cache.put("cc" * 32, [write_file(tmp_path, "c.png")])
+    assert cache.get("aa" * 32) and cache.get("cc" * 32)
+    assert cache.get("bb" * 32) is None
+
+
+def test_access_order_survives_restart(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cache = ResultCache(cache_dir, max_bytes=250)
+    cache.put("aa" * 32, [write_file(tmp_path, "a.png")])
+    cache.put("bb" * 32, [write_file(tmp_path, "b.png")])
+    assert cache.get("aa" * 32)
+    cache.close()
+
+    restarted = ResultCache(cache_dir, max_bytes=250)
+    restarted.put("cc" * 32, [write_file(tmp_path, "c.png")])
+    # 重启前刚用过的 aa 保留，最久未使用的 bb 被淘汰
+    assert restarted.get("aa" * 32)
+    assert restarted.get("bb" * 32) is None
+
+
+def test_hits_are_flushed_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "ACCESS_FLUSH_HITS", 2)
+    cache_dir = str(tmp_path / "cache")
+    cache = ResultCache(cache_dir)
+    cache.put("aa" * 32, [write_file(tmp_path, "a.png")])
+    created = ResultCache(cache_dir)._index["aa" * 32]["last_access"]
+    cache.get("aa" * 32)
+    cache.get("aa" * 32)
+    # 没有调用 close，第二次命中时已写回
+    assert ResultCache(cache_dir)._index["aa" * 32]["last_access"] > created
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""RetryPolicy / CircuitBreaker：退避与 Retry-After、熔断状态转换、提交请求只在 429 / 503 时重试"""
+
+import io
+
+import pytest
+import requests
+
+from dashscope_payloads import build_headers, service_urls
+from http_pool import HttpPool
+from mock_dashscope import MockConfig, start_mock_server
+from retry_policy import CircuitBreaker, CircuitOpenError, RetryPolicy, _parse_retry_after
+
+
+class _ScriptedHttp:
+    """按顺序返回状态码或抛出异常的连接池，记录请求次数"""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        step = self.steps.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        response = requests.Response()
+        response.status_code = step
+        response.raw = io.BytesIO(b"")
+        return response
+
+
+def make_policy(**kwargs):
+    kwargs.setdefault("base_delay", 0)
+    return RetryPolicy(**kwargs)
+
+
+def test_parse_retry_after():
+    assert _parse_retry_after("3") == 3
+    assert _parse_retry_after("-1") == 0
+    assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert _parse_retry_after("soon") is None
+    assert _parse_retry_after(None) is None
+
+
+def test_backoff_doubles_and_is_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+    assert [policy.backoff(attempt) for attempt in (1, 2, 3, 4)] == [1, 2, 4, 5]
+    assert policy.backoff(1, "2") == 2
+    assert policy.backoff(1, "60") == 5
+
+
+def test_breaker_opens_then_recovers(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("retry_policy.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("tasks", failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock[0] += 10
+    assert breaker.state == "half-open"
+    breaker.before_call()
+    # 试探请求进行中，其他请求仍被拒绝
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.stats() == {"state": "closed", "failures": 0, "rejected": 2}
+
+
+def test_failed_trial_reopens(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("retry_policy.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("tasks", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_unexpected_error_clears_trial(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("retry_policy.time.monotonic", lambda: clock[0])
+    policy = make_policy(failure_threshold=1, reset_timeout=10)
+    policy.breaker("tasks").record_failure()
+    clock[0] += 10
+    http = _ScriptedHttp(requests.exceptions.ChunkedEncodingError("broken"), 200)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        policy.request(http, "GET", "http://example.invalid", "tasks")
+    # 试探失败后重新熔断，冷却结束还能再放行试探请求，而不是永远拒绝
+    with pytest.raises(CircuitOpenError):
+        policy.request(http, "GET", "http://example.invalid", "tasks")
+    clock[0] += 10
+    assert policy.request(http, "GET", "http://example.invalid", "tasks").status_code == 200
+    assert policy.breaker("tasks").state == "closed"
+
+
+def test_idempotent_request_retries_server_errors():
+    http = _ScriptedHttp(500, requests.ConnectionError("reset"), 200)
+    response = make_policy().request(http, "GET", "http://example.invalid", "tasks")
+    assert response.status_code == 200
+    assert http.calls == 3
+
+
+def test_submit_retries_only_when_task_was_not_created():
+    policy = make_policy()
+    http = _ScriptedHttp(503, 429, 200)
+    assert policy.request(http, "POST", "http://example.invalid", "text2image", idempotent=False).status_code == 200
+    assert http.calls == 3
+    http = _ScriptedHttp(500, 200)
+    assert policy.request(http, "POST", "http://example.invalid", "text2image", idempotent=False).status_code == 500
+    http = _ScriptedHttp(requests.Timeout("slow"), 200)
+    with pytest.raises(requests.Timeout):
+        policy.request(http, "POST", "http://example.invalid", "text2image", idempotent=False)
+    assert http.calls == 1
+
+
+def test_attempts_override():
+    http = _ScriptedHttp(429, 200)
+    response = make_policy().request(http, "GET", "http://example.invalid", "tasks", attempts=1)
+    assert response.status_code == 429
+    assert http.calls == 1
+
+
+def test_throttled_submit_against_mock():
+    server, base_url = start_mock_server(MockConfig(submit_latency=0.01, sigma=0, throttle_rate=1.0, retry_after=0))
+    try:
+        http = HttpPool()
+        response = make_policy(max_attempts=2).request(
+            http, "POST", service_urls(base_url)["API_URL"], "text2image", idempotent=False,
+            headers=build_headers("test-key", True), json={"model": "wanx-v1", "input": {"prompt": "猫"}})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "0"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""TaskPoller：终态完成 Future、重复登记、意外异常与熔断期间的查询计数"""
+
+import time
+
+import pytest
+import requests
+
+from dashscope_payloads import service_urls
+from http_pool import HttpPool
+from retry_policy import RetryPolicy
+from task_poller import TaskPoller
+
+
+@pytest.fixture
+def poller():
+    http = HttpPool()
+    poller = TaskPoller(http, retry_policy=RetryPolicy(max_attempts=1))
+    yield poller
+    poller.shutdown()
+
+
+def test_terminal_status_resolves_future(submit_task, poller):
+    task_id, url, _ = submit_task()
+    future = poller.track(task_id, url, {"Authorization": "Bearer test-key"}, interval=0.1, timeout=10)
+    output = future.result(timeout=10)
+    assert output["task_status"] == "SUCCEEDED"
+    assert future.polls >= 1
+    assert poller.stats()["outstanding"] == 0
+
+
+def test_unknown_task_stops_polling(mock_server, poller):
+    url = service_urls(mock_server[1])["TASK_URL"] + "no-such-task"
+    future = poller.track("no-such-task", url, {"Authorization": "Bearer test-key"}, interval=0.1, timeout=10)
+    assert future.result(timeout=10)["task_status"] == "UNKNOWN"
+
+
+def test_duplicate_track_shares_future(submit_task, poller):
+    task_id, url, _ = submit_task()
+    headers = {"Authorization": "Bearer test-key"}
+    first = poller.track(task_id, url, headers, interval=0.1, timeout=10)
+    second = poller.track(task_id, url, headers, interval=0.1, timeout=10)
+    assert second is first
+    assert first.result(timeout=10)["task_status"] == "SUCCEEDED"
+
+
+class _ListBodyHttp:
+    """返回非对象 JSON 的连接池，模拟格式异常的响应体"""
+
+    def request(self, method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"[1, 2]"
+        return response
+
+
+def test_unexpected_error_fails_future():
+    poller = TaskPoller(_ListBodyHttp())
+    try:
+        future = poller.track("t-1", "http://example.invalid/t-1", {}, interval=0.01, timeout=5)
+        with pytest.raises(AttributeError):
+            future.result(timeout=5)
+        assert poller.stats()["outstanding"] == 0
+    finally:
+        poller.shutdown()
+
+
+def test_open_circuit_is_not_counted_as_poll():
+    retry = RetryPolicy(failure_threshold=1, reset_timeout=60)
+    retry.breaker("tasks").record_failure()
+    poller = TaskPoller(_ListBodyHttp(), retry_policy=retry)
+    try:
+        future = poller.track("t-1", "http://example.invalid/t-1", {}, interval=0.01, timeout=0.5)
+        time.sleep(0.2)
+        assert future.polls == 0
+        assert poller.stats()["total_polls"] == 0
+    finally:
+        poller.shutdown()
+
+
+def test_untrack_cancels_future(poller):
+    future = poller.track("t-1", "http://example.invalid/t-1", {}, interval=60, timeout=120)
+    assert poller.untrack("t-1")
+    assert future.cancelled()
+    assert not poller.untrack("t-1")
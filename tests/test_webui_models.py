@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Web UI 模型配置：修改时保存副本后整体替换、保存失败保持原配置、过期的显示名称报错"""
+
+import json
+
+import pytest
+
+import webui_models
+from model_registry import MODEL_REGISTRY
+
+
+@pytest.fixture
+def models_config(tmp_path, monkeypatch):
+    path = tmp_path / "models_config.json"
+    config = {category: {} for category in webui_models.MODEL_CATEGORIES}
+    config["image"] = {"万相V1": "wanx-v1"}
+    monkeypatch.setattr(webui_models, "MODELS_CONFIG_FILE", str(path))
+    monkeypatch.setattr(webui_models, "ALL_MODELS", config)
+    yield path
+    MODEL_REGISTRY.apply_config(webui_models.ALL_MODELS)
+
+
+def test_update_replaces_config_without_mutating_old(models_config):
+    old = webui_models.ALL_MODELS
+
+    def add(config):
+        config["image"]["我的模型"] = "my-model"
+
+    assert webui_models.update_models_config(add) is True
+    assert "我的模型" not in old["image"]
+    assert webui_models.ALL_MODELS is not old
+    assert webui_models.get_model_id("image", "我的模型") == "my-model"
+    assert json.loads(models_config.read_text(encoding="utf-8"))["image"]["我的模型"] == "my-model"
+    assert MODEL_REGISTRY.by_name("我的模型").model_id == "my-model"
+
+
+def test_failed_save_keeps_config(models_config, monkeypatch):
+    monkeypatch.setattr(webui_models, "MODELS_CONFIG_FILE", str(models_config.parent / "missing" / "config.json"))
+    old = webui_models.ALL_MODELS
+    assert webui_models.update_models_config(lambda config: config["image"].clear()) is False
+    assert webui_models.ALL_MODELS is old
+    assert old["image"] == {"万相V1": "wanx-v1"}
+
+
+def test_stale_name_raises(models_config):
+    assert webui_models.get_model_id("image", "万相V1", "wanx-v1") == "wanx-v1"
+    assert webui_models.get_model_id("image", None, "wanx-v1") == "wanx-v1"
+    with pytest.raises(ValueError, match="已不存在"):
+        webui_models.get_model_id("image", "已删除的模型", "wanx-v1")
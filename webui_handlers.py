@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web UI 处理函数
+设置 API Key 创建会话生成器，以及各选项卡的生成处理函数：在后台线程调用生成器并逐步输出状态文字，
+结束时输出结果文件与耗时说明。
+"""
+
+import os
+
+import gradio as gr
+
+from structured_log import get_logger
+from webui_jobs import job_key, log_handler_error, run_with_progress
+from webui_models import get_model_id
+from webui_services import create_generator, save_api_key
+
+logger = get_logger("webui")
+
+
+def init_generator(api_key):
+    """初始化当前会话的生成器（保存到会话状态，不影响其他会话）"""
+    try:
+        key_to_use = api_key.strip()
+        if key_to_use:
+            generator = create_generator(key_to_use)
+            # 保存到本地文件（不写入环境变量，避免其他会话回退到这个 Key）
+            save_api_key(key_to_use)
+            count = len(generator.keys)
+            message = f"✅ 已设置 {count} 个 API Key（自动负载均衡）并保存到本地！" if count > 1 else "✅ API Key 设置成功并已保存到本地！"
+            return generator, message, gr.update(visible=False), gr.update(visible=True)
+        else:
+            # 尝试从环境变量读取
+            generator = create_generator(os.environ.get("DASHSCOPE_API_KEY"))
+            return generator, "✅ 已从环境变量读取 API Key", gr.update(visible=False), gr.update(visible=True)
+    except ValueError as e:
+        return None, f"❌ {str(e)}", gr.update(visible=True), gr.update(visible=False)
+    except Exception as e:
+        logger.error("初始化生成器失败: %s", e, exc_info=True)
+        return None, f"❌ 初始化失败: {str(e)}", gr.update(visible=True), gr.update(visible=False)
+
+
+def format_timing(result):
+    """排队等待与生成耗时说明，命中缓存等没有排队计时的结果返回空字符串"""
+    timing = result.get("timing")
+    if not timing or "queue_seconds" not in timing:
+        return ""
+    return f"\n\n⏱️ 排队 {timing['queue_seconds']:.1f} 秒 · 生成 {timing['generation_seconds']:.1f} 秒"
+
+
+def format_upload(result):
+    """参考图上传体积说明，没有压缩时返回空字符串"""
+    upload = result.get("upload")
+    if not upload or upload["saved_bytes"] <= 0:
+        return ""
+    ratio = upload["saved_bytes"] * 100 / upload["original_bytes"]
+    return (f"\n\n📦 参考图已压缩: {upload['original_bytes'] / 1024:.0f} KB → "
+            f"{upload['upload_bytes'] / 1024:.0f} KB（节省 {ratio:.0f}%）")
+
+
+def generate_video(prompt, model_name, size, duration, audio_url, generator=None, request: gr.Request = None):
+    """生成视频"""
+    if generator is None:
+        yield None, "❌ 请先设置 API Key"
+        return
+
+    if not prompt.strip():
+        yield None, "❌ 请输入提示词"
+        return
+
+    try:
+        model = get_model_id("video", model_name, "wan2.6-t2v")
+    except ValueError as e:
+        yield None, f"❌ {e}"
+        return
+
+    try:
+        for status, result in run_with_progress(
+            generator.generate_video,
+            key=job_key(request, "video"),
+            prompt=prompt.strip(),
+            model=model,
+            size=size,
+            duration=duration,
+            audio_url=audio_url if audio_url.strip() else None
+        ):
+            if result is None:
+                yield gr.update(), status
+
+        if result["success"]:
+            video_path = result["files"][0]
+            if os.path.exists(video_path):
+                yield video_path, f"✅ 视频生成成功！\n\n保存位置: {video_path}{format_timing(result)}"
+            else:
+                yield None, "⚠️ 视频已生成但未能读取文件"
+        else:
+            yield None, f"❌ 生成失败: {result.get('error', '未知错误')}"
+
+    except Exception as e:
+        log_handler_error("generate_video", e, request)
+        yield None, f"❌ 错误: {str(e)}"
+
+
+def generate_image(prompt, model_name, size, seed=None, generator=None, request: gr.Request = None):
+    """生成图片"""
+    if generator is None:
+        yield None, "❌ 请先设置 API Key"
+        return
+
+    if not prompt.strip():
+        yield None, "❌ 请输入提示词"
+        return
+
+    try:
+        model = get_model_id("image", model_name, "wanx-v1")
+    except ValueError as e:
+        yield None, f"❌ {e}"
+        return
+
+    # 处理 seed
+    seed_val = None
+    if seed is not None and seed != "":
+        try:
+            seed_val = int(seed)
+        except (TypeError, ValueError):
+            pass
+
+    try:
+        for status, result in run_with_progress(
+            generator.generate_image,
+            key=job_key(request, "image"),
+            prompt=prompt.strip(),
+            model=model,
+            size=size,
+            seed=seed_val
+        ):
+            if result is None:
+                yield gr.update(), status
+
+        if result["success"]:
+            # 读取生成的图片
+            images = []
+            for file_path in result["files"]:
+                if os.path.exists(file_path):
+                    images.append(file_path)
+
+            if images:
+                file_list = "\n".join([f"📁 {f}" for f in result["files"]])
+                title = "♻️ 命中缓存（相同参数与种子）" if result.get("cached") else "✅ 生成成功！"
+                yield images, f"{title}\n\n保存位置:\n{file_list}{format_timing(result)}"
+            else:
+                yield None, "⚠️ 图片已生成但未能读取文件"
+        else:
+            yield None, f"❌ 生成失败: {result.get('error', '未知错误')}"
+
+    except Exception as e:
+        log_handler_error("generate_image", e, request)
+        yield None, f"❌ 错误: {str(e)}"
+
+
+def generate_turbo_image(prompt, model_name, size, generator=None, request: gr.Request = None):
+    """极速生成图片 (Z-IMAGE-turbo)"""
+    if generator is None:
+        yield None, "❌ 请先设置 API Key"
+        return
+
+    if not prompt.strip():
+        yield None, "❌ 请输入提示词"
+        return
+
+    try:
+        model = get_model_id("turbo", model_name, "z-image-turbo")
+    except ValueError as e:
+        yield None, f"❌ {e}"
+        return
+
+    try:
+        # 极速模型通常不支持 seed
+        for status, result in run_with_progress(
+            generator.generate_image,
+            key=job_key(request, "turbo"),
+            prompt=prompt.strip(),
+            model=model,
+            size=size
+        ):
+            if result is None:
+                yield gr.update(), status
+
+        if result["success"]:
+            images = [f for f in result["files"] if os.path.exists(f)]
+            if images:
+                file_list = "\n".join([f"📁 {f}" for f in result["files"]])
+                yield images, f"⚡ 极速生成成功！\n\n保存位置:\n{file_list}{format_timing(result)}"
+            else:
+                yield None, "⚠️ 图片已生成但未能读取文件"
+        else:
+            yield None, f"❌ 生成失败: {result.get('error', '未知错误')}"
+
+    except Exception as e:
+        log_handler_error("generate_turbo_image", e, request)
+        yield None, f"❌ 错误: {str(e)}"
+
+
+def edit_image(prompt, image, model_name, size, seed=None, generator=None, request: gr.Request = None):
+    """编辑图片"""
+    if generator is None:
+        yield None, "❌ 请先设置 API Key"
+        return
+    
+    if not prompt.strip():
+        yield None, "❌ 请输入编辑指令"
+        return
+    
+    if image is None:
+        yield None, "❌ 请上传参考图片"
+        return
+    
+    try:
+        model = get_model_id("edit", model_name, "qwen-image-edit")
+    except ValueError as e:
+        yield None, f"❌ {e}"
+        return
+    
+    # 处理 seed
+    seed_val = None
+    if seed is not None and seed != "":
+        try:
+            seed_val = int(seed)
+        except (TypeError, ValueError):
+            pass
+    
+    try:
+        # image 是 Gradio 返回的图片路径
+        for status, result in run_with_progress(
+            generator.edit_image,
+            key=job_key(request, "edit"),
+            prompt=prompt.strip(),
+            image_path=image,
+            model=model,
+            size=size,
+            seed=seed_val
+        ):
+            if result is None:
+                yield gr.update(), status
+        
+        if result["success"]:
+            # 读取生成的图片
+            images = []
+            for file_path in result["files"]:
+                if os.path.exists(file_path):
+                    images.append(file_path)
+            
+            if images:
+                file_list = "\n".join([f"📁 {f}" for f in result["files"]])
+                title = "♻️ 命中缓存（相同参数与种子）" if result.get("cached") else "✅ 编辑成功！"
+                yield images, f"{title}\n\n保存位置:\n{file_list}{format_upload(result)}{format_timing(result)}"
+            else:
+                yield None, "⚠️ 图片已编辑但未能读取文件"
+        else:
+            yield None, f"❌ 编辑失败: {result.get('error', '未知错误')}"
+            
+    except Exception as e:
+        log_handler_error("edit_image", e, request)
+        yield None, f"❌ 错误: {str(e)}"
+
+
+def generate_i2v(prompt, image, model_name, resolution, duration, audio_url, shot_type, prompt_extend, generator=None, request: gr.Request = None):
+    """图生视频"""
+    if generator is None:
+        yield None, "❌ 请先设置 API Key"
+        return
+
+    if image is None:
+        yield None, "❌ 请上传首帧图片"
+        return
+
+    if not prompt.strip():
+        yield None, "❌ 请输入动态描述"
+        return
+
+    try:
+        model = get_model_id("i2v", model_name, "wan2.6-i2v-flash")
+    except ValueError as e:
+        yield None, f"❌ {e}"
+        return
+
+    try:
+        for status, result in run_with_progress(
+            generator.image_to_video,
+            key=job_key(request, "i2v"),
+            prompt=prompt.strip(),
+            image_path=image,
+            model=model,
+            resolution=resolution,
+            duration=duration,
+            audio_url=audio_url if audio_url.strip() else None,
+            shot_type=shot_type,
+            prompt_extend=prompt_extend
+        ):
+            if result is None:
+                yield gr.update(), status
+
+        if result["success"]:
+            video_path = result["files"][0]
+            yield video_path, f"✅ 图生视频成功！\n\n保存位置: {video_path}{format_upload(result)}{format_timing(result)}"
+        else:
+            yield None, f"❌ 生成失败: {result.get('error', '未知错误')}"
+
+    except Exception as e:
+        log_handler_error("generate_i2v", e, request)
+        yield None, f"❌ 错误: {str(e)}"
+
+
+def generate_kf2v(prompt, first_img, last_img, model_name, resolution, prompt_extend, neg_prompt, template, generator=None, request: gr.Request = None):
+    """首尾帧生视频 / 视频特效"""
+    if generator is None:
+        yield None, "❌ 请先设置 API Key"
+        return
+
+    if first_img is None:
+        yield None, "❌ 请至少上传首帧图片"
+        return
+
+    try:
+        model = get_model_id("kf2v", model_name, "wan2.2-kf2v-flash")
+    except ValueError as e:
+        yield None, f"❌ {e}"
+        return
+
+    try:
+        for status, result in run_with_progress(
+            generator.frames_to_video,
+            key=job_key(request, "kf2v"),
+            prompt=prompt.strip(),
+            first_frame=first_img,
+            last_frame=last_img if last_img else None,
+            model=model,
+            resolution=resolution,
+            prompt_extend=prompt_extend,
+            negative_prompt=neg_prompt.strip() if neg_prompt else None,
+            template=template.strip() if template else None
+        ):
+            if result is None:
+                yield gr.update(), status
+
+        if result["success"]:
+            video_path = result["files"][0]
+            yield video_path, f"✅ 视频生成成功！\n\n保存位置: {video_path}{format_upload(result)}{format_timing(result)}"
+        else:
+            yield None, f"❌ 生成失败: {result.get('error', '未知错误')}"
+
+    except Exception as e:
+        log_handler_error("generate_kf2v", e, request)
+        yield None, f"❌ 错误: {str(e)}"
+
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web UI 图片选项卡：文生图、极速生图、图像编辑
+每个函数在当前 gr.Tabs 中添加一个选项卡并绑定生成 / 取消事件，返回模型下拉菜单（供配置热加载刷新）。
+"""
+
+import gradio as gr
+
+from webui_handlers import edit_image, generate_image, generate_turbo_image
+from webui_jobs import CONCURRENCY_LIMITS, make_cancel_handler
+from webui_models import SIZE_CHOICES, TURBO_SIZE_CHOICES, get_choices
+
+
+def build_image_tab(generator_state):
+    """文生图选项卡：布局与生成 / 取消事件，返回模型下拉菜单"""
+    with gr.TabItem("📝 文生图"):
+        gr.Markdown("**输入文字描述生成图片**")
+
+        with gr.Row():
+            with gr.Column(scale=2):
+                prompt_input = gr.Textbox(
+                    label="提示词 (Prompt)",
+                    placeholder="描述您想要生成的图片，例如：一只穿着宇航服的猫咪在月球上漫步",
+                    lines=3,
+                    max_lines=5
+                )
+
+            with gr.Column(scale=1):
+                model_dropdown = gr.Dropdown(
+                    label="选择模型",
+                    choices=get_choices("image"),
+                    value="通义万相-文生图V1"
+                )
+
+                size_dropdown = gr.Dropdown(
+                    label="图片尺寸",
+                    choices=SIZE_CHOICES,
+                    value="1024*1024"
+                )
+
+                seed_input = gr.Number(
+                    label="随机种子 (可选)",
+                    value=None,
+                    precision=0,
+                    minimum=0,
+                    maximum=999999999
+                )
+
+        with gr.Row():
+
+            generate_btn = gr.Button("🚀 生成图片", variant="primary", size="lg")
+
+            image_cancel_btn = gr.Button("⏹️ 取消", variant="stop", size="lg", scale=0, min_width=120)
+
+        gr.Markdown("---")
+        gr.Markdown("### 🖼️ 生成结果")
+
+        with gr.Row():
+            with gr.Column():
+                output_gallery = gr.Gallery(
+                    label="生成的图片",
+                    show_label=True,
+                    elem_id="gallery",
+                    columns=2,
+                    rows=2,
+                    height="auto",
+                    object_fit="contain"
+                )
+
+            with gr.Column():
+                output_status = gr.Textbox(
+                    label="状态信息",
+                    lines=10,
+                    max_lines=15,
+                    interactive=False
+                )
+
+        # 使用说明
+        gr.Markdown("""
+        ---
+        ### 💡 提示词技巧
+
+        - 使用详细的描述，包含主体、场景、风格、光线等
+        - 可以指定艺术风格，如"油画风格"、"水彩画"、"赛博朋克"等
+        - 支持中英文输入
+
+        **示例**:
+        - "一只可爱的橘猫坐在窗台上，阳光洒在身上，写实风格"
+        - "未来城市夜景，霓虹灯闪烁，赛博朋克风格，高清细节"
+        """)
+
+    # 文生图事件绑定
+    image_event = generate_btn.click(
+        fn=generate_image,
+        inputs=[prompt_input, model_dropdown, size_dropdown, seed_input, generator_state],
+        outputs=[output_gallery, output_status],
+        concurrency_limit=CONCURRENCY_LIMITS["image"],
+        concurrency_id="image"
+    )
+    image_cancel_btn.click(fn=make_cancel_handler("image"), outputs=[output_status], cancels=[image_event])
+
+    return model_dropdown
+
+
+def build_turbo_tab(generator_state):
+    """极速生图选项卡 (Z-IMAGE-turbo)：布局与生成 / 取消事件，返回模型下拉菜单"""
+    with gr.TabItem("⚡ 极速生图"):
+        gr.Markdown("**亚秒级极速生成，即刻呈现**")
+
+        with gr.Row():
+            with gr.Column(scale=2):
+                turbo_prompt_input = gr.Textbox(
+                    label="提示词 (Prompt)",
+                    placeholder="输入您想要生成的画面描述...",
+                    lines=3,
+                    max_lines=5
+                )
+
+            with gr.Column(scale=1):
+                turbo_model_dropdown = gr.Dropdown(
+                    label="选择模型",
+                    choices=get_choices("turbo"),
+                    value="Z-IMAGE-turbo 极速生图"
+                )
+
+                turbo_size_dropdown = gr.Dropdown(
+                    label="图片尺寸",
+                    choices=TURBO_SIZE_CHOICES,
+                    value="1024*1024"
+                )
+
+        with gr.Row():
+
+            turbo_generate_btn = gr.Button("⚡ 极速生成", variant="primary", size="lg")
+
+            turbo_cancel_btn = gr.Button("⏹️ 取消", variant="stop", size="lg", scale=0, min_width=120)
+
+        gr.Markdown("---")
+        gr.Markdown("### 🖼️ 生成结果")
+
+        with gr.Row():
+            with gr.Column():
+                turbo_output_gallery = gr.Gallery(
+                    label="生成的图片",
+                    show_label=True,
+                    columns=1,
+                    height="auto",
+                    object_fit="contain"
+                )
+
+            with gr.Column():
+                turbo_output_status = gr.Textbox(
+                    label="状态信息",
+                    lines=10,
+                    interactive=False
+                )
+
+        gr.Markdown("""
+        ---
+        ### ⚡ Z-IMAGE-turbo 特点
+        - **极速**: 亚秒级推理，无需长时间等待
+        - **高质量**: 支持 1024*1024 高清输出
+        - **双语**: 完美支持中文和英文指令
+        """)
+
+    # 极速生图事件绑定
+    turbo_event = turbo_generate_btn.click(
+        fn=generate_turbo_image,
+        inputs=[turbo_prompt_input, turbo_model_dropdown, turbo_size_dropdown, generator_state],
+        outputs=[turbo_output_gallery, turbo_output_status],
+        concurrency_limit=CONCURRENCY_LIMITS["turbo"],
+        concurrency_id="turbo"
+    )
+    turbo_cancel_btn.click(fn=make_cancel_handler("turbo"), outputs=[turbo_output_status], cancels=[turbo_event])
+
+    return turbo_model_dropdown
+
+
+def build_edit_tab(generator_state):
+    """图像编辑选项卡：布局与生成 / 取消事件，返回模型下拉菜单"""
+    with gr.TabItem("✏️ 图像编辑"):
+        gr.Markdown("**上传图片并进行智能编辑**")
+
+        with gr.Row():
+            with gr.Column(scale=1):
+                edit_image_input = gr.Image(
+                    label="上传参考图片",
+                    type="filepath",
+                    height=300
+                )
+
+            with gr.Column(scale=2):
+                edit_prompt_input = gr.Textbox(
+                    label="编辑指令 (Prompt)",
+                    placeholder="描述您想要如何编辑图片，例如：把背景换成海滩，给人物戴上墨镜",
+                    lines=3,
+                    max_lines=5
+                )
+
+        with gr.Row():
+            with gr.Column(scale=1):
+                edit_model_dropdown = gr.Dropdown(
+                    label="选择编辑模型",
+                    choices=get_choices("edit"),
+                    value="通义千问-图像编辑Plus"
+                )
+
+            with gr.Column(scale=1):
+                edit_size_dropdown = gr.Dropdown(
+                    label="输出尺寸",
+                    choices=SIZE_CHOICES,
+                    value="1024*1024"
+                )
+
+            with gr.Column(scale=1):
+                edit_seed_input = gr.Number(
+                    label="随机种子 (可选)",
+                    value=None,
+                    precision=0,
+                    minimum=0,
+                    maximum=999999999
+                )
+
+        with gr.Row():
+
+            edit_btn = gr.Button("✏️ 编辑图片", variant="primary", size="lg")
+
+            edit_cancel_btn = gr.Button("⏹️ 取消", variant="stop", size="lg", scale=0, min_width=120)
+
+        gr.Markdown("---")
+        gr.Markdown("### 🖼️ 编辑结果")
+
+        with gr.Row():
+            with gr.Column():
+                edit_output_gallery = gr.Gallery(
+                    label="编辑后的图片",
+                    show_label=True,
+                    elem_id="edit_gallery",
+                    columns=2,
+                    rows=2,
+                    height="auto",
+                    object_fit="contain"
+                )
+
+            with gr.Column():
+                edit_output_status = gr.Textbox(
+                    label="状态信息",
+                    lines=10,
+                    max_lines=15,
+                    interactive=False
+                )
+
+        # 使用说明
+        gr.Markdown("""
+        ---
+        ### 💡 编辑指令技巧
+
+        - 清晰描述您想要修改的内容
+        - 可以指定添加、删除、修改图像中的元素
+        - 支持风格转换、背景替换、局部修改等
+
+        **示例**:
+        - "把背景换成星空"
+        - "给人物穿上红色外套"
+        - "将图片转换成油画风格"
+        - "去掉图片中的水印"
+        """)
+
+    # 图像编辑事件绑定
+    edit_event = edit_btn.click(
+        fn=edit_image,
+        inputs=[edit_prompt_input, edit_image_input, edit_model_dropdown, edit_size_dropdown, edit_seed_input, generator_state],
+        outputs=[edit_output_gallery, edit_output_status],
+        concurrency_limit=CONCURRENCY_LIMITS["edit"],
+        concurrency_id="edit"
+    )
+    edit_cancel_btn.click(fn=make_cancel_handler("edit"), outputs=[edit_output_status], cancels=[edit_event])
+
+    return edit_model_dropdown
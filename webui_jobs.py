@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web UI 生成任务
+请求队列与各选项卡的并发上限、在后台线程运行生成器方法并逐条产出进度文字，
+以及按 (会话, 选项卡) 登记进行中的任务，供取消按钮使用。
+"""
+
+import queue
+import threading
+
+import gradio as gr
+
+from structured_log import get_logger, log_context
+
+logger = get_logger("webui")
+
+# 请求队列：最多排队的请求数，以及各选项卡同时处理的请求数（视频耗时长，名额更少）
+QUEUE_MAX_SIZE = 64
+CONCURRENCY_LIMITS = {
+    "image": 8,
+    "turbo": 8,
+    "edit": 4,
+    "video": 2,
+    "i2v": 2,
+    "kf2v": 2,
+}
+# 进行中的生成任务：(会话, 选项卡) -> {"cancel": threading.Event, "task_id": 任务ID, "generator": 会话生成器}
+ACTIVE_JOBS = {}
+ACTIVE_JOBS_LOCK = threading.Lock()
+
+
+def describe_progress(stage, info):
+    """把生成器的进度事件转换为状态栏文字"""
+    if stage == "queued":
+        return "⏳ 排队中，等待提交名额..."
+    if stage == "submitted":
+        return f"📤 任务已提交，任务ID: {info['task_id']}"
+    if stage == "running":
+        progress = f" {info['progress']}%" if info.get("progress") is not None else ""
+        return f"🎨 生成中{progress}（{info.get('status') or 'RUNNING'}）"
+    if stage == "downloading":
+        return f"⬇️ 生成完成，正在下载 {info['count']} 个文件..."
+    return f"⏳ {stage}"
+
+
+def job_key(request, tab):
+    """当前会话某个选项卡的任务键，用于取消"""
+    return (request.session_hash if request is not None else None, tab)
+
+
+def run_with_progress(method, key=None, **kwargs):
+    """
+    在后台线程调用生成器方法，期间逐条产出 (状态文字, None)，结束时产出 (None, 结果)
+
+    Args:
+        method: 会话生成器的绑定方法，如 generator.generate_video
+        key: job_key() 返回的任务键，登记后可通过 cancel_job 取消
+        **kwargs: 方法参数
+    """
+    events = queue.Queue()
+    outcome = {}
+    job = {"cancel": threading.Event(), "task_id": None, "generator": method.__self__}
+    if key is not None:
+        with ACTIVE_JOBS_LOCK:
+            ACTIVE_JOBS[key] = job
+
+    def on_progress(stage, info):
+        if stage == "submitted":
+            job["task_id"] = info["task_id"]
+        events.put(describe_progress(stage, info))
+
+    def worker():
+        try:
+            # 该会话的所有日志（含生成器内部）附带会话标识
+            with log_context(session=key[0] if key else None), \
+                    method.__self__.progress(on_progress, cancel_event=job["cancel"]):
+                outcome["result"] = method(**kwargs)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            if key is not None:
+                with ACTIVE_JOBS_LOCK:
+                    if ACTIVE_JOBS.get(key) is job:
+                        del ACTIVE_JOBS[key]
+            events.put(None)
+
+    threading.Thread(target=worker, daemon=True).start()
+    while True:
+        status = events.get()
+        if status is None:
+            break
+        yield status, None
+    if "error" in outcome:
+        raise outcome["error"]
+    yield None, outcome["result"]
+
+
+def log_handler_error(handler, error, request=None):
+    """记录界面处理函数捕获的异常（界面上只显示错误文字，完整堆栈写入日志）"""
+    logger.error("%s 出错: %s", handler, error, exc_info=error,
+                 extra={"session": request.session_hash if request is not None else None})
+
+
+def cancel_job(tab, request=None):
+    """取消当前会话在该选项卡中进行的任务"""
+    with ACTIVE_JOBS_LOCK:
+        job = ACTIVE_JOBS.get(job_key(request, tab))
+    if job is None:
+        return "ℹ️ 当前没有进行中的任务"
+    job["cancel"].set()
+    if job["task_id"] is None:
+        return "⏹️ 已取消（任务尚未创建，提交请求返回后会立即取消）"
+    result = job["generator"].cancel(job["task_id"])
+    if result["remote"]:
+        return f"⏹️ 已取消任务 {job['task_id']}"
+    return f"⏹️ 已停止等待任务 {job['task_id']}（服务端未能取消: {result.get('error', '任务已开始生成')}）"
+
+
+def make_cancel_handler(tab):
+    """生成某个选项卡的取消按钮处理函数（Gradio 按类型注解注入 request）"""
+    def handler(request: gr.Request):
+        return cancel_job(tab, request)
+    return handler
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web UI 模型管理选项卡
+增删各分类的模型并保存到 models_config.json（保存后刷新所有选项卡的模型下拉菜单），
+以及性能分析开关（所有会话共享，随时开关无需重启）。
+"""
+
+import gradio as gr
+
+import webui_models as models
+from webui_jobs import log_handler_error
+from webui_models import MODEL_DROPDOWN_CATEGORIES, MODELS_WATCHER, get_choices, save_models_config, update_models_config
+from webui_services import PROFILER
+
+
+def describe_profiler(reports=None):
+    """性能分析状态文字"""
+    status = PROFILER.status()
+    if status["enabled"]:
+        memory = "，含内存分配" if status["memory"] else ""
+        text = f"🔬 分析中（{status['mode']}{memory}）: 已分析 {status['requests']} 次调用，进行中 {status['active']} 次"
+        if status["skipped"]:
+            text += f"，跳过 {status['skipped']} 次（cProfile 不支持并发）"
+    else:
+        text = "⏸️ 性能分析未开启"
+    text += f"\n📁 结果目录: {status['output_dir']}"
+    if reports is not None:
+        text += "\n📄 汇总报告: " + (", ".join(reports) if reports else "无（没有被分析的调用）")
+    return text
+
+
+def toggle_profiling(enabled, mode, memory):
+    """开启 / 关闭性能分析（所有会话共享），关闭时写出汇总报告"""
+    try:
+        if enabled:
+            PROFILER.enable(mode, memory)
+            return describe_profiler()
+        return describe_profiler(PROFILER.disable())
+    except (OSError, ValueError) as e:
+        log_handler_error("toggle_profiling", e)
+        return f"❌ 切换性能分析失败: {e}"
+
+
+def write_profile_report():
+    """不停止分析，写出目前为止的汇总报告"""
+    try:
+        return describe_profiler(PROFILER.write_report())
+    except OSError as e:
+        log_handler_error("write_profile_report", e)
+        return f"❌ 写入汇总报告失败: {e}"
+
+
+def build_manage_tab(model_dropdowns, models_version):
+    """
+    模型管理选项卡
+
+    Args:
+        model_dropdowns: 各选项卡的模型下拉菜单（顺序与 MODEL_DROPDOWN_CATEGORIES 一致），保存后刷新
+        models_version: 当前会话下拉菜单对应的模型配置版本（gr.State）
+    """
+    with gr.TabItem("⚙️ 模型管理"):
+        gr.Markdown("### 自定义模型列表管理")
+
+        with gr.Row():
+            with gr.Column():
+                cat_select = gr.Dropdown(
+                    label="模型分类",
+                    choices=[
+                        ("📝 文生图", "image"),
+                        ("⚡ 极速生图", "turbo"),
+                        ("🎥 文生视频", "video"),
+                        ("🎬 图生视频", "i2v"),
+                        ("🎞️ 首尾帧视频", "kf2v"),
+                        ("✏️ 图像编辑", "edit")
+                    ],
+                    value="image"
+                )
+
+                existing_models = gr.Dropdown(
+                    label="现有模型",
+                    choices=get_choices("image")
+                )
+
+                delete_btn = gr.Button("🗑️ 删除选中模型", variant="stop")
+
+            with gr.Column():
+                new_name = gr.Textbox(label="显示名称 (例如: 通义万相2.6)", placeholder="请输入名称")
+                new_id = gr.Textbox(label="模型 ID (例如: wan2.6-t2i)", placeholder="请输入百炼官方 ID")
+                add_btn = gr.Button("➕ 添加模型", variant="primary")
+
+        gr.Markdown("---")
+        save_config_btn = gr.Button("💾 保存配置并更新界面", variant="primary", size="lg")
+        manage_status = gr.Textbox(label="操作状态", interactive=False)
+
+        with gr.Accordion("🔬 性能分析", open=False):
+            gr.Markdown("""
+            开启后每次生成调用都会写入分析结果（所有会话共享，随时开关无需重启）：
+            - **采样**：每个调用一个 `.folded` 文件，汇总为 `aggregate.folded`（含下载 / 轮询线程），可用 flamegraph.pl 或 speedscope 生成火焰图
+            - **cProfile**：每个调用一个 `.prof` 文件，汇总为 `aggregate.prof` 与 `aggregate.txt`
+            - **内存分配**：用 tracemalloc 记录参考图编码与请求体构建的分配，每个调用一个 `.mem.txt`（分析开销较大）
+            """)
+            with gr.Row():
+                profile_enabled = gr.Checkbox(label="开启性能分析", value=lambda: PROFILER.enabled)
+                profile_mode = gr.Radio(
+                    label="分析方式",
+                    choices=[("采样（火焰图）", "sample"), ("cProfile", "cprofile")],
+                    value=lambda: PROFILER.mode
+                )
+                profile_memory = gr.Checkbox(label="记录内存分配", value=lambda: PROFILER.memory)
+            profile_report_btn = gr.Button("📄 写出汇总报告")
+            profile_status = gr.Textbox(label="分析状态", value=describe_profiler, interactive=False, lines=3)
+
+    # --- 模型管理内部逻辑（模型配置由所有会话共享，修改时保存副本后整体替换，通过模块属性读取当前配置） ---
+    def on_cat_change(cat):
+        return gr.update(choices=get_choices(cat), value=None)
+
+    def on_add_model(cat, name, m_id):
+        if not name or not m_id: return gr.update(choices=get_choices(cat)), "❌ 名称和 ID 不能为空"
+        def add(config):
+            config[cat][name] = m_id
+
+        if not update_models_config(add):
+            return gr.update(choices=get_choices(cat)), "❌ 保存模型配置失败，详见日志"
+        return gr.update(choices=get_choices(cat), value=name), f"✅ 已添加并保存: {name}"
+
+    def on_del_model(cat, name):
+        if not name: return gr.update(choices=get_choices(cat)), "❌ 请先选择要删除的模型"
+        if not update_models_config(lambda config: config[cat].pop(name, None)):
+            return gr.update(choices=get_choices(cat)), "❌ 保存模型配置失败，详见日志"
+        return gr.update(choices=get_choices(cat), value=None), f"🗑️ 已删除并保存: {name}"
+
+    def on_save_all():
+        if not save_models_config(models.ALL_MODELS):
+            return ["❌ 保存模型配置失败，详见日志"] + [gr.update() for _ in MODEL_DROPDOWN_CATEGORIES] + [gr.update()]
+        models.update_all_choices()
+        MODELS_WATCHER.mark_current()
+        # 返回所有下拉菜单的更新对象
+        updates = [gr.update(choices=get_choices(category)) for category in MODEL_DROPDOWN_CATEGORIES]
+        return ["✅ 配置已保存，所有界面已刷新！"] + updates + [MODELS_WATCHER.version]
+
+    cat_select.change(on_cat_change, inputs=[cat_select], outputs=[existing_models])
+    add_btn.click(on_add_model, inputs=[cat_select, new_name, new_id], outputs=[existing_models, manage_status])
+    delete_btn.click(on_del_model, inputs=[cat_select, existing_models], outputs=[existing_models, manage_status])
+    # 勾选框开关分析；已开启时切换方式或内存选项会按新设置重新开始
+    profile_enabled.input(
+        toggle_profiling, inputs=[profile_enabled, profile_mode, profile_memory], outputs=[profile_status]
+    )
+    for profile_option in (profile_mode, profile_memory):
+        profile_option.input(
+            lambda enabled, mode, memory: toggle_profiling(True, mode, memory) if enabled else describe_profiler(),
+            inputs=[profile_enabled, profile_mode, profile_memory], outputs=[profile_status]
+        )
+    profile_report_btn.click(write_profile_report, outputs=[profile_status])
+
+    # 保存按钮触发全站刷新
+    save_config_btn.click(on_save_all, outputs=[manage_status] + list(model_dropdowns) + [models_version])
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web UI 模型配置
+各选项卡下拉菜单的模型列表保存在 models_config.json（分类 -> {显示名称: 模型 ID}），
+配置登记到模型注册表，文件被手动修改或其他进程保存后自动热加载。
+"""
+
+import json
+import os
+
+import gradio as gr
+
+from config_watcher import ConfigWatcher
+from model_registry import MODEL_REGISTRY, TURBO_SIZES
+from structured_log import get_logger
+
+logger = get_logger("webui")
+
+MODELS_CONFIG_FILE = "models_config.json"
+MODEL_CATEGORIES = ("image", "video", "edit", "turbo", "i2v", "kf2v")
+# 各选项卡模型下拉菜单对应的分类（与 create_ui 中 model_dropdowns 的顺序一致）
+MODEL_DROPDOWN_CATEGORIES = ("image", "turbo", "video", "i2v", "kf2v", "edit")
+# 默认配置（配置文件不存在或损坏时使用并写回）
+DEFAULT_MODELS_CONFIG = {
+    "image": {
+        "通义万相-文生图V1": "wanx-v1",
+        "通义万相2.6-文生图": "wan2.6-t2i",
+        "通义万相2.1-Turbo": "wanx2.1-t2i-turbo",
+        "通义千问-图像生成": "qwen-image",
+        "Flux-Schnell": "flux-schnell"
+    },
+    "video": {
+        "通义万相2.6-T2V": "wan2.6-t2v",
+        "通义万相2.5-T2V预览": "wan2.5-t2v-preview"
+    },
+    "edit": {
+        "通义千问-图像编辑Plus": "qwen-image-edit-plus",
+        "通义千问-图像编辑Max": "qwen-image-edit-max"
+    },
+    "turbo": {
+        "Z-IMAGE-turbo 极速生图": "z-image-turbo"
+    },
+    "i2v": {
+        "通义万相2.6-I2V-Flash": "wan2.6-i2v-flash",
+        "通义万相2.5-I2V预览": "wan2.5-i2v-preview"
+    },
+    "kf2v": {
+        "通义万相2.2-KF2V-Flash": "wan2.2-kf2v-flash",
+        "通义万相2.1-KF2V-Plus": "wanx2.1-kf2v-plus"
+    }
+}
+
+# 尺寸选项
+SIZE_CHOICES = [
+    "512*512",
+    "768*768",
+    "1024*1024",
+    "1280*720",
+    "1920*1080",
+]
+# 极速生图专用尺寸
+TURBO_SIZE_CHOICES = list(TURBO_SIZES)
+# 视频分辨率档位
+RESOLUTION_CHOICES = ["480P", "720P", "1080P"]
+
+
+def read_models_config(path=MODELS_CONFIG_FILE):
+    """读取模型配置文件，缺少的分类补为空，文件损坏时抛出异常"""
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    for category in MODEL_CATEGORIES:
+        config.setdefault(category, {})
+    return config
+
+
+def load_models_config():
+    """加载模型配置"""
+    if os.path.exists(MODELS_CONFIG_FILE):
+        try:
+            return read_models_config()
+        except (OSError, ValueError) as e:
+            logger.warning("读取 %s 失败，使用默认模型配置: %s", MODELS_CONFIG_FILE, e, exc_info=True)
+    default_config = json.loads(json.dumps(DEFAULT_MODELS_CONFIG))
+    # 保存默认配置
+    save_models_config(default_config)
+    return default_config
+
+
+def save_models_config(config):
+    """
+    保存模型配置（先写临时文件再替换，其他进程不会读到写了一半的文件）
+
+    Returns:
+        bool: 是否保存成功
+    """
+    try:
+        tmp_path = MODELS_CONFIG_FILE + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, MODELS_CONFIG_FILE)
+        return True
+    except (OSError, TypeError) as e:
+        logger.error("保存模型配置失败: %s", e, exc_info=True)
+        return False
+
+
+# 初始化模型列表
+ALL_MODELS = load_models_config()
+# 配置中的显示名称与新增模型登记到模型注册表，未内置的模型按所在分类推断接口
+MODEL_REGISTRY.apply_config(ALL_MODELS)
+
+
+def update_all_choices():
+    """当前模型配置登记到模型注册表"""
+    MODEL_REGISTRY.apply_config(ALL_MODELS)
+
+
+def apply_models_config(config):
+    """整体替换模型配置（热加载回调），下拉菜单在用户下一次操作时刷新"""
+    global ALL_MODELS
+    ALL_MODELS = config
+    update_all_choices()
+
+
+# 监视模型配置文件：手动修改或其他进程保存后自动生效，无需重启
+MODELS_WATCHER = ConfigWatcher(MODELS_CONFIG_FILE, read_models_config, apply_models_config)
+
+
+def update_models_config(change):
+    """
+    修改模型配置：在当前配置的副本上调用 change(config)，保存成功后整体替换（与热加载相同），
+    其他会话正在读取的旧配置不会被原地修改
+
+    Args:
+        change: 修改副本的函数
+
+    Returns:
+        bool: 是否保存成功；失败时当前配置保持不变
+    """
+    config = {category: dict(entries) for category, entries in ALL_MODELS.items()}
+    change(config)
+    if not save_models_config(config):
+        return False
+    apply_models_config(config)
+    MODELS_WATCHER.mark_current()
+    return True
+
+
+def refresh_model_choices(seen_version):
+    """
+    模型配置有变化时刷新各选项卡的模型下拉菜单（下拉菜单获得焦点或页面加载时触发）
+
+    Args:
+        seen_version: 当前会话已显示的配置版本
+    """
+    MODELS_WATCHER.check()
+    version = MODELS_WATCHER.version
+    if seen_version == version:
+        return [gr.update() for _ in MODEL_DROPDOWN_CATEGORIES] + [seen_version]
+    return [gr.update(choices=get_choices(category)) for category in MODEL_DROPDOWN_CATEGORIES] + [version]
+
+
+def get_choices(category):
+    return list(ALL_MODELS.get(category, {}).keys())
+
+
+def get_model_id(category, name, default=None):
+    """
+    下拉菜单显示名称对应的模型 ID，没有选择模型时返回 default
+
+    Raises:
+        ValueError: 显示名称已不在模型配置中（下拉菜单显示的是被删除或改名前的配置）
+    """
+    if not name:
+        return default
+    model_id = ALL_MODELS.get(category, {}).get(name)
+    if model_id is None:
+        raise ValueError(f"模型「{name}」已不存在，请重新选择")
+    return model_id
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web UI 共享服务
+生成器按会话创建（保存在 gr.State 中），连接池、轮询器、下载池、限流器、重试策略、缓存、任务日志、
+耗时指标与性能分析器由所有会话共享；相同的 Key 组合共用一个 ApiKeyPool。
+"""
+
+import os
+import threading
+
+from bailian_image_gen import BailianImageGenerator
+from downloader import DownloadPool
+from http_pool import HttpPool
+from image_preprocess import ImagePreprocessor, preprocess_enabled
+from job_journal import JobJournal
+from key_pool import ApiKeyPool, parse_keys
+from metrics import PrometheusMetrics
+from profiling import GenerationProfiler
+from rate_limiter import RateLimiter
+from retry_policy import RetryPolicy
+from result_cache import ResultCache
+from structured_log import get_logger
+from task_poller import TaskPoller
+
+logger = get_logger("webui")
+
+# 共享连接池，新会话直接复用已建立的连接
+HTTP_POOL = HttpPool()
+# 共享轮询服务，所有进行中的任务由同一个调度线程查询
+# 共享限流器：所有会话合计的提交频率、查询频率与每个模型的并发任务数，超出时排队而不是触发 429
+RATE_LIMITER = RateLimiter()
+# 共享重试策略：按接口熔断，DashScope 故障时快速失败而不是让每个会话都卡在超时里
+RETRY_POLICY = RetryPolicy()
+TASK_POLLER = TaskPoller(HTTP_POOL, rate_limiter=RATE_LIMITER, retry_policy=RETRY_POLICY)
+# 共享下载池，限制所有会话合计的并行下载数
+DOWNLOAD_POOL = DownloadPool(HTTP_POOL)
+# 结果缓存：固定种子的重复请求直接返回已生成的图片
+RESULT_CACHE = ResultCache()
+# 参考图预处理（可选，默认原样上传）：BAILIAN_PREPROCESS=1 时按目标尺寸缩小并重新压缩后再上传
+PREPROCESSOR = None
+if preprocess_enabled():
+    try:
+        PREPROCESSOR = ImagePreprocessor()
+    except ImportError as e:
+        logger.warning("未能开启参考图预处理: %s", e)
+# 耗时指标：所有会话的生成调用按模型 / 接口 / 阶段聚合，通过 Web UI 同一端口的 /metrics 以 Prometheus 格式提供
+METRICS = PrometheusMetrics()
+# 性能分析：在“模型管理”选项卡中随时开关（无需重启），启动时可通过环境变量 BAILIAN_PROFILE=sample|cprofile 开启
+PROFILER = GenerationProfiler()
+# 任务日志：记录已提交的异步任务，重启后继续等待并下载上次未完成的结果
+JOB_JOURNAL = JobJournal()
+# 已恢复过未完成任务的 API Key 指纹，每个 Key 只恢复一次
+_RESUMED_KEYS = set()
+_RESUME_LOCK = threading.Lock()
+# 相同的 Key 组合共用一个 ApiKeyPool，多个会话之间按进行中任务数均衡并共享停用状态
+KEY_POOLS = {}
+KEY_POOLS_LOCK = threading.Lock()
+API_KEY_FILE = "api_key.txt"
+
+
+def load_saved_api_key():
+    """从本地文件加载保存的 API Key"""
+    if os.path.exists(API_KEY_FILE):
+        try:
+            with open(API_KEY_FILE, "r", encoding="utf-8") as f:
+                key = f.read().strip()
+                if key:
+                    return key
+        except OSError as e:
+            logger.warning("读取 %s 失败: %s", API_KEY_FILE, e, exc_info=True)
+    return ""
+
+
+def save_api_key(api_key):
+    """保存 API Key 到本地文件"""
+    try:
+        with open(API_KEY_FILE, "w", encoding="utf-8") as f:
+            f.write(api_key.strip())
+    except OSError as e:
+        logger.error("保存 API Key 失败: %s", e, exc_info=True)
+
+
+def resume_pending_for(generator):
+    """Key 第一次被设置时，在后台恢复该 Key 上次退出时未完成的任务"""
+    with _RESUME_LOCK:
+        new_ids = [kid for kid in generator.keys.ids if kid not in _RESUMED_KEYS]
+        _RESUMED_KEYS.update(new_ids)
+    if new_ids:
+        threading.Thread(target=generator.resume_pending, kwargs={"key_ids": new_ids}, daemon=True).start()
+
+
+def create_generator(api_key):
+    """
+    为一个会话创建生成器：Key 属于该会话，连接池、轮询器、下载池、限流器等沿用全局共享的实例
+
+    Raises:
+        ValueError: 没有可用的 API Key
+    """
+    keys = tuple(parse_keys(api_key))
+    if not keys:
+        raise ValueError("请提供API Key或设置环境变量 DASHSCOPE_API_KEY")
+    with KEY_POOLS_LOCK:
+        pool = KEY_POOLS.get(keys)
+        if pool is None:
+            pool = KEY_POOLS[keys] = ApiKeyPool(keys)
+    generator = BailianImageGenerator(
+        pool, http_pool=HTTP_POOL, poller=TASK_POLLER, download_pool=DOWNLOAD_POOL, cache=RESULT_CACHE,
+        preprocessor=PREPROCESSOR, journal=JOB_JOURNAL, rate_limiter=RATE_LIMITER, retry_policy=RETRY_POLICY,
+        metrics=METRICS, profiler=PROFILER)
+    resume_pending_for(generator)
+    return generator
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web UI 视频选项卡：图生视频、首尾帧视频、文生视频
+每个函数在当前 gr.Tabs 中添加一个选项卡并绑定生成 / 取消事件，返回模型下拉菜单（供配置热加载刷新）。
+"""
+
+import gradio as gr
+
+from webui_handlers import generate_i2v, generate_kf2v, generate_video
+from webui_jobs import CONCURRENCY_LIMITS, make_cancel_handler
+from webui_models import RESOLUTION_CHOICES, get_choices
+
+
+def build_i2v_tab(generator_state):
+    """图生视频选项卡：布局与生成 / 取消事件，返回模型下拉菜单"""
+    with gr.TabItem("🎬 图生视频"):
+        gr.Markdown("**上传首帧图片并描述动作生成视频**")
+
+        with gr.Row():
+            with gr.Column(scale=1):
+                i2v_image_input = gr.Image(
+                    label="上传首帧图片",
+                    type="filepath",
+                    height=300
+                )
+
+            with gr.Column(scale=2):
+                i2v_prompt_input = gr.Textbox(
+                    label="动态描述 (Prompt)",
+                    placeholder="描述图片中应该发生的动作，例如：人物转头微笑，背景云朵流动",
+                    lines=3,
+                    max_lines=5
+                )
+
+                i2v_audio_url = gr.Textbox(
+                    label="音频URL (可选自动配音)",
+                    placeholder="输入音频URL",
+                    lines=1
+                )
+
+        with gr.Row():
+            with gr.Column():
+                i2v_model_dropdown = gr.Dropdown(
+                    label="选择模型",
+                    choices=get_choices("i2v"),
+                    value="通义万相2.6-I2V-Flash"
+                )
+
+            with gr.Column():
+                i2v_res_dropdown = gr.Dropdown(
+                    label="分辨率档位",
+                    choices=RESOLUTION_CHOICES,
+                    value="720P"
+                )
+
+            with gr.Column():
+                i2v_duration = gr.Slider(
+                    label="视频时长 (秒)",
+                    minimum=2,
+                    maximum=15,
+                    value=5,
+                    step=1
+                )
+
+        with gr.Row():
+            with gr.Column():
+                i2v_shot_type = gr.Radio(
+                    label="镜头类型 (仅wan2.6)",
+                    choices=["single", "multi"],
+                    value="single"
+                )
+            with gr.Column():
+                i2v_extend = gr.Checkbox(
+                    label="开启提示词智能改写",
+                    value=True
+                )
+
+        with gr.Row():
+
+            i2v_generate_btn = gr.Button("🚀 生成视频", variant="primary", size="lg")
+
+            i2v_cancel_btn = gr.Button("⏹️ 取消", variant="stop", size="lg", scale=0, min_width=120)
+
+        gr.Markdown("---")
+        gr.Markdown("### 🎬 生成结果")
+
+        with gr.Row():
+            with gr.Column():
+                i2v_video_output = gr.Video(
+                    label="生成的视频",
+                    show_label=True
+                )
+
+            with gr.Column():
+                i2v_output_status = gr.Textbox(
+                    label="状态信息",
+                    lines=10,
+                    interactive=False
+                )
+
+    # 图生视频事件绑定
+    i2v_event = i2v_generate_btn.click(
+        fn=generate_i2v,
+        inputs=[
+            i2v_prompt_input, i2v_image_input, i2v_model_dropdown,
+            i2v_res_dropdown, i2v_duration, i2v_audio_url,
+            i2v_shot_type, i2v_extend,
+            generator_state
+        ],
+        outputs=[i2v_video_output, i2v_output_status],
+        concurrency_limit=CONCURRENCY_LIMITS["i2v"],
+        concurrency_id="i2v"
+    )
+    i2v_cancel_btn.click(fn=make_cancel_handler("i2v"), outputs=[i2v_output_status], cancels=[i2v_event])
+
+    return i2v_model_dropdown
+
+
+def build_kf2v_tab(generator_state):
+    """首尾帧视频选项卡：布局与生成 / 取消事件，返回模型下拉菜单"""
+    with gr.TabItem("🎞️ 首尾帧视频"):
+        gr.Markdown("**上传起始和结束图片，生成中间过渡视频**")
+
+        with gr.Row():
+            with gr.Column():
+                kf2v_first_input = gr.Image(
+                    label="上传首帧 (起始)",
+                    type="filepath",
+                    height=250
+                )
+            with gr.Column():
+                kf2v_last_input = gr.Image(
+                    label="上传尾帧 (结束)",
+                    type="filepath",
+                    height=250
+                )
+
+        with gr.Row():
+            with gr.Column(scale=2):
+                kf2v_prompt_input = gr.Textbox(
+                    label="过渡描述 (Prompt)",
+                    placeholder="描述首帧到尾帧之间发生的动作...",
+                    lines=3
+                )
+                with gr.Row():
+                    kf2v_neg_prompt = gr.Textbox(
+                        label="反向提示词 (Negative)",
+                        placeholder="不希望出现的元素...",
+                        scale=1
+                    )
+                    kf2v_template = gr.Textbox(
+                        label="特效模板 (Template)",
+                        placeholder="例如: hanfu-1",
+                        scale=1
+                    )
+            with gr.Column(scale=1):
+                kf2v_model_dropdown = gr.Dropdown(
+                    label="选择模型",
+                    choices=get_choices("kf2v"),
+                    value="通义万相2.2-KF2V-Flash"
+                )
+                kf2v_res_dropdown = gr.Dropdown(
+                    label="分辨率档位",
+                    choices=RESOLUTION_CHOICES,
+                    value="480P"
+                )
+                kf2v_extend = gr.Checkbox(
+                    label="开启提示词智能改写",
+                    value=True
+                )
+
+        with gr.Row():
+
+            kf2v_generate_btn = gr.Button("🚀 生成过渡视频", variant="primary", size="lg")
+
+            kf2v_cancel_btn = gr.Button("⏹️ 取消", variant="stop", size="lg", scale=0, min_width=120)
+
+        gr.Markdown("---")
+        gr.Markdown("### 🎞️ 生成结果")
+
+        with gr.Row():
+            with gr.Column():
+                kf2v_video_output = gr.Video(
+                    label="生成的视频",
+                    show_label=True
+                )
+
+            with gr.Column():
+                kf2v_output_status = gr.Textbox(
+                    label="状态信息",
+                    lines=10,
+                    interactive=False
+                )
+
+    # 首尾帧视频事件绑定
+    kf2v_event = kf2v_generate_btn.click(
+        fn=generate_kf2v,
+        inputs=[
+            kf2v_prompt_input, kf2v_first_input, kf2v_last_input,
+            kf2v_model_dropdown, kf2v_res_dropdown, kf2v_extend,
+            kf2v_neg_prompt, kf2v_template,
+            generator_state
+        ],
+        outputs=[kf2v_video_output, kf2v_output_status],
+        concurrency_limit=CONCURRENCY_LIMITS["kf2v"],
+        concurrency_id="kf2v"
+    )
+    kf2v_cancel_btn.click(fn=make_cancel_handler("kf2v"), outputs=[kf2v_output_status], cancels=[kf2v_event])
+
+    return kf2v_model_dropdown
+
+
+def build_video_tab(generator_state):
+    """文生视频选项卡：布局与生成 / 取消事件，返回模型下拉菜单"""
+    with gr.TabItem("🎥 文生视频"):
+        gr.Markdown("**输入文字描述生成视频**")
+
+        with gr.Row():
+            with gr.Column(scale=2):
+                video_prompt_input = gr.Textbox(
+                    label="提示词 (Prompt)",
+                    placeholder="描述您想要生成的视频，例如：一只穿着宇航服的猫咪在月球上漫步",
+                    lines=3,
+                    max_lines=5
+                )
+
+                audio_url_input = gr.Textbox(
+                    label="音频URL (可选)",
+                    placeholder="输入音频URL，用于自动配音",
+                    lines=1
+                )
+
+            with gr.Column(scale=1):
+                video_model_dropdown = gr.Dropdown(
+                    label="选择模型",
+                    choices=get_choices("video"),
+                    value="通义万相2.6-T2V"
+                )
+
+                video_size_dropdown = gr.Dropdown(
+                    label="视频尺寸",
+                    choices=["832*480", "1280*720", "1920*1080"],
+                    value="1280*720"
+                )
+
+                video_duration_input = gr.Number(
+                    label="视频时长 (秒)",
+                    value=5,
+                    precision=0,
+                    minimum=2,
+                    maximum=15
+                )
+
+        with gr.Row():
+
+            generate_video_btn = gr.Button("🚀 生成视频", variant="primary", size="lg")
+
+            video_cancel_btn = gr.Button("⏹️ 取消", variant="stop", size="lg", scale=0, min_width=120)
+
+        gr.Markdown("---")
+        gr.Markdown("### 🎬 生成结果")
+
+        with gr.Row():
+            with gr.Column():
+                video_output = gr.Video(
+                    label="生成的视频",
+                    show_label=True
+                )
+
+            with gr.Column():
+                video_output_status = gr.Textbox(
+                    label="状态信息",
+                    lines=10,
+                    max_lines=15,
+                    interactive=False
+                )
+
+        # 使用说明
+        gr.Markdown("""
+        ---
+        ### 💡 提示词技巧
+
+        - 使用详细的描述，包含主体、场景、风格、光线等
+        - 可以指定艺术风格，如"油画风格"、"水彩画"、"赛博朋克"等
+        - 支持中英文输入
+
+        **示例**:
+        - "一只可爱的橘猫坐在窗台上，阳光洒在身上，写实风格"
+        - "未来城市夜景，霓虹灯闪烁，赛博朋克风格，高清细节"
+        """)
+
+    # 文生视频事件绑定
+    video_event = generate_video_btn.click(
+        fn=generate_video,
+        inputs=[video_prompt_input, video_model_dropdown, video_size_dropdown, video_duration_input, audio_url_input, generator_state],
+        outputs=[video_output, video_output_status],
+        concurrency_limit=CONCURRENCY_LIMITS["video"],
+        concurrency_id="video"
+    )
+    video_cancel_btn.click(fn=make_cancel_handler("video"), outputs=[video_output_status], cancels=[video_event])
+
+    return video_model_dropdown